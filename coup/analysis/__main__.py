@@ -1,11 +1,12 @@
 import pandas as pd
 import numpy as np
-import random
+import os
+import sys
 from pathlib import Path
-from typing import List
 
-from coup.engine.engine import Engine
-from coup.bots.bots.base_bot import BaseBot
+from coup.analysis.latency import latency_table, profile_bots
+from coup.analysis.sequential import run_until_confident
+from coup.analysis.tournament import stream_bots
 
 from coup.bots.bots.examples.ambassador import ExampleAmbassador
 from coup.bots.bots.examples.assassin import ExampleAssassin
@@ -23,87 +24,16 @@ from coup.bots.bots.foreign_aid_bot import ForeignAidBot
 
 
 
-def select_bots(bot_main:BaseBot, bot_pool:list[BaseBot]) -> List[BaseBot]:
-    """ Selects main bot and 4 random choice bots from a pool """
-    bot_classes = [bot_main]
-    bot_classes += random.sample(bot_pool, 4)
-    return bot_classes
-
-
-def test_bots(game_count:int, bot_main:BaseBot, bot_pool:list[BaseBot]) -> pd.DataFrame:
-    """
-        Plays games on bots and returns a DataFrame of game results for analysis.
-    """
-
-
-
-    print(f"Playing {game_count} games...")
-    # for i,b in enumerate(bot_classes):
-    #     print(f"bot{i} = {b}")
-    print()
-
-    results = {
-        "game_num": [],     # Game number (index from 0)
-        "turns": [],        # Number of turns in game
-        "tie": [],          # Whether or not game was a tie
-        "bot_name": [],     # Name of bot class (cls.__name__)
-        "table_pos": [],    # Table position of bot in game
-        "game_rank": []     # Final rank of bot in game (-1 if tie)
-    }
-
-    player_order = list(range(5))
-
-    for g in range(game_count):
-        print(f"Game {g}/{GAME_COUNT}", end="\r")
-
-        bot_classes = select_bots(bot_main, bot_pool)
-        random.shuffle(player_order)
-
-        bot_classes_ordered = [bot_classes[k] for k in player_order]
-        # input()
-        engine = Engine(bot_classes_ordered, debug=False)
-        engine.run_game()
-
-        # Table positions ordered by final rank
-        player_rank = [p.player_id for p in engine.eliminated_players]
-        player_rank += [p.player_id for p in engine.remaining_players]
-        player_rank.reverse()
-
-        # Bot numbers ordered by final rank
-        bot_rank = [player_order[i] for i in player_rank]
-
-        # If more than one player remains then they each tie
-        remaining_players_num = len(engine.remaining_players)
-        if remaining_players_num == 1:
-            tied_players_num = 0
-        else:
-            tied_players_num = remaining_players_num
-
-        # Add one row for each bot
-        for i,b in enumerate(bot_classes):
-            results["game_num"].append(g)
-            results["turns"].append(engine.turn)
-            results["tie"].append(engine.tied)
-
-            results["bot_name"].append(b.__name__)
-
-            results["table_pos"].append(player_order.index(i))
-
-            # Bot final game rank (-1 if tie)
-            game_rank = bot_rank.index(i)
-            if game_rank < tied_players_num:
-                game_rank = -1
-            results["game_rank"].append(game_rank)
-
+if __name__ == "__main__":
 
-    df = pd.DataFrame(results)
-    return df
+    GAME_COUNT = 10000
 
+    # Games are spread over this many worker processes
+    PROCESSES = os.cpu_count()
 
-if __name__ == "__main__":
+    # Runs with the same seed (and bots) play exactly the same games
+    SEED = 0
 
-    GAME_COUNT = 10000
-    
     # The bot we are testing
     # This will be included in all games as bot_num 0
     BOT_MAIN = MainBot
@@ -140,41 +70,65 @@ if __name__ == "__main__":
         BOT_POOL.append(OpponentBot)
 
 
-    df = test_bots(GAME_COUNT, BOT_MAIN, BOT_POOL)
-    # print(df)
-    # df.to_csv(str(Path(__file__).parent) + '/results.csv')
+    # If set, instead play only until the 95% interval on the win rate of BOT_MAIN is this wide
+    # (up to GAME_COUNT games). See also sequential.compare_bots for comparing two bots.
+    TARGET_WIDTH = None
+
+    if TARGET_WIDTH is not None:
+        result = run_until_confident(
+            BOT_MAIN, BOT_POOL, target_width=TARGET_WIDTH, max_games=GAME_COUNT,
+            processes=PROCESSES, seed=SEED
+        )
+        print(f"{BOT_MAIN.__name__} win rate: {result}")
+        sys.exit()
 
-    # Dataframe with one row per game 
-    df_game = df[["game_num", "turns", "tie"]].drop_duplicates().reset_index(drop=True)
-    print(df_game)
-    
-    tie_count = df_game["tie"].sum()
-    print(f"Regular games: {GAME_COUNT - tie_count}")
+    # Result rows are streamed here in chunks, replacing the results of the last run
+    RESULTS_PATH = Path(__file__).parent / 'results'
+
+    # Set to carry on an interrupted run instead. Only a run with the same seed, bots and bot
+    # source is resumed, anything else raises a ValueError.
+    RESUME = False
+
+    results = stream_bots(
+        GAME_COUNT, BOT_MAIN, BOT_POOL, RESULTS_PATH, processes=PROCESSES, seed=SEED,
+        resume=RESUME,
+    )
+    print()
+
+    tie_count = results.tie_count
+    print(f"Regular games: {results.regular_count}")
     print(f"Ties: {tie_count}")
 
-    df_game_regular = df_game[~df_game['tie']]  # Games without ties
-    print(f"Average game length (without ties): {df_game_regular['turns'].mean():.2f} turns")
+    print(f"Average game length (without ties): {results.mean_regular_turns:.2f} turns")
 
 
     # Bot num VS game rank
     print("\nbot_num VS game_rank")
-    bot_results = pd.crosstab(df["bot_name"], df["game_rank"])
+    bot_results = results.rank_crosstab()
     print(bot_results)
-    print(bot_results / GAME_COUNT)
+    print(bot_results / results.game_count)
 
     # Bot0 table position VS game rank
     print(f"\n{BOT_MAIN.__name__} table_pos VS game_rank")
-    df_bot0 = df[df["bot_name"] == BOT_MAIN.__name__]
-    bot0_results = pd.crosstab(df_bot0["game_rank"], df_bot0["table_pos"])
+    bot0_results = results.table_pos_crosstab(BOT_MAIN.__name__)
     print(bot0_results)
 
 
     # Prints the number of times each bot won
     print("\nWinning bots cumulative")
-    df_winner = df[df["game_rank"] == 0]
-    # print(df_winner.groupby(["bot_num", "bot_name"]).())
-    print(df_winner.value_counts(["bot_name"]))
+    win_counts = results.win_counts()
+    print(win_counts)
 
     # NOTE: Only regular game win percentage
     print()
-    print(df_winner.value_counts(["bot_name"]) / (GAME_COUNT - tie_count))
+    print(win_counts / results.regular_count)
+
+
+    # Handler latency of each bot over a sample of the games, played in this process. The
+    # competition has a per move time limit, so watch the p99 and max of BOT_MAIN.
+    LATENCY_GAME_COUNT = 500
+
+    print(f"\nHandler latency over {LATENCY_GAME_COUNT} games (microseconds)")
+    latency = profile_bots(LATENCY_GAME_COUNT, BOT_MAIN, BOT_POOL, seed=SEED)
+    with pd.option_context("display.max_rows", None, "display.float_format", "{:.1f}".format):
+        print(latency_table(latency))
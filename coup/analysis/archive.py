@@ -0,0 +1,416 @@
+import json
+import numpy as np
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+
+from coup.analysis.results import ResultAggregates
+from coup.bots.enums import ActionType, RequestedMove
+from coup.common.rules import NUMBER_OF_PLAYERS
+from coup.engine.record import GameRecord, replay
+from coup.engine.state import (
+    ACTION_BITS, ACTION_MASK, PLAYER_SHIFT, SUCCESSFUL_SHIFT, TARGET_SHIFT
+)
+
+
+# One row per game
+GAME_DTYPE = np.dtype([
+    ("seed", "<u8"),
+    ("bots", "<u2", (NUMBER_OF_PLAYERS,)),          # Bot id of each seat (see bot_names)
+    ("deal", "u1", (NUMBER_OF_PLAYERS, 2)),         # Character values dealt to each seat
+    ("turns", "<u2"),                               # As Engine.turn at the end of the game
+    ("tie", "?"),
+    ("ranks", "i1", (NUMBER_OF_PLAYERS,)),          # Final rank of each seat (-1 if tied)
+    ("eliminated", "i1", (NUMBER_OF_PLAYERS - 1,)), # Seats in elimination order, -1 padded
+    ("turn_start", "<u8"),                          # Row of the first turn in the turn table
+    ("turn_count", "<u2"),
+    ("decision_start", "<u8"),                      # Offset of the first decision
+    ("decision_count", "<u2"),
+])
+
+# One row per turn, with the state at the start of the turn
+TURN_DTYPE = np.dtype([
+    ("game", "<u4"),
+    ("turn", "<u2"),
+    ("primary_player", "u1"),
+    ("balances", "<u2", (NUMBER_OF_PLAYERS,)),
+    ("cards_num", "u1", (NUMBER_OF_PLAYERS,)),
+    ("record", "<u8"),                              # The packed turn, see state.pack_turn
+])
+
+GAMES_FILE = "games.dat"
+TURNS_FILE = "turns.dat"
+# The decision bytes of every game back to back (see record.encode_answer)
+DECISIONS_FILE = "decisions.dat"
+BOTS_FILE = "bots.json"
+INDEX_DIR = "index"
+
+
+def turn_action(records:np.ndarray, action_type:ActionType) -> np.ndarray:
+    """ The action value of the given type in each packed turn (0 where there is none) """
+    return ((records >> np.uint64(ACTION_BITS * (action_type - 1))) & np.uint64(ACTION_MASK)).astype(np.uint8)
+
+
+def turn_player(records:np.ndarray, action_type:ActionType) -> np.ndarray:
+    """ The player of the action of the given type in each packed turn """
+    shift = ACTION_BITS * (action_type - 1) + PLAYER_SHIFT
+    return ((records >> np.uint64(shift)) & np.uint64(ACTION_MASK)).astype(np.uint8)
+
+
+def turn_successful(records:np.ndarray, action_type:ActionType) -> np.ndarray:
+    """ The success of the action of the given type in each packed turn (0 None, 1 False, 2 True) """
+    shift = ACTION_BITS * (action_type - 1) + SUCCESSFUL_SHIFT
+    return ((records >> np.uint64(shift)) & np.uint64(0b11)).astype(np.uint8)
+
+
+def turn_target(records:np.ndarray) -> np.ndarray:
+    """ The target of the primary action of each packed turn (-1 where there is none) """
+    return ((records >> np.uint64(TARGET_SHIFT)) & np.uint64(ACTION_MASK)).astype(np.int8) - 1
+
+
+def previous_alive_player(cards_num:np.ndarray, player_ids:np.ndarray) -> np.ndarray:
+    """
+        The previous alive player (anticlockwise) of each player, given the cards_num of each row,
+        as GameInfo.get_prev_alive_player.
+    """
+    rows = np.arange(len(player_ids))
+    previous = np.asarray(player_ids, dtype=np.int64).copy()
+    found = np.zeros(len(player_ids), dtype=bool)
+
+    for k in range(1, NUMBER_OF_PLAYERS):
+        candidate = (np.asarray(player_ids, dtype=np.int64) - k) % NUMBER_OF_PLAYERS
+        alive = ~found & (cards_num[rows, candidate] > 0)
+        previous[alive] = candidate[alive]
+        found |= alive
+
+    return previous
+
+
+def _memmap(path:Path, dtype:np.dtype) -> np.ndarray:
+    # np.memmap cannot map an empty file
+    if not path.exists() or path.stat().st_size == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+class FieldIndex:
+    """
+        The rows of a table for each value of a field, stored as an offsets array and a rows array
+        (the rows of key k are rows[offsets[k]:offsets[k+1]]), so that a lookup reads nothing but
+        the matching rows.
+    """
+
+    def __init__(self, offsets:np.ndarray, rows:np.ndarray) -> None:
+        self.offsets = offsets
+        self.rows = rows
+
+    @staticmethod
+    def build(keys:np.ndarray, key_count:int, rows:Optional[np.ndarray]=None) -> "FieldIndex":
+        """ Indexes the given keys, which are of the given rows (by default, of every row) """
+        if rows is None:
+            rows = np.arange(len(keys), dtype=np.uint64)
+
+        order = np.argsort(keys, kind="stable")
+        counts = np.bincount(keys, minlength=key_count)
+        offsets = np.zeros(key_count + 1, dtype=np.uint64)
+        np.cumsum(counts, out=offsets[1:])
+        return FieldIndex(offsets, rows[order].astype(np.uint64))
+
+    def save(self, path:Path, name:str) -> None:
+        np.save(path / f"{name}.offsets.npy", self.offsets)
+        np.save(path / f"{name}.rows.npy", self.rows)
+
+    @staticmethod
+    def load(path:Path, name:str) -> "FieldIndex":
+        return FieldIndex(
+            np.load(path / f"{name}.offsets.npy", mmap_mode="r"),
+            np.load(path / f"{name}.rows.npy", mmap_mode="r"),
+        )
+
+    def __getitem__(self, key:int) -> np.ndarray:
+        if key + 1 >= len(self.offsets):
+            return self.rows[:0]
+        return self.rows[int(self.offsets[key]):int(self.offsets[key + 1])]
+
+
+class GameArchive:
+    """
+        A directory of game records laid out as fixed width tables, which are appended to and
+        read back with NumPy memmaps, so millions of games can be queried without building a
+        Python object per game or turn:
+
+        - games.dat: a GAME_DTYPE row per game
+        - turns.dat: a TURN_DTYPE row per turn, with the balances and card numbers at its start
+        - decisions.dat: the decision bytes of each game, so any game can be replayed (see record)
+        - bots.json: the bot name of each bot id
+        - index/: FieldIndexes, rebuilt by build_indexes (closing the archive does so):
+            bot: bot id -> game rows
+            primary_action: PrimaryAction -> turn rows
+            counter_action: CounterAction -> turn rows (of turns with a counter)
+            action_type: ActionType -> rows of the turns that include it
+
+        For example, all turns where the player before the primary player could Coup:
+
+            turns = archive.turns
+            previous = previous_alive_player(turns["cards_num"], turns["primary_player"])
+            rows = np.flatnonzero(turns["balances"][np.arange(len(turns)), previous] >= 7)
+
+        Games are added as GameRecords (see coup.engine.record). Each is replayed once when it is
+        added, to find the state at the start of each turn.
+    """
+
+    def __init__(self, path:Path) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        bots_path = self.path / BOTS_FILE
+        self.bot_names: list[str] = json.loads(bots_path.read_text()) if bots_path.exists() else []
+        self._bot_ids = {name: i for i, name in enumerate(self.bot_names)}
+
+        self._truncate_partial_writes()
+
+        games = self.games
+        self.game_count = len(games)
+        if self.game_count:
+            last = games[-1]
+            self._turn_end = int(last["turn_start"]) + int(last["turn_count"])
+            self._decision_end = int(last["decision_start"]) + int(last["decision_count"])
+        else:
+            self._turn_end = 0
+            self._decision_end = 0
+
+        self._game_rows: list[tuple] = []
+        self._turn_rows: list[tuple] = []
+        self._decisions = bytearray()
+        self._indexes: dict[str, FieldIndex] = {}
+
+
+    def _truncate_partial_writes(self) -> None:
+        """ Drops anything written after the last whole game, from a run that was interrupted """
+        games_path = self.path / GAMES_FILE
+        if not games_path.exists():
+            return
+
+        size = games_path.stat().st_size
+        with open(games_path, "r+b") as f:
+            f.truncate(size - size % GAME_DTYPE.itemsize)
+
+        games = _memmap(games_path, GAME_DTYPE)
+        turn_end = decision_end = 0
+        if len(games):
+            turn_end = int(games[-1]["turn_start"]) + int(games[-1]["turn_count"])
+            decision_end = int(games[-1]["decision_start"]) + int(games[-1]["decision_count"])
+        del games
+
+        for name, end in ((TURNS_FILE, turn_end * TURN_DTYPE.itemsize), (DECISIONS_FILE, decision_end)):
+            path = self.path / name
+            if path.exists() and path.stat().st_size > end:
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+
+
+    def _bot_id(self, name:str) -> int:
+        bot_id = self._bot_ids.get(name)
+        if bot_id is None:
+            bot_id = self._bot_ids[name] = len(self.bot_names)
+            self.bot_names.append(name)
+        return bot_id
+
+    def append(self, record:GameRecord) -> None:
+        """ Adds a game, which is written by the next flush """
+        game = self.game_count + len(self._game_rows)
+        turn_start = self._turn_end + len(self._turn_rows)
+        decision_start = self._decision_end + len(self._decisions)
+
+        # The state at the start of each turn is the state at its primary action decision
+        turn = 0
+        for decision, _ in replay(record):
+            if decision.requested_move == RequestedMove.PrimaryAction:
+                game_info = decision.game_info
+                self._turn_rows.append((
+                    game,
+                    turn,
+                    decision.player_id,
+                    tuple(game_info.balances),
+                    tuple(game_info.players_cards_num),
+                    record.history[turn],
+                ))
+                turn += 1
+
+        tie = record.tied
+        turns = record.turns if tie else record.turns - 1
+
+        # Seats by final rank, as tournament.result_rows
+        remaining = [s for s in range(NUMBER_OF_PLAYERS) if s not in record.eliminated_player_ids]
+        seat_rank = (record.eliminated_player_ids + remaining)[::-1]
+        ranks = [0] * NUMBER_OF_PLAYERS
+        for rank, seat in enumerate(seat_rank):
+            ranks[seat] = -1 if tie and rank < len(remaining) else rank
+
+        eliminated = record.eliminated_player_ids + [-1] * (NUMBER_OF_PLAYERS - 1 - len(record.eliminated_player_ids))
+
+        self._game_rows.append((
+            record.seed,
+            tuple(self._bot_id(name) for name in record.bot_names),
+            tuple(record.deal),
+            turns,
+            tie,
+            tuple(ranks),
+            tuple(eliminated),
+            turn_start,
+            record.turns,
+            decision_start,
+            len(record.decisions),
+        ))
+        self._decisions += record.decisions
+
+    def extend(self, records:Iterable[GameRecord], flush_games:int=10000) -> None:
+        """ Adds many games, flushing every flush_games games """
+        for record in records:
+            self.append(record)
+            if len(self._game_rows) >= flush_games:
+                self.flush()
+        self.flush()
+
+    def flush(self) -> None:
+        """ Appends the added games to the data files """
+        if not self._game_rows:
+            return
+
+        # The games are written last, so a game is only ever read once all of its data is there
+        with open(self.path / TURNS_FILE, "ab") as f:
+            f.write(np.array(self._turn_rows, dtype=TURN_DTYPE).tobytes())
+        with open(self.path / DECISIONS_FILE, "ab") as f:
+            f.write(self._decisions)
+        (self.path / BOTS_FILE).write_text(json.dumps(self.bot_names))
+        with open(self.path / GAMES_FILE, "ab") as f:
+            f.write(np.array(self._game_rows, dtype=GAME_DTYPE).tobytes())
+
+        self.game_count += len(self._game_rows)
+        self._turn_end += len(self._turn_rows)
+        self._decision_end += len(self._decisions)
+        self._game_rows = []
+        self._turn_rows = []
+        self._decisions = bytearray()
+
+    def build_indexes(self) -> None:
+        """ Rebuilds the field indexes over everything written """
+        self.flush()
+
+        index_path = self.path / INDEX_DIR
+        index_path.mkdir(exist_ok=True)
+
+        games = self.games
+        turns = self.turns
+        records = turns["record"]
+
+        # Every seat of every game, so a bot is listed once per seat it played
+        FieldIndex.build(
+            games["bots"].ravel().astype(np.int64),
+            len(self.bot_names),
+            np.repeat(np.arange(len(games), dtype=np.uint64), NUMBER_OF_PLAYERS),
+        ).save(index_path, "bot")
+
+        FieldIndex.build(
+            turn_action(records, ActionType.PrimaryAction).astype(np.int64), 8
+        ).save(index_path, "primary_action")
+
+        counter = turn_action(records, ActionType.CounterAction).astype(np.int64)
+        has_counter = np.flatnonzero(counter).astype(np.uint64)
+        FieldIndex.build(counter[has_counter], 8, has_counter).save(index_path, "counter_action")
+
+        # A turn is listed once for each ActionType it includes
+        present = np.stack([turn_action(records, action_type) != 0 for action_type in ActionType], axis=1)
+        turn_rows, type_index = np.nonzero(present)
+        action_types = np.array([int(action_type) for action_type in ActionType])[type_index]
+        FieldIndex.build(action_types, len(ActionType) + 1, turn_rows.astype(np.uint64)).save(index_path, "action_type")
+
+        self._indexes = {}
+
+    def index(self, name:str) -> FieldIndex:
+        """ A field index by name (see the class docstring), as of the last build_indexes """
+        if name not in self._indexes:
+            self._indexes[name] = FieldIndex.load(self.path / INDEX_DIR, name)
+        return self._indexes[name]
+
+    def games_with_bot(self, bot_name:str) -> np.ndarray:
+        """ The game rows a bot played in """
+        bot_id = self._bot_ids.get(bot_name)
+        if bot_id is None:
+            return np.zeros(0, dtype=np.uint64)
+        return np.unique(self.index("bot")[bot_id])
+
+
+    @property
+    def games(self) -> np.ndarray:
+        return _memmap(self.path / GAMES_FILE, GAME_DTYPE)
+
+    @property
+    def turns(self) -> np.ndarray:
+        return _memmap(self.path / TURNS_FILE, TURN_DTYPE)
+
+    @property
+    def decisions(self) -> np.ndarray:
+        return _memmap(self.path / DECISIONS_FILE, np.dtype("u1"))
+
+    def record(self, game:int) -> GameRecord:
+        """ The GameRecord of a game, for example to replay it """
+        row = self.games[game]
+        turn_start = int(row["turn_start"])
+        decision_start = int(row["decision_start"])
+
+        history = array("Q", self.turns["record"][turn_start:turn_start + int(row["turn_count"])].tolist())
+        return GameRecord(
+            seed=int(row["seed"]),
+            bot_names=[self.bot_names[i] for i in row["bots"]],
+            deal=[(int(a), int(b)) for a, b in row["deal"]],
+            history=history,
+            eliminated_player_ids=[int(s) for s in row["eliminated"] if s >= 0],
+            decisions=self.decisions[decision_start:decision_start + int(row["decision_count"])].tobytes(),
+        )
+
+
+    def aggregates(self, games:Optional[np.ndarray]=None) -> ResultAggregates:
+        """
+            The ResultAggregates of the archived games (or the given game rows), so the crosstabs of
+            ResultAggregates come straight from the games table.
+        """
+        table = self.games if games is None else self.games[games]
+        aggregates = ResultAggregates()
+
+        tie = table["tie"]
+        aggregates.game_count = len(table)
+        aggregates.tie_count = int(tie.sum())
+        aggregates.regular_turns = int(table["turns"][~tie].sum(dtype=np.int64))
+
+        # Count (bot id, rank, seat) triples in one pass
+        seats = np.broadcast_to(np.arange(NUMBER_OF_PLAYERS), table["bots"].shape)
+        keys = (
+            table["bots"].astype(np.int64) * (NUMBER_OF_PLAYERS + 1)
+            + (table["ranks"].astype(np.int64) + 1)
+        ) * NUMBER_OF_PLAYERS + seats
+        values, counts = np.unique(keys.ravel(), return_counts=True)
+
+        rank_counts = Counter()
+        table_pos_counts = Counter()
+        for value, count in zip(values.tolist(), counts.tolist()):
+            bot_rank, table_pos = divmod(value, NUMBER_OF_PLAYERS)
+            bot_id, rank = divmod(bot_rank, NUMBER_OF_PLAYERS + 1)
+            bot_name = self.bot_names[bot_id]
+            rank_counts[(bot_name, rank - 1)] += count
+            table_pos_counts[(bot_name, rank - 1, table_pos)] += count
+
+        aggregates.rank_counts = rank_counts
+        aggregates.table_pos_counts = table_pos_counts
+        return aggregates
+
+    def close(self) -> None:
+        self.flush()
+        self.build_indexes()
+
+    def __enter__(self) -> "GameArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from coup.analysis.tournament import setup_game
+from coup.bots.bots.base_bot import BaseBot
+from coup.engine.latency import HANDLER_NAMES, LatencyStats
+
+
+def profile_bots(
+    game_count:int,
+    bot_main:BaseBot,
+    bot_pool:list[BaseBot],
+    seed:int=0,
+) -> LatencyStats:
+    """
+        Plays the same games as iter_games (in this process, so the timings are not disturbed by
+        other workers) and returns the latency of every handler of every bot.
+    """
+    latency = LatencyStats()
+    for g in range(game_count):
+        engine, _, _ = setup_game(g, bot_main, bot_pool, seed, latency=latency)
+        engine.run_game()
+    return latency
+
+
+def latency_table(latency:LatencyStats) -> pd.DataFrame:
+    """ One row per bot and handler with its call count and mean, p50, p99 and max in microseconds """
+    rows = []
+    for (bot_name, handler_name), handler in latency.handlers.items():
+        if handler.calls == 0:
+            continue
+        rows.append({
+            "bot_name": bot_name,
+            "handler": handler_name.removesuffix("_handler"),
+            "calls": handler.calls,
+            "mean_us": handler.mean_ns / 1000,
+            "p50_us": handler.percentile(0.5) / 1000,
+            "p99_us": handler.percentile(0.99) / 1000,
+            "max_us": handler.max_ns / 1000,
+        })
+
+    df = pd.DataFrame(rows, columns=["bot_name", "handler", "calls", "mean_us", "p50_us", "p99_us", "max_us"])
+
+    # Handlers in the order of a turn rather than alphabetically
+    handler_order = {name.removesuffix("_handler"): i for i, name in enumerate(HANDLER_NAMES)}
+    df["handler_order"] = df["handler"].map(handler_order)
+    df = df.sort_values(["bot_name", "handler_order"]).drop(columns="handler_order")
+    return df.set_index(["bot_name", "handler"])
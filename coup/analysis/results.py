@@ -0,0 +1,252 @@
+import json
+import os
+import pandas as pd
+from collections import Counter
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+# The columns of the per-bot result rows produced by play_game
+RESULT_COLUMNS = [
+    "game_num",     # Game number (index from 0)
+    "turns",        # Number of turns in game
+    "tie",          # Whether or not game was a tie
+    "bot_name",     # Name of bot class (cls.__name__)
+    "table_pos",    # Table position of bot in game
+    "game_rank",    # Final rank of bot in game (-1 if tie)
+]
+
+# Parquet and Arrow IPC need pyarrow, which is optional. Without it results are written as CSV.
+HAS_PYARROW = find_spec("pyarrow") is not None
+
+FORMAT_SUFFIXES = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "csv": ".csv",
+}
+
+METADATA_FILE = "run.json"
+
+# The games in each part file by default. An interrupted run loses at most this many games, and
+# at a row per bot per game each part is only a few hundred KB.
+DEFAULT_CHUNK_GAMES = 1000
+
+
+class ResultAggregates:
+    """
+        Online aggregates of game result rows (see RESULT_COLUMNS), so summaries of a run can be
+        printed without keeping every row in memory.
+    """
+
+    def __init__(self) -> None:
+        self.game_count = 0
+        self.tie_count = 0
+
+        # Total turns over games without ties
+        self.regular_turns = 0
+
+        # Number of rows for each (bot_name, game_rank)
+        self.rank_counts: Counter[tuple[str, int]] = Counter()
+
+        # Number of rows for each (bot_name, game_rank, table_pos)
+        self.table_pos_counts: Counter[tuple[str, int, int]] = Counter()
+
+
+    def add_game(self, rows:list[tuple]) -> None:
+        """ Adds the result rows of a single game """
+        _, turns, tie, *_ = rows[0]
+
+        self.game_count += 1
+        if tie:
+            self.tie_count += 1
+        else:
+            self.regular_turns += turns
+
+        for _, _, _, bot_name, table_pos, game_rank in rows:
+            self.rank_counts[(bot_name, game_rank)] += 1
+            self.table_pos_counts[(bot_name, game_rank, table_pos)] += 1
+
+
+    def add_frame(self, df:pd.DataFrame) -> None:
+        """ Adds a DataFrame of result rows, which must hold whole games """
+        df_game = df[["game_num", "turns", "tie"]].drop_duplicates()
+        self.game_count += len(df_game)
+        self.tie_count += int(df_game["tie"].sum())
+        self.regular_turns += int(df_game.loc[~df_game["tie"], "turns"].sum())
+
+        for (bot_name, game_rank), count in df.value_counts(["bot_name", "game_rank"]).items():
+            self.rank_counts[(bot_name, int(game_rank))] += int(count)
+
+        table_pos_counts = df.value_counts(["bot_name", "game_rank", "table_pos"])
+        for (bot_name, game_rank, table_pos), count in table_pos_counts.items():
+            self.table_pos_counts[(bot_name, int(game_rank), int(table_pos))] += int(count)
+
+
+    @property
+    def regular_count(self) -> int:
+        return self.game_count - self.tie_count
+
+    @property
+    def mean_regular_turns(self) -> float:
+        """ Average game length (without ties) """
+        if self.regular_count == 0:
+            return float("nan")
+        return self.regular_turns / self.regular_count
+
+    def rank_crosstab(self) -> pd.DataFrame:
+        """ As pd.crosstab(df["bot_name"], df["game_rank"]) """
+        counts = pd.Series(self.rank_counts, dtype=int)
+        counts.index.names = ["bot_name", "game_rank"]
+        return counts.unstack(fill_value=0).sort_index().sort_index(axis=1)
+
+    def table_pos_crosstab(self, bot_name:str) -> pd.DataFrame:
+        """ As pd.crosstab(df_bot["game_rank"], df_bot["table_pos"]) for the rows of one bot """
+        counts = pd.Series({
+            (game_rank, table_pos): count
+            for (name, game_rank, table_pos), count in self.table_pos_counts.items()
+            if name == bot_name
+        }, dtype=int)
+        counts.index.names = ["game_rank", "table_pos"]
+        return counts.unstack(fill_value=0).sort_index().sort_index(axis=1)
+
+    def win_counts(self) -> pd.Series:
+        """ The number of games won by each bot, most wins first """
+        return pd.Series({
+            bot_name: count
+            for (bot_name, game_rank), count in self.rank_counts.items()
+            if game_rank == 0
+        }, dtype=int, name="count").rename_axis("bot_name").sort_values(ascending=False)
+
+
+class ResultsSink:
+    """
+        Writes result rows to a directory of part files, one per chunk of games, while keeping
+        ResultAggregates of everything written.
+
+        Each part is written to a temporary file and renamed into place, so a run that is
+        interrupted loses at most the chunk in progress. Since every game is seeded from its game
+        number, a run can be resumed by opening the same directory with resume and playing on
+        from game_count, giving exactly the results of an uninterrupted run.
+    """
+
+    def __init__(
+        self,
+        path:Path,
+        metadata:dict,
+        chunk_games:int=DEFAULT_CHUNK_GAMES,
+        format:Optional[str]=None,
+        resume:bool=False,
+    ) -> None:
+        """
+            The metadata (seed, bots, ...) identifies the run. Without resume, the results of any
+            previous run in the directory are removed first. Resuming a directory written with
+            different metadata raises a ValueError rather than mixing the results of two runs.
+        """
+        self.path = Path(path)
+        self.metadata = metadata
+        self.chunk_games = chunk_games
+
+        if format is None:
+            format = "parquet" if HAS_PYARROW else "csv"
+        if format not in FORMAT_SUFFIXES:
+            raise ValueError(f"Unknown results format {format}")
+        if format != "csv" and not HAS_PYARROW:
+            raise ValueError(f"The {format} results format requires pyarrow")
+        self.format = format
+
+        self.aggregates = ResultAggregates()
+        self._chunk: list[tuple] = []
+        self._chunk_game_count = 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not resume:
+            self._clear()
+        self._check_metadata()
+
+        # Rebuild the aggregates of a previous run one part at a time
+        self._part_count = 0
+        for part_path in self.part_paths():
+            self.aggregates.add_frame(self._read_part(part_path))
+            self._part_count += 1
+
+
+    def _clear(self) -> None:
+        """ Removes the metadata and part files of a previous run, in any format """
+        for path in self.path.glob("part-*"):
+            path.unlink()
+        (self.path / METADATA_FILE).unlink(missing_ok=True)
+
+
+    def _check_metadata(self) -> None:
+        metadata_path = self.path / METADATA_FILE
+        metadata = {**self.metadata, "format": self.format}
+
+        if metadata_path.exists():
+            with open(metadata_path) as f:
+                existing = json.load(f)
+            if existing != metadata:
+                raise ValueError(
+                    f"{self.path} holds results of a different run: {existing}"
+                )
+        else:
+            with open(metadata_path, "w") as f:
+                json.dump(metadata, f, indent=4)
+
+
+    def part_paths(self) -> list[Path]:
+        return sorted(self.path.glob(f"part-*{FORMAT_SUFFIXES[self.format]}"))
+
+    @property
+    def game_count(self) -> int:
+        """ The number of games written so far (including a partial chunk) """
+        return self.aggregates.game_count
+
+    def add_game(self, rows:list[tuple]) -> None:
+        self.aggregates.add_game(rows)
+
+        self._chunk.extend(rows)
+        self._chunk_game_count += 1
+        if self._chunk_game_count >= self.chunk_games:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Writes the current chunk as a new part """
+        if self._chunk_game_count == 0:
+            return
+
+        df = pd.DataFrame(self._chunk, columns=RESULT_COLUMNS)
+
+        suffix = FORMAT_SUFFIXES[self.format]
+        part_path = self.path / f"part-{self._part_count:05d}{suffix}"
+        tmp_path = self.path / f"part-{self._part_count:05d}{suffix}.tmp"
+
+        if self.format == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        elif self.format == "arrow":
+            df.to_feather(tmp_path)
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+
+        self._part_count += 1
+        self._chunk = []
+        self._chunk_game_count = 0
+
+    def _read_part(self, part_path:Path) -> pd.DataFrame:
+        if self.format == "parquet":
+            return pd.read_parquet(part_path)
+        elif self.format == "arrow":
+            return pd.read_feather(part_path)
+        return pd.read_csv(part_path)
+
+    def iter_frames(self) -> Iterable[pd.DataFrame]:
+        """ Yields the rows of each written part as a DataFrame """
+        for part_path in self.part_paths():
+            yield self._read_part(part_path)
+
+    def __enter__(self) -> "ResultsSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
@@ -0,0 +1,185 @@
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+from coup.analysis.tournament import iter_games
+from coup.bots.bots.base_bot import BaseBot
+
+
+# z for a two sided 95% interval
+Z_95 = 1.959963984540054
+
+
+@dataclass
+class SequentialResult:
+    """ The outcome of a sequential run """
+
+    games: int                          # Number of games (or game pairs) played
+    estimate: float                     # Win rate, or win rate difference when comparing
+    interval: tuple[float, float]       # Confidence interval on the estimate
+    decision: str                       # Why the run stopped, see the STOP_ constants
+
+    def __str__(self) -> str:
+        low, high = self.interval
+        return (
+            f"{self.estimate:.4f} [{low:.4f}, {high:.4f}] after {self.games} games "
+            f"({self.decision})"
+        )
+
+
+STOP_WIDTH = "interval width reached"
+STOP_MAX_GAMES = "max games reached"
+STOP_BETTER = "sequential test: first bot is better"
+STOP_NOT_BETTER = "sequential test: first bot is not better"
+
+
+def wilson_interval(successes:int, n:int, z:float=Z_95) -> tuple[float, float]:
+    """ The Wilson score interval of a binomial proportion """
+    if n == 0:
+        return (0.0, 1.0)
+
+    p = successes / n
+    denominator = 1 + z**2 / n
+    centre = (p + z**2 / (2*n)) / denominator
+    half_width = z * math.sqrt(p * (1-p) / n + z**2 / (4 * n**2)) / denominator
+    return (max(0.0, centre - half_width), min(1.0, centre + half_width))
+
+
+def paired_difference_interval(a_only:int, b_only:int, n:int, z:float=Z_95) -> tuple[float, float]:
+    """
+        The Wald interval of the difference in win rate between two bots over n paired games,
+        where a_only and b_only are the pairs won by only one of the bots.
+    """
+    if n == 0:
+        return (-1.0, 1.0)
+
+    difference = (a_only - b_only) / n
+    variance = (a_only + b_only - (a_only - b_only)**2 / n) / n**2
+    half_width = z * math.sqrt(max(variance, 0.0))
+    return (max(-1.0, difference - half_width), min(1.0, difference + half_width))
+
+
+class DiscordantSPRT:
+    """
+        Wald's sequential probability ratio test on the discordant pairs of a paired comparison
+        (pairs of games where exactly one of the two bots won).
+
+        If both bots are equally good each discordant pair is a coin flip, so the test is of
+        H0: P(first bot won the pair) = 0.5 against H1: P = 0.5 + delta.
+    """
+
+    def __init__(self, delta:float=0.1, alpha:float=0.05, beta:float=0.05) -> None:
+        self.p1 = 0.5 + delta
+
+        # Log likelihood ratio increments for a pair won by each bot
+        self.a_step = math.log(self.p1 / 0.5)
+        self.b_step = math.log((1 - self.p1) / 0.5)
+
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+
+        self.llr = 0.0
+
+    def update(self, a_won:bool) -> None:
+        self.llr += self.a_step if a_won else self.b_step
+
+    @property
+    def decision(self) -> Optional[str]:
+        """ STOP_BETTER or STOP_NOT_BETTER once the test has decided, otherwise None """
+        if self.llr >= self.upper:
+            return STOP_BETTER
+        if self.llr <= self.lower:
+            return STOP_NOT_BETTER
+        return None
+
+
+def run_until_confident(
+    bot_main:BaseBot,
+    bot_pool:list[BaseBot],
+    target_width:float=0.02,
+    max_games:int=100000,
+    min_games:int=100,
+    processes:int=1,
+    seed:int=0,
+    z:float=Z_95,
+) -> SequentialResult:
+    """
+        Plays games until the Wilson interval on the win rate of bot_main (ties count as losses)
+        is at most target_width wide, or max_games have been played.
+    """
+    wins = 0
+    games = 0
+
+    for rows in iter_games(max_games, bot_main, bot_pool, processes, seed):
+        # The rows are in bot order, so bot_main is always first
+        wins += rows[0][5] == 0
+        games += 1
+
+        if games >= min_games:
+            low, high = wilson_interval(wins, games, z)
+            if high - low <= target_width:
+                return SequentialResult(games, wins / games, (low, high), STOP_WIDTH)
+
+    return SequentialResult(games, wins / games, wilson_interval(wins, games, z), STOP_MAX_GAMES)
+
+
+def compare_bots(
+    bot_a:BaseBot,
+    bot_b:BaseBot,
+    bot_pool:list[BaseBot],
+    delta:float=0.1,
+    alpha:float=0.05,
+    beta:float=0.05,
+    target_width:Optional[float]=None,
+    max_games:int=100000,
+    min_games:int=100,
+    processes:int=1,
+    seed:int=0,
+    z:float=Z_95,
+) -> SequentialResult:
+    """
+        Plays paired games, each game once with bot_a and once with bot_b as the main bot against
+        the same opponents, seats and deals, until a DiscordantSPRT decides whether bot_a is
+        better, the interval on the win rate difference (bot_a - bot_b) is at most target_width
+        wide, or max_games pairs have been played.
+
+        Pairing cancels most of the luck of the deal, so this needs far fewer games than
+        comparing two independent runs.
+    """
+    sprt = DiscordantSPRT(delta, alpha, beta)
+
+    # Pairs won by only bot_a or only bot_b
+    a_only = 0
+    b_only = 0
+    games = 0
+
+    # Each side of the pair gets half the processes
+    side_processes = max(1, processes // 2)
+    games_a = iter_games(max_games, bot_a, bot_pool, side_processes, seed)
+    games_b = iter_games(max_games, bot_b, bot_pool, side_processes, seed)
+
+    for rows_a, rows_b in zip(games_a, games_b):
+        a_won = rows_a[0][5] == 0
+        b_won = rows_b[0][5] == 0
+        games += 1
+
+        if a_won != b_won:
+            a_only += a_won
+            b_only += b_won
+            sprt.update(a_won)
+
+        if games < min_games:
+            continue
+
+        decision = sprt.decision
+        interval = paired_difference_interval(a_only, b_only, games, z)
+        if decision is None and target_width is not None and interval[1] - interval[0] <= target_width:
+            decision = STOP_WIDTH
+
+        if decision is not None:
+            games_a.close()
+            games_b.close()
+            return SequentialResult(games, (a_only - b_only) / games, interval, decision)
+
+    interval = paired_difference_interval(a_only, b_only, games, z)
+    return SequentialResult(games, (a_only - b_only) / games, interval, STOP_MAX_GAMES)
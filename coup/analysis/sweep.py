@@ -0,0 +1,133 @@
+import itertools
+import pandas as pd
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from coup.analysis.sequential import Z_95, wilson_interval
+from coup.analysis.tournament import iter_games
+from coup.bots.bots.base_bot import BaseBot
+from coup.bots.bots.main_bot import MainBot
+
+
+def grid(**values:list) -> list[dict]:
+    """
+        Every combination of the given MainBotParams values, e.g.
+        grid(steal_balance=[3, 4, 5], late_tax_turn=[12, 16]) gives 6 configurations.
+    """
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+
+class ConfigResult:
+    """ The games played so far by one configuration of MainBot """
+
+    def __init__(self, config:dict) -> None:
+        self.config = config
+        self.bot = MainBot.with_params(**config)
+        self.games = 0
+        self.wins = 0
+
+    def play(self, game_count:int, bot_pool:list[BaseBot], processes:int, seed:int) -> None:
+        """ Plays on until game_count games have been played """
+        for rows in iter_games(game_count, self.bot, bot_pool, processes, seed, start=self.games):
+            # The rows are in bot order, so the main bot is always first
+            self.wins += rows[0][5] == 0
+            self.games += 1
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+
+def _format_param(value):
+    """ Tuples of enums (priority orders) are written as their names, e.g. Tax/Steal """
+    if isinstance(value, tuple):
+        return "/".join(v.name for v in value)
+    return value
+
+
+def leaderboard(results:list[ConfigResult], z:float=Z_95) -> pd.DataFrame:
+    """ One row per configuration (best first) with its win rate and interval """
+    rows = []
+    for result in results:
+        low, high = wilson_interval(result.wins, result.games, z)
+        rows.append({
+            **{k: _format_param(v) for k, v in asdict(result.bot.params).items()},
+            "bot_name": result.bot.__name__,
+            "games": result.games,
+            "wins": result.wins,
+            "win_rate": result.win_rate,
+            "ci_low": low,
+            "ci_high": high,
+        })
+
+    df = pd.DataFrame(rows)
+    return df.sort_values(["win_rate", "games"], ascending=False).reset_index(drop=True)
+
+
+def sweep(
+    configs:list[dict],
+    bot_pool:list[BaseBot],
+    game_count:int=1000,
+    processes:int=1,
+    seed:int=0,
+    output_path:Optional[Path]=None,
+) -> pd.DataFrame:
+    """
+        Plays game_count games with every configuration and returns the leaderboard, also
+        writing it as a CSV to output_path if given.
+
+        Every configuration plays the same seeded games, so the comparison between any two of
+        them is paired (see sequential.compare_bots).
+    """
+    results = [ConfigResult(config) for config in configs]
+    for i, result in enumerate(results):
+        print(f"Config {i+1}/{len(results)}: {result.bot.__name__}")
+        result.play(game_count, bot_pool, processes, seed)
+
+    df = leaderboard(results)
+    if output_path is not None:
+        df.to_csv(output_path, index=False)
+    return df
+
+
+def successive_halving(
+    configs:list[dict],
+    bot_pool:list[BaseBot],
+    min_games:int=250,
+    max_games:int=16000,
+    eta:int=2,
+    processes:int=1,
+    seed:int=0,
+    output_path:Optional[Path]=None,
+) -> pd.DataFrame:
+    """
+        Plays min_games with every configuration, keeps the best 1/eta of them, multiplies the
+        games by eta and repeats until one configuration is left or max_games is reached.
+
+        Most of the games go to the configurations that look best, so far larger grids can be
+        searched than with sweep. Games are never replayed: a configuration that survives a round
+        just plays on from where it stopped. The leaderboard includes the eliminated
+        configurations, with the games they played.
+    """
+    results = [ConfigResult(config) for config in configs]
+    remaining = results
+    game_count = min_games
+
+    while True:
+        print(f"Playing {len(remaining)} config(s) to {game_count} games")
+        for result in remaining:
+            result.play(game_count, bot_pool, processes, seed)
+
+        if len(remaining) == 1 or game_count >= max_games:
+            break
+
+        remaining = sorted(remaining, key=lambda r: r.win_rate, reverse=True)
+        remaining = remaining[:max(1, len(remaining) // eta)]
+        game_count = min(game_count * eta, max_games)
+
+    df = leaderboard(results)
+    if output_path is not None:
+        df.to_csv(output_path, index=False)
+    return df
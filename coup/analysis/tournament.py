@@ -0,0 +1,260 @@
+import hashlib
+import inspect
+import pandas as pd
+import random
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from coup.analysis.results import DEFAULT_CHUNK_GAMES, RESULT_COLUMNS, ResultAggregates, ResultsSink
+from coup.engine.engine import Engine
+from coup.engine.latency import LatencyStats
+from coup.engine.record import GameRecordWriter, record_game
+from coup.bots.bots.base_bot import BaseBot
+
+
+def select_bots(bot_main:BaseBot, bot_pool:list[BaseBot], rng:random.Random=random) -> List[BaseBot]:
+    """ Selects main bot and 4 random choice bots from a pool """
+    bot_classes = [bot_main]
+    bot_classes += rng.sample(bot_pool, 4)
+    return bot_classes
+
+
+def game_seed(seed:int, game_num:int) -> int:
+    """
+        The seed used for a single game of a run.
+
+        Every game gets its own seed so that the outcome of game g does not depend on which
+        process played it, or on how many games were played before it. It also means two runs
+        with the same seed but a different bot_main play paired games: the same opponents, seats
+        and deals, which separates the two bots in far fewer games than independent runs.
+    """
+    return (seed << 32) + game_num
+
+
+def setup_game(
+    game_num:int,
+    bot_main:BaseBot,
+    bot_pool:list[BaseBot],
+    seed:int=0,
+    latency:Optional[LatencyStats]=None,
+) -> tuple[Engine, list[BaseBot], list[int]]:
+    """
+        Sets up a single seeded game, returning its engine, the bots of the game (bot_main
+        first) and the bot number in each table position. If latency is given the engine times
+        the bots' handlers into it.
+    """
+    rng = random.Random(game_seed(seed, game_num))
+
+    bot_classes = select_bots(bot_main, bot_pool, rng)
+    player_order = list(range(5))
+    rng.shuffle(player_order)
+
+    bot_classes_ordered = [bot_classes[k] for k in player_order]
+    engine = Engine(
+        bot_classes_ordered, debug=False, seed=rng.getrandbits(64), latency=latency
+    )
+    return engine, bot_classes, player_order
+
+
+def result_rows(game_num:int, engine:Engine, bot_classes:list[BaseBot], player_order:list[int]) -> list[tuple]:
+    """
+        One result row per bot (see RESULT_COLUMNS) of a game set up by setup_game and played.
+    """
+    # Table positions ordered by final rank
+    player_rank = [p.player_id for p in engine.eliminated_players]
+    player_rank += [p.player_id for p in engine.remaining_players]
+    player_rank.reverse()
+
+    # Bot numbers ordered by final rank
+    bot_rank = [player_order[i] for i in player_rank]
+
+    # If more than one player remains then they each tie
+    remaining_players_num = len(engine.remaining_players)
+    if remaining_players_num == 1:
+        tied_players_num = 0
+    else:
+        tied_players_num = remaining_players_num
+
+    # Add one row for each bot
+    rows = []
+    for i,b in enumerate(bot_classes):
+        # Bot final game rank (-1 if tie)
+        game_rank = bot_rank.index(i)
+        if game_rank < tied_players_num:
+            game_rank = -1
+
+        rows.append((
+            game_num,
+            engine.turn,
+            engine.tied,
+            b.__name__,
+            player_order.index(i),
+            game_rank,
+        ))
+
+    return rows
+
+
+def play_game(game_num:int, bot_main:BaseBot, bot_pool:list[BaseBot], seed:int=0) -> list[tuple]:
+    """
+        Plays a single seeded game and returns one result row per bot (see RESULT_COLUMNS).
+    """
+    engine, bot_classes, player_order = setup_game(game_num, bot_main, bot_pool, seed)
+    engine.run_game()
+    return result_rows(game_num, engine, bot_classes, player_order)
+
+
+def record_games(
+    game_count:int,
+    bot_main:BaseBot,
+    bot_pool:list[BaseBot],
+    records_path:Path,
+    seed:int=0,
+) -> ResultAggregates:
+    """
+        Plays the same games as iter_games, writing a GameRecord of each to records_path (see
+        coup.engine.record), and returns the aggregates of their results.
+    """
+    aggregates = ResultAggregates()
+
+    with GameRecordWriter(records_path) as writer:
+        for g in range(game_count):
+            engine, bot_classes, player_order = setup_game(g, bot_main, bot_pool, seed)
+            writer.write(record_game(engine))
+            aggregates.add_game(result_rows(g, engine, bot_classes, player_order))
+
+    return aggregates
+
+
+# The bots and seed of the current worker process, set once by _init_worker so that only game
+# numbers need to be sent to the workers.
+_worker_args: Optional[tuple[BaseBot, list[BaseBot], int]] = None
+
+
+def _init_worker(bot_main:BaseBot, bot_pool:list[BaseBot], seed:int) -> None:
+    global _worker_args
+    _worker_args = (bot_main, bot_pool, seed)
+
+
+def _play_worker_game(game_num:int) -> list[tuple]:
+    bot_main, bot_pool, seed = _worker_args
+    return play_game(game_num, bot_main, bot_pool, seed)
+
+
+def iter_games(
+    game_count:int,
+    bot_main:BaseBot,
+    bot_pool:list[BaseBot],
+    processes:int=1,
+    seed:int=0,
+    start:int=0,
+) -> Iterator[list[tuple]]:
+    """
+        Yields the result rows of games start to game_count - 1 in game number order as they
+        complete.
+
+        With processes > 1 the games are spread over a process pool. Since each game is seeded
+        from its game number, the rows are identical to those of a serial run with the same seed.
+    """
+    if processes <= 1:
+        for g in range(start, game_count):
+            yield play_game(g, bot_main, bot_pool, seed)
+        return
+
+    # Large enough chunks to amortise the IPC, small enough to keep every worker busy at the end
+    chunksize = max(1, (game_count - start) // (processes * 16))
+
+    with Pool(processes, initializer=_init_worker, initargs=(bot_main, bot_pool, seed)) as pool:
+        yield from pool.imap(_play_worker_game, range(start, game_count), chunksize=chunksize)
+
+
+def test_bots(
+    game_count:int,
+    bot_main:BaseBot,
+    bot_pool:list[BaseBot],
+    processes:int=1,
+    seed:int=0,
+) -> pd.DataFrame:
+    """
+        Plays games on bots and returns a DataFrame of game results for analysis.
+    """
+
+    print(f"Playing {game_count} games on {processes} process(es)...")
+    print()
+
+    results = {column: [] for column in RESULT_COLUMNS}
+
+    for g, rows in enumerate(iter_games(game_count, bot_main, bot_pool, processes, seed)):
+        print(f"Game {g}/{game_count}", end="\r")
+
+        for row in rows:
+            for column, value in zip(RESULT_COLUMNS, row):
+                results[column].append(value)
+
+    df = pd.DataFrame(results)
+    return df
+
+
+def bot_fingerprint(bot_classes:list[BaseBot]) -> str:
+    """
+        A hash of the source of the modules the bots (and the classes they derive from) are
+        defined in, and of their class attributes such as MainBot's params. Editing a bot or
+        sweeping its params gives a new fingerprint, so results of the old bot are not resumed.
+    """
+    h = hashlib.sha256()
+    for bot_class in sorted(set(bot_classes), key=lambda b: b.__name__):
+        h.update(bot_class.__name__.encode())
+        for klass in bot_class.__mro__[:-1]:
+            h.update(inspect.getsource(inspect.getmodule(klass)).encode())
+            attributes = sorted(
+                (name, repr(value)) for name, value in vars(klass).items()
+                if not name.startswith("__") and not callable(value)
+                and not isinstance(value, (classmethod, staticmethod, property))
+            )
+            h.update(repr(attributes).encode())
+    return h.hexdigest()
+
+
+def stream_bots(
+    game_count:int,
+    bot_main:BaseBot,
+    bot_pool:list[BaseBot],
+    results_path:Path,
+    processes:int=1,
+    seed:int=0,
+    chunk_games:int=DEFAULT_CHUNK_GAMES,
+    format:Optional[str]=None,
+    resume:bool=False,
+) -> ResultAggregates:
+    """
+        Plays games on bots, streaming the result rows to a ResultsSink at results_path, and
+        returns the aggregates of the run. Memory use does not grow with game_count.
+
+        With resume, if results_path already holds some games of the same run (the same seed and
+        bots, with the same source, see bot_fingerprint), play resumes after them. Otherwise any
+        results already there are replaced.
+    """
+    metadata = {
+        "seed": seed,
+        "bot_main": bot_main.__name__,
+        "bot_pool": [b.__name__ for b in bot_pool],
+        "bot_fingerprint": bot_fingerprint([bot_main, *bot_pool]),
+    }
+
+    with ResultsSink(
+        results_path, metadata, chunk_games=chunk_games, format=format, resume=resume
+    ) as sink:
+        start = sink.game_count
+        if start > 0:
+            print(f"Resuming from game {start}")
+
+        print(f"Playing {max(0, game_count - start)} games on {processes} process(es)...")
+        print()
+
+        games = iter_games(game_count, bot_main, bot_pool, processes, seed, start)
+        for g, rows in enumerate(games, start):
+            print(f"Game {g}/{game_count}", end="\r")
+            sink.add_game(rows)
+
+    return sink.aggregates
@@ -0,0 +1,54 @@
+import json
+import sys
+from pathlib import Path
+
+from coup.benchmark.suite import compare, format_comparisons, load_results, run_suite
+
+
+if __name__ == "__main__":
+
+    # Multiplies the number of games of every benchmark, lower for a quick check
+    SCALE = 1.0
+
+    # Each timing is the best of this many runs
+    REPEAT = 3
+
+    # Metrics more than this much (relatively) worse than the baseline count as regressions
+    TOLERANCE = 0.1
+
+    # Results are always written to RESULTS_PATH. Set SAVE_BASELINE to also make them the
+    # baseline that later runs are compared against.
+    RESULTS_PATH = Path(__file__).parent / "results.json"
+    BASELINE_PATH = Path(__file__).parent / "baseline.json"
+    SAVE_BASELINE = False
+
+    results = run_suite(scale=SCALE, repeat=REPEAT)
+
+    with open(RESULTS_PATH, "w") as f:
+        json.dump(results, f, indent=4)
+
+    for metric in results["metrics"].values():
+        print(f"{metric['name']}: {metric['value']:.2f} {metric['unit']}")
+
+    if SAVE_BASELINE:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"\nSaved as the baseline ({BASELINE_PATH})")
+        sys.exit()
+
+    baseline = load_results(BASELINE_PATH)
+    if baseline is None:
+        print(f"\nNo baseline at {BASELINE_PATH}, set SAVE_BASELINE to make one")
+        sys.exit()
+
+    if baseline["meta"]["scale"] != SCALE:
+        print(f"\nWarning: the baseline was run with scale {baseline['meta']['scale']}")
+
+    comparisons = compare(results, baseline, TOLERANCE)
+    print("\nCompared with the baseline (positive is better)")
+    print(format_comparisons(comparisons))
+
+    regressions = [c for c in comparisons if c.regressed]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {TOLERANCE:.0%}")
+        sys.exit(1)
@@ -0,0 +1,265 @@
+import json
+import platform
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+from coup.analysis.results import ResultAggregates
+from coup.analysis.tournament import iter_games
+from coup.bots.bots.base_bot import BaseBot
+from coup.bots.bots.main_bot import MainBot
+from coup.bots.game_info import GameInfo
+from coup.bots.history_decoder import HistoryDecoder
+
+from coup.bots.bots.examples.ambassador import ExampleAmbassador
+from coup.bots.bots.examples.assassin import ExampleAssassin
+from coup.bots.bots.examples.challenger import ExampleChallenger
+from coup.bots.bots.examples.counter import ExampleCounter
+from coup.bots.bots.examples.foreign_counter import ExampleForeignCounter
+from coup.bots.bots.examples.simple import ExampleSimple
+from coup.bots.bots.examples.submission_template import ExampleSubmissionTemplate
+
+from coup.engine.engine import Engine, bot_answer
+from coup.engine.latency import HandlerLatency, LatencyStats
+
+
+EXAMPLE_BOTS = [
+    ExampleAmbassador,
+    ExampleAssassin,
+    ExampleChallenger,
+    ExampleCounter,
+    ExampleForeignCounter,
+    ExampleSimple,
+    ExampleSubmissionTemplate,
+]
+
+# The lineups Engine.run_game is timed on: every example bot against itself, a mix of examples,
+# and MainBot against examples
+LINEUPS: dict[str, list[BaseBot]] = {
+    **{bot.__name__: [bot] * 5 for bot in EXAMPLE_BOTS},
+    "mixed_examples": [ExampleSimple, ExampleCounter, ExampleChallenger, ExampleAssassin, ExampleAmbassador],
+    "main_vs_examples": [MainBot, ExampleSimple, ExampleCounter, ExampleChallenger, ExampleAssassin],
+}
+
+# MainBot decisions are grouped by the turn they are made in
+GAME_PHASES = {
+    "early": range(0, 10),
+    "mid": range(10, 30),
+    "late": range(30, Engine.TIMEOUT_TURN),
+}
+
+
+@dataclass
+class Metric:
+    """ One number measured by the suite """
+
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+def best_time(run:Callable[[], None], repeat:int) -> float:
+    """ The fastest of repeat runs in seconds, which is the least disturbed by anything else """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_engine(game_count:int, repeat:int, seed:int=0) -> list[Metric]:
+    """ Games and decisions per second of Engine.run_game for each lineup """
+    metrics = []
+
+    for name, lineup in LINEUPS.items():
+        seeds = [(seed << 32) + g for g in range(game_count)]
+
+        def run() -> None:
+            for game_seed in seeds:
+                Engine(lineup, debug=False, seed=game_seed).run_game()
+
+        seconds = best_time(run, repeat)
+
+        # The same seeds play the same games, so the decisions can be counted on an untimed run
+        latency = LatencyStats()
+        for game_seed in seeds:
+            Engine(lineup, debug=False, seed=game_seed, latency=latency).run_game()
+        decisions = sum(handler.calls for handler in latency.handlers.values())
+
+        metrics.append(Metric(f"engine.{name}.games_per_s", game_count / seconds, "games/s", True))
+        metrics.append(Metric(f"engine.{name}.decisions_per_s", decisions / seconds, "decisions/s", True))
+
+    return metrics
+
+
+def game_info_messages(game_count:int, seed:int=0) -> list[list[dict]]:
+    """ The engine messages of every decision of each game, as the competition engine sends them """
+    games = []
+    for g in range(game_count):
+        engine = Engine(LINEUPS["main_vs_examples"], debug=False, seed=(seed << 32) + g)
+        messages = []
+        steps = engine.steps()
+        try:
+            decision = next(steps)
+            while True:
+                messages.append(decision.game_info.to_dictionary())
+                decision = steps.send(bot_answer(engine.players[decision.player_id].bot, decision))
+        except StopIteration:
+            pass
+        games.append(messages)
+    return games
+
+
+def bench_game_info(game_count:int, repeat:int, seed:int=0) -> list[Metric]:
+    """ The cost of GameInfo.from_dictionary, decoding the whole history or only new turns """
+    games = game_info_messages(game_count, seed)
+    message_count = sum(len(messages) for messages in games)
+
+    def run_full() -> None:
+        for messages in games:
+            for message in messages:
+                GameInfo.from_dictionary(message)
+
+    def run_incremental() -> None:
+        for messages in games:
+            decoder = HistoryDecoder()
+            for message in messages:
+                GameInfo.from_dictionary(message, decoder)
+
+    return [
+        Metric("game_info.full_decode_us", best_time(run_full, repeat) / message_count * 1e6, "us/message", False),
+        Metric("game_info.incremental_decode_us", best_time(run_incremental, repeat) / message_count * 1e6, "us/message", False),
+    ]
+
+
+def bench_main_bot_phases(game_count:int, seed:int=0) -> list[Metric]:
+    """ The latency of MainBot's decisions in each game phase """
+    phases = {phase: HandlerLatency() for phase in GAME_PHASES}
+
+    for g in range(game_count):
+        engine = Engine(LINEUPS["main_vs_examples"], debug=False, seed=(seed << 32) + g)
+        steps = engine.steps()
+        try:
+            decision = next(steps)
+            while True:
+                bot = engine.players[decision.player_id].bot
+                if isinstance(bot, MainBot):
+                    start = time.perf_counter_ns()
+                    answer = bot_answer(bot, decision)
+                    ns = time.perf_counter_ns() - start
+                    for phase, turns in GAME_PHASES.items():
+                        if engine.turn in turns:
+                            phases[phase].add(ns)
+                else:
+                    answer = bot_answer(bot, decision)
+                decision = steps.send(answer)
+        except StopIteration:
+            pass
+
+    metrics = []
+    for phase, latency in phases.items():
+        metrics.append(Metric(f"main_bot.{phase}.p50_us", latency.percentile(0.5) / 1000, "us", False))
+        metrics.append(Metric(f"main_bot.{phase}.p99_us", latency.percentile(0.99) / 1000, "us", False))
+        metrics.append(Metric(f"main_bot.{phase}.mean_us", latency.mean_ns / 1000, "us", False))
+    return metrics
+
+
+def bench_analysis(game_count:int, repeat:int, seed:int=0) -> list[Metric]:
+    """ Games per second of a serial tournament run, including the aggregation of its results """
+    bot_pool = EXAMPLE_BOTS
+
+    def run() -> None:
+        aggregates = ResultAggregates()
+        for rows in iter_games(game_count, MainBot, bot_pool, processes=1, seed=seed):
+            aggregates.add_game(rows)
+        aggregates.rank_crosstab()
+
+    return [Metric("analysis.games_per_s", game_count / best_time(run, repeat), "games/s", True)]
+
+
+def run_suite(scale:float=1.0, repeat:int=3, seed:int=0) -> dict:
+    """
+        Runs every benchmark on fixed seeds and returns the results as a JSON-able dict. scale
+        multiplies the number of games of each benchmark.
+    """
+    def games(n:int) -> int:
+        return max(1, int(n * scale))
+
+    metrics = [
+        *bench_engine(games(200), repeat, seed),
+        *bench_game_info(games(20), repeat, seed),
+        *bench_main_bot_phases(games(300), seed),
+        *bench_analysis(games(300), repeat, seed),
+    ]
+
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "scale": scale,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "metrics": {metric.name: asdict(metric) for metric in metrics},
+    }
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+    unit: str
+    change: float           # Relative change, positive is better
+    regressed: bool
+
+
+def compare(results:dict, baseline:dict, tolerance:float=0.1) -> list[Comparison]:
+    """
+        Compares each metric of results with the baseline. A metric regressed if it is more than
+        tolerance (relatively) worse than the baseline. Metrics missing from either side are
+        skipped.
+    """
+    comparisons = []
+    for name, metric in results["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None or base["value"] == 0:
+            continue
+
+        if metric["higher_is_better"]:
+            change = (metric["value"] - base["value"]) / base["value"]
+        else:
+            change = (base["value"] - metric["value"]) / base["value"]
+
+        comparisons.append(Comparison(
+            name=name,
+            baseline=base["value"],
+            current=metric["value"],
+            unit=metric["unit"],
+            change=change,
+            regressed=change < -tolerance,
+        ))
+    return comparisons
+
+
+def format_comparisons(comparisons:list[Comparison]) -> str:
+    width = max((len(c.name) for c in comparisons), default=0)
+    lines = []
+    for c in comparisons:
+        flag = "  REGRESSED" if c.regressed else ""
+        lines.append(
+            f"{c.name:<{width}}  {c.baseline:>12.2f} -> {c.current:>12.2f} {c.unit:<12} "
+            f"{c.change:+7.1%}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def load_results(path) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
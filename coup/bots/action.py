@@ -50,3 +50,13 @@ class Action:
             successful=successful,
             target=target,
         )
+
+    def to_dictionary(self) -> dict:
+        """ The inverse of from_dictionary, as the engine sends it """
+        return {
+            'action_type': int(self.action_type),
+            'action': int(self.action),
+            'player': self.player_id,
+            'target': self.target,
+            'successful': self.successful,
+        }
@@ -0,0 +1,443 @@
+from coup.bots.enums import *
+from coup.bots.action import Action
+from coup.common.rules import *
+
+"""END LOCAL IMPORTS"""
+
+from itertools import combinations_with_replacement
+from math import comb
+from typing import Optional, Sequence
+
+
+# Every hand a player can hold, as sorted tuples of characters, by the number of cards in it
+HANDS: list[list[tuple[Character, ...]]] = [
+    [()],
+    [(c,) for c in Character],
+    list(combinations_with_replacement(Character, 2)),
+]
+
+# The index of each hand in HANDS
+HAND_INDEXES: dict[tuple[Character, ...], int] = {
+    hand: i for hands in HANDS for i, hand in enumerate(hands)
+}
+
+# For each one card hand, the index of the two card hand it is part of with each revealed card,
+# indexed [revealed card][remaining card index]
+_REVEAL_PARENTS: dict[Character, list[int]] = {
+    revealed: [HAND_INDEXES[tuple(sorted((revealed, remaining)))] for remaining in Character]
+    for revealed in Character
+}
+
+# How likely a player is to make a claim they do not have the card for, relative to one they do
+DEFAULT_BLUFF_LIKELIHOOD = 0.5
+
+# How likely a player is to lose a challenge of a claim while holding the card, relative to
+# without it. Not 0, since a bot can reveal the wrong card.
+DEFAULT_CAUGHT_LIKELIHOOD = 0.05
+
+
+# A reveal in a reveal log (see GameInfo.reveal_log) is packed into an int as the turn it happened
+# in, the player who revealed and the character revealed
+REVEAL_PLAYER_SHIFT = 3
+REVEAL_TURN_SHIFT = 6
+REVEAL_MASK = 0b111
+
+
+def pack_reveal(turn: int, player_id: int, character: Character) -> int:
+    return (turn << REVEAL_TURN_SHIFT) | (player_id << REVEAL_PLAYER_SHIFT) | character
+
+
+def turn_losses(h: dict[ActionType, Action]) -> list[tuple[int, bool]]:
+    """
+        Every card lost in a completed turn, in the order they were lost, as the player who lost
+        it and whether it was revealed. A player caught bluffing loses a card without revealing
+        it. The others lose a card to a lost challenge or a Coup or Assassination, and reveal it
+        (unless they have no cards left to lose).
+    """
+    losses: list[tuple[int, bool]] = []
+    primary_action = h[ActionType.PrimaryAction]
+
+    challenge = h.get(ActionType.ChallengePrimaryAction)
+    if challenge is not None and challenge.successful is not None:
+        if challenge.successful:
+            losses.append((primary_action.player_id, False))
+        else:
+            losses.append((challenge.player_id, True))
+
+    challenge = h.get(ActionType.ChallengeCounterAction)
+    if challenge is not None and challenge.successful is not None:
+        if challenge.successful:
+            losses.append((h[ActionType.CounterAction].player_id, False))
+        else:
+            losses.append((challenge.player_id, True))
+
+    if (
+        primary_action.successful
+        and primary_action.action in (PrimaryAction.Coup, PrimaryAction.Assassinate)
+        and primary_action.target is not None
+    ):
+        losses.append((primary_action.target, True))
+
+    return losses
+
+
+def lose_card(likelihoods: list[float], lost: Optional[dict[Character, float]] = None) -> list[float]:
+    """
+        The likelihoods of the hands left after a two card hand loses a card. lost gives the
+        weight of each character the lost card could have been, or is None for a card that was
+        not seen, which is either card of the hand with equal chance.
+    """
+    remaining = [0.0] * len(HANDS[1])
+    for character in Character:
+        if lost is None:
+            weight = 1.0
+        else:
+            weight = lost.get(character, 0)
+            if weight == 0:
+                continue
+
+        parents = _REVEAL_PARENTS[character]
+        for i, parent in enumerate(parents):
+            if lost is None and HANDS[1][i][0] != character:
+                remaining[i] += weight * likelihoods[parent] / 2
+            else:
+                remaining[i] += weight * likelihoods[parent]
+    return remaining
+
+
+class HandBeliefs:
+    """
+        A probability distribution over the possible hands of each other player.
+
+        For each player this keeps the likelihood of everything we have seen them do given each
+        hand they could hold: their claims, the challenges of those claims, and the cards they
+        lost. The distribution is these likelihoods times the chance of being dealt each hand
+        from the cards we cannot see (see hand_distribution). Hands are looked at independently
+        for each player, which ignores that two players cannot both hold the last of a card.
+
+        Like the HistoryIndex, it is updated incrementally (see update): each completed turn is
+        taken in once, and each card lost in it updates only the at most 15 hands of its player.
+    """
+
+    def __init__(
+        self,
+        player_num: int = 5,
+        bluff_likelihood: float = DEFAULT_BLUFF_LIKELIHOOD,
+        caught_likelihood: float = DEFAULT_CAUGHT_LIKELIHOOD,
+    ) -> None:
+        self.bluff_likelihood = bluff_likelihood
+        self.caught_likelihood = caught_likelihood
+
+        # Number of turns from the start of the history that have been looked at, and of reveals
+        # from the start of the reveal log
+        self.indexed_turns = 0
+        self.indexed_reveals = 0
+
+        # The likelihood of each hand in HANDS of each player, indexed [player_id][hand index]
+        self.likelihoods: list[list[float]] = [[1.0] * len(HANDS[2]) for _ in range(player_num)]
+
+        # The number of cards of each player as of the turns looked at
+        self.cards_num: list[int] = [2] * player_num
+
+        # Without a reveal log, the revealed cards and our own cards when we last looked, to
+        # find the cards revealed since
+        self.revealed: list[int] = [0] * len(Character)
+        self.own_cards: list[Character] = []
+
+        # The number of each card we cannot see, as of the last update
+        self.unknown_card_counts: dict[Character, int] = {c: NUMBER_OF_EACH_CARD_IN_DECK for c in Character}
+
+
+    def copy(self) -> "HandBeliefs":
+        """ An independent copy, to carry on following a copy of the same game """
+        hand_beliefs = HandBeliefs.__new__(HandBeliefs)
+        hand_beliefs.bluff_likelihood = self.bluff_likelihood
+        hand_beliefs.caught_likelihood = self.caught_likelihood
+        hand_beliefs.indexed_turns = self.indexed_turns
+        hand_beliefs.indexed_reveals = self.indexed_reveals
+        hand_beliefs.likelihoods = [likelihoods[:] for likelihoods in self.likelihoods]
+        hand_beliefs.cards_num = self.cards_num[:]
+        hand_beliefs.revealed = self.revealed[:]
+        hand_beliefs.own_cards = self.own_cards[:]
+        hand_beliefs.unknown_card_counts = self.unknown_card_counts.copy()
+        return hand_beliefs
+
+
+    def update(self, game_info: "GameInfo") -> None:
+        """
+            Takes in the turns completed since the last update: first the claims of each turn,
+            then the cards lost in it.
+
+            Who revealed which card comes from the game_info's reveal_log when it has one (the
+            local engine). Otherwise (the messages of the competition engine) only the revealed
+            card counts are known, so the cards revealed since the last update are shared out
+            among the players who lost a card in the new turns: exactly when there is only one
+            character they can have been, and otherwise as an equal mixture of them.
+        """
+        history = game_info.history
+        completed_turns = len(history) - 1
+        if completed_turns > self.indexed_turns:
+            reveal_log = game_info.reveal_log
+            new_reveals = None if reveal_log is not None else self._new_reveals(game_info)
+
+            for turn in range(self.indexed_turns, completed_turns):
+                h = history[turn]
+                self._observe_turn(h, game_info.player_id)
+                self._observe_losses(turn, h, game_info.player_id, reveal_log, new_reveals)
+            self.indexed_turns = completed_turns
+
+        unknown_card_counts = self.unknown_card_counts
+        revealed_cards = game_info.revealed_cards
+        for character in Character:
+            unknown_card_counts[character] = NUMBER_OF_EACH_CARD_IN_DECK - revealed_cards.get(character, 0)
+        for character in game_info.own_cards:
+            unknown_card_counts[character] -= 1
+
+
+    def _observe_turn(self, h: dict[ActionType, Action], own_player_id: int) -> None:
+        primary_action = h[ActionType.PrimaryAction]
+        if primary_action.action in PRIMARY_ACTION_TO_CARD:
+            self._observe_claim(
+                primary_action.player_id,
+                PRIMARY_ACTION_TO_CARD[primary_action.action],
+                h.get(ActionType.ChallengePrimaryAction),
+                own_player_id,
+            )
+
+        if ActionType.CounterAction in h:
+            counter_action = h[ActionType.CounterAction]
+            if counter_action.action in COUNTER_ACTION_TO_CARD:
+                self._observe_claim(
+                    counter_action.player_id,
+                    COUNTER_ACTION_TO_CARD[counter_action.action],
+                    h.get(ActionType.ChallengeCounterAction),
+                    own_player_id,
+                )
+
+        # An Exchange draws a new hand from the deck, so nothing we knew about it still holds
+        if (
+            primary_action.action == PrimaryAction.Exchange
+            and primary_action.successful
+            and primary_action.player_id != own_player_id
+        ):
+            self._reset(primary_action.player_id)
+
+
+    def _observe_claim(
+        self,
+        player_id: int,
+        character: Character,
+        challenge: Optional[Action],
+        own_player_id: int,
+    ) -> None:
+        if player_id == own_player_id or self.cards_num[player_id] == 0:
+            return
+
+        if challenge is None or challenge.successful is None:
+            # Unchallenged, so they may or may not have it
+            self._weight(player_id, character, 1.0, self.bluff_likelihood)
+        elif challenge.successful:
+            # Caught bluffing, they almost certainly did not have it
+            self._weight(player_id, character, self.caught_likelihood, 1.0)
+        else:
+            # They showed the card, and swapped it for a new one from the deck
+            self._reset(player_id)
+
+
+    def _weight(self, player_id: int, character: Character, holding: float, not_holding: float) -> None:
+        """ Multiplies the likelihood of each hand of a player by whether it holds a character """
+        likelihoods = self.likelihoods[player_id]
+        for i, hand in enumerate(HANDS[self.cards_num[player_id]]):
+            likelihoods[i] *= holding if character in hand else not_holding
+
+
+    def _reset(self, player_id: int) -> None:
+        self.likelihoods[player_id] = [1.0] * len(HANDS[self.cards_num[player_id]])
+
+
+    def _new_reveals(self, game_info: "GameInfo") -> dict[Character, int]:
+        """
+            The count of each character revealed by other players since the last update. Our own
+            lost cards are the ones no longer in our hand (unless we also exchanged).
+        """
+        revealed_cards = game_info.revealed_cards
+        new_reveals: dict[Character, int] = {}
+        for character in Character:
+            count = revealed_cards.get(character, 0)
+            if count > self.revealed[character - 1]:
+                new_reveals[character] = count - self.revealed[character - 1]
+            self.revealed[character - 1] = count
+
+        own_cards = game_info.own_cards
+        if len(own_cards) < len(self.own_cards):
+            lost = self.own_cards[:]
+            for character in own_cards:
+                if character in lost:
+                    lost.remove(character)
+            for character in lost:
+                if new_reveals.get(character, 0) > 0:
+                    new_reveals[character] -= 1
+        self.own_cards = list(own_cards)
+
+        return {character: count for character, count in new_reveals.items() if count > 0}
+
+
+    def _observe_losses(
+        self,
+        turn: int,
+        h: dict[ActionType, Action],
+        own_player_id: int,
+        reveal_log: Optional[Sequence[int]],
+        new_reveals: Optional[dict[Character, int]],
+    ) -> None:
+        for player_id, revealed in turn_losses(h):
+            if self.cards_num[player_id] == 0:
+                # Eliminated earlier in the turn, so there was nothing left to lose
+                continue
+
+            if not revealed:
+                self._lose(player_id, own_player_id, None)
+            elif reveal_log is not None and self.indexed_reveals < len(reveal_log):
+                # The log has every reveal, in the order of the losses
+                reveal = reveal_log[self.indexed_reveals]
+                self.indexed_reveals += 1
+                self._lose(
+                    (reveal >> REVEAL_PLAYER_SHIFT) & REVEAL_MASK,
+                    own_player_id,
+                    {Character(reveal & REVEAL_MASK): 1},
+                )
+            elif player_id == own_player_id or new_reveals is None:
+                self._lose(player_id, own_player_id, None)
+            else:
+                self._lose(player_id, own_player_id, new_reveals or None)
+                if len(new_reveals) == 1:
+                    # It can only have been this character, so it is accounted for
+                    character, count = next(iter(new_reveals.items()))
+                    if count == 1:
+                        del new_reveals[character]
+                    else:
+                        new_reveals[character] = count - 1
+
+
+    def _lose(
+        self,
+        player_id: int,
+        own_player_id: int,
+        lost: Optional[dict[Character, float]],
+    ) -> None:
+        """
+            A player lost a card, which may have been any character in lost, by weight (or any of
+            their cards for None)
+        """
+        cards_num = self.cards_num[player_id]
+        self.cards_num[player_id] = cards_num - 1
+        if player_id == own_player_id:
+            return
+
+        if cards_num == 2:
+            remaining = lose_card(self.likelihoods[player_id], lost)
+            if any(remaining):
+                self.likelihoods[player_id] = remaining
+                return
+
+        # What we saw of them cannot have happened, or they have no choice of hands left
+        self._reset(player_id)
+
+
+    def likelihoods_of(self, player_id: int, cards_num: Optional[int] = None) -> list[float]:
+        """
+            The likelihood of each hand of cards_num cards (by default the number of cards the
+            player had after the last turn looked at) of a player. A player with a card fewer
+            than that has lost one we have not taken in yet, so it is taken to be either card of
+            their hand with equal chance.
+        """
+        if cards_num is None or cards_num == self.cards_num[player_id]:
+            return self.likelihoods[player_id]
+        if cards_num >= len(HANDS):
+            raise ValueError(f'Only hands of up to {len(HANDS) - 1} cards are modelled')
+        if cards_num == 1 and self.cards_num[player_id] == 2:
+            return lose_card(self.likelihoods[player_id])
+        return [1.0] * len(HANDS[cards_num])
+
+
+    def hand_distribution(
+        self,
+        player_id: int,
+        unknown_card_counts: Optional[dict[Character, int]] = None,
+        cards_num: Optional[int] = None,
+    ) -> list[tuple[tuple[Character, ...], float]]:
+        """
+            The probability of each hand of a player (of cards_num cards, see likelihoods_of). The
+            chance of being dealt a hand is from the unknown_card_counts, by default those of the
+            last update.
+        """
+        if unknown_card_counts is None:
+            unknown_card_counts = self.unknown_card_counts
+        if cards_num is None:
+            cards_num = self.cards_num[player_id]
+
+        hands = HANDS[cards_num]
+        priors = []
+        for hand in hands:
+            prior = 1
+            for character in set(hand):
+                prior *= comb(unknown_card_counts[character], hand.count(character))
+            priors.append(prior)
+
+        likelihoods = self.likelihoods_of(player_id, cards_num)
+        weights = [prior * likelihood for prior, likelihood in zip(priors, likelihoods)]
+        total = sum(weights)
+        if total == 0:
+            # Our evidence rules out every hand they could have been dealt, so only use the deal
+            weights = priors
+            total = sum(weights)
+            if total == 0:
+                return []
+
+        return [(hand, weight / total) for hand, weight in zip(hands, weights) if weight > 0]
+
+
+    def certainly_lacks(self, character: Character) -> bool:
+        """
+            Whether every card of a character is known to be elsewhere (revealed or ours), so that
+            no other player can have one. This is the only certainty, since no likelihood is
+            ever 0, and needs only the counts of unknown cards.
+        """
+        return self.unknown_card_counts[character] == 0
+
+
+    def probability_has(
+        self,
+        player_id: int,
+        character: Character,
+        unknown_card_counts: Optional[dict[Character, int]] = None,
+        cards_num: Optional[int] = None,
+    ) -> float:
+        """ The probability that a player holds at least one of a character """
+        return sum(
+            probability
+            for hand, probability in self.hand_distribution(player_id, unknown_card_counts, cards_num)
+            if character in hand
+        )
+
+
+    def probability_reveals(
+        self,
+        player_id: int,
+        character: Character,
+        claimed_card: Character,
+        unknown_card_counts: Optional[dict[Character, int]] = None,
+        cards_num: Optional[int] = None,
+    ) -> float:
+        """
+            The probability that a player who is challenged on claimed_card reveals character,
+            if they reveal the claimed card whenever they have it and otherwise one of their
+            cards at random.
+        """
+        probability = 0.0
+        for hand, hand_probability in self.hand_distribution(player_id, unknown_card_counts, cards_num):
+            if claimed_card in hand:
+                probability += hand_probability * (character == claimed_card)
+            else:
+                probability += hand_probability * hand.count(character) / len(hand)
+        return probability
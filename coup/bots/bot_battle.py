@@ -1,20 +1,52 @@
 from coup.bots.enums import ChallengeAction, PrimaryAction, CounterAction, RequestedMove
 from coup.bots.game_info import GameInfo
+from coup.bots.history_decoder import HistoryDecoder
 
 """END LOCAL IMPORTS"""
 
 import json
+import os
+import sys
 from typing import Optional
 
 
+# The pipes to and from the engine. The competition engine uses the defaults, a local host
+# (see coup/engine/host.py) can point these elsewhere, or set them to "-" for stdin and stdout.
+FROM_ENGINE_PATH = os.environ.get('COUP_FROM_ENGINE', '/io/from_engine.pipe')
+TO_ENGINE_PATH = os.environ.get('COUP_TO_ENGINE', '/io/to_engine.pipe')
+
+# The most bytes taken from the engine pipe at once
+READ_CHUNK_SIZE = 1 << 16
+
+MESSAGE_DELIMITER = b';'
+
+
 class BotBattle:
     def __init__(self):
-        self.from_engine = open(f'/io/from_engine.pipe', 'r', encoding='utf-8') 
-        self.to_engine = open(f'/io/to_engine.pipe', 'w', encoding='utf-8') 
+        # Read as bytes, so whole chunks can be taken with read1 (see _read_from_pipe)
+        if FROM_ENGINE_PATH == '-':
+            self.from_engine = sys.stdin.buffer
+        else:
+            self.from_engine = open(FROM_ENGINE_PATH, 'rb')
+
+        # Bytes read from the engine but not yet returned as a message, and how many of them
+        # are known not to contain the delimiter
+        self._read_buffer = bytearray()
+        self._read_scanned = 0
+
+        # Keeps the decoded history between the messages of a game
+        self.history_decoder = HistoryDecoder()
+
+        if TO_ENGINE_PATH == '-':
+            self.to_engine = sys.stdout
+            # Anything else the bot prints would corrupt the moves, so it goes to stderr instead
+            sys.stdout = sys.stderr
+        else:
+            self.to_engine = open(TO_ENGINE_PATH, 'w', encoding='utf-8')
 
     def get_game_info(self) -> GameInfo:
         dict_game_info = self._read_from_pipe()
-        return GameInfo.from_dictionary(dict_game_info)
+        return GameInfo.from_dictionary(dict_game_info, self.history_decoder)
 
     def play_primary_action(self, primary_action: PrimaryAction, target_player_id: Optional[int] = None):
         dict_move = {
@@ -53,11 +85,30 @@ class BotBattle:
         self._write_to_pipe(dict_move)
 
     def _read_from_pipe(self):
-        json_game_info = ''
-        while not json_game_info or json_game_info[-1] != ';':
-            json_game_info += self.from_engine.read(1)
+        """
+            Returns the next ;-terminated message from the engine.
+
+            Whatever the pipe has available is read in one go (read1 never waits for more than
+            one read), and anything after the message is kept for the next call. So each message
+            costs a few reads, and each byte is only scanned for the delimiter once.
+        """
+        buffer = self._read_buffer
+        while True:
+            end = buffer.find(MESSAGE_DELIMITER, self._read_scanned)
+            if end != -1:
+                break
+
+            self._read_scanned = len(buffer)
+            chunk = self.from_engine.read1(READ_CHUNK_SIZE)
+            if not chunk:
+                raise EOFError('The engine closed the pipe')
+            buffer += chunk
+
+        json_game_info = bytes(buffer[:end])
+        del buffer[:end + 1]
+        self._read_scanned = 0
 
-        deserialized_game_info = json.loads(json_game_info[:-1])
+        deserialized_game_info = json.loads(json_game_info)
         return deserialized_game_info
 
     def _write_to_pipe(self, dict_move):
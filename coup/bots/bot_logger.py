@@ -0,0 +1,95 @@
+"""END LOCAL IMPORTS"""
+
+import os
+import sys
+from collections import deque
+from typing import Any, Optional, TextIO
+
+
+# Log levels, as in the logging module
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {
+    DEBUG: 'DEBUG',
+    INFO: 'INFO',
+    WARNING: 'WARNING',
+    ERROR: 'ERROR',
+}
+
+# The level bots log at unless told otherwise, e.g. COUP_LOG_LEVEL=DEBUG
+DEFAULT_LOG_LEVEL = os.environ.get('COUP_LOG_LEVEL', 'INFO')
+
+
+class BotLogger:
+    """
+        A leveled logger that keeps its records in memory rather than printing each one.
+
+        Records go into a ring buffer of the last capacity records, which is only written out by
+        flush (when the game ends or the bot fails), so a bot can log every move without a flush
+        per line. Records below the level are dropped without being formatted, and any value
+        given as a callable is only called if the record is kept, so diagnostics that are
+        expensive to work out cost nothing when their level is off:
+
+            logger.debug("winning_player:", lambda: game_info.get_winning_player().player_id)
+    """
+
+    def __init__(
+        self,
+        level: Optional[int | str] = None,
+        capacity: int = 2000,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        if level is None:
+            level = DEFAULT_LOG_LEVEL
+        if isinstance(level, str):
+            level = {name: l for l, name in LEVEL_NAMES.items()}[level.upper()]
+        self.level = level
+
+        self.records: deque[str] = deque(maxlen=capacity)
+
+        # Number of records pushed out of the full buffer since the last flush
+        self.dropped = 0
+
+        # None writes to whatever sys.stdout is at the time of the flush
+        self.stream = stream
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, *values: Any) -> None:
+        if level < self.level:
+            return
+
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+
+        values = [value() if callable(value) else value for value in values]
+        self.records.append(LEVEL_NAMES[level] + ' ' + ' '.join(str(value) for value in values))
+
+    def debug(self, *values: Any) -> None:
+        self.log(DEBUG, *values)
+
+    def info(self, *values: Any) -> None:
+        self.log(INFO, *values)
+
+    def warning(self, *values: Any) -> None:
+        self.log(WARNING, *values)
+
+    def error(self, *values: Any) -> None:
+        self.log(ERROR, *values)
+
+    def flush(self) -> None:
+        """ Writes out and clears the buffered records """
+        if not self.records and not self.dropped:
+            return
+
+        stream = self.stream if self.stream is not None else sys.stdout
+        if self.dropped:
+            print(f'({self.dropped} earlier records dropped)', file=stream)
+        print('\n'.join(self.records), file=stream, flush=True)
+
+        self.records.clear()
+        self.dropped = 0
@@ -1,17 +1,53 @@
 from coup.bots.bot_battle import BotBattle
+from coup.bots.bot_logger import BotLogger, DEBUG
 from coup.bots.game_info import GameInfo
 from coup.bots.enums import *
 
 """END LOCAL IMPORTS"""
 
+import copyreg
 import json
+from random import Random
 from typing import Optional, Type
 
 
+class NamedBotType(type):
+    """
+        The metaclass of bots made by BaseBot.as_name. Those are defined inside a function, so
+        unlike other bots they cannot be pickled by reference to their module. They are pickled
+        as the bot they derive from, their name and the class attributes set on them instead
+        (see _reduce_named_bot), so they can be sent to worker processes however those start.
+    """
+
+
+def _named_bot(base: Type["BaseBot"], name: str, attributes: dict) -> Type["BaseBot"]:
+    bot_class = base.as_name(name)
+    for key, value in attributes.items():
+        setattr(bot_class, key, value)
+    return bot_class
+
+
+def _reduce_named_bot(bot_class: NamedBotType) -> tuple:
+    attributes = {
+        key: value for key, value in vars(bot_class).items() if not key.startswith('__')
+    }
+    return _named_bot, (bot_class.__bases__[0], bot_class.__name__, attributes)
+
+
+copyreg.pickle(NamedBotType, _reduce_named_bot)
+
+
 class BaseBot:
-    def __init__(self, local_mode=False) -> None:
+    def __init__(self, local_mode=False, rng: Optional[Random] = None) -> None:
         game_info: Optional[GameInfo] = None
 
+        # Bots should take all of their randomness from here, so that the
+        # local engine can seed each of them.
+        self.rng: Random = rng if rng is not None else Random()
+
+        # Buffered, only written out when the game ends or the bot fails (see run)
+        self.logger = BotLogger()
+
         self.bot_battle: Optional[BotBattle]
         if not local_mode:
             self.bot_battle = BotBattle()
@@ -40,36 +76,46 @@ class BaseBot:
         return 0
 
     def run(self) -> None:
-        print("Bot:", str(self), flush=True)
-
+        self.logger.info("Bot:", str(self))
+
+        try:
+            self._run()
+        except BaseException as e:
+            self.logger.error("Failed with", repr(e))
+            raise
+        finally:
+            self.logger.flush()
+
+    def log_game_info(self) -> None:
+        """ Logs the game state before a move, at DEBUG level """
+        game_info = self.game_info
+        log = self.logger.debug
+
+        log("current_player_id:", game_info.player_id)
+        log("Own Cards:", game_info.own_cards)
+        # The local engine's balances and card numbers are arrays, log them as lists either way
+        log("balances", lambda: list(game_info.balances))
+        log("card_nums", lambda: list(game_info.players_cards_num))
+        log("next_alive_player_id:", lambda: game_info.get_next_alive_player().player_id)
+        log("next_richest_player_id:", lambda: game_info.get_richest_player().player_id)
+        log("most_cards:", game_info.get_most_cards)
+        log("winning_player:", lambda: game_info.get_winning_player().player_id)
+        log("Existing foreign block:", lambda: game_info.exists_historical_counter(CounterAction.BlockForeignAid))
+
+        for i in range(max(len(game_info.history) - 2, 0), len(game_info.history)):
+            log("History", i, game_info.history[i])
+
+    def _run(self) -> None:
         while True:
-            self.game_info = self.bot_battle.get_game_info()
+            try:
+                self.game_info = self.bot_battle.get_game_info()
+            except EOFError:
+                # The engine has finished with us
+                return
             requested_move = self.game_info.requested_move
 
-            print("current_player_id:", self.game_info.player_id, flush=True)
-            print("Own Cards:", self.game_info.own_cards, flush=True)
-            print("balances", self.game_info.balances, flush=True)
-            print("card_nums", self.game_info.players_cards_num, flush=True)
-            print("next_alive_player_id:", self.game_info.get_next_alive_player().player_id, flush=True)
-            print("next_richest_player_id:", self.game_info.get_richest_player().player_id, flush=True)
-            print("most_cards:", self.game_info.get_most_cards(), flush=True)
-            print("winning_player:", self.game_info.get_winning_player().player_id, flush=True)
-
-
-            print("Existing foreign block:", self.game_info.exists_historical_counter(CounterAction.BlockForeignAid), flush=True)
-
-            for i,h in enumerate(self.game_info.history):
-                if i >= len(self.game_info.history) - 2:
-                    print("History", i, h)
-
-            # if len(self.game_info.history) > 1:
-            #     print("history[-1]:", self.game_info.history[-2], flush=True)
-
-            # if len(self.game_info.history) > 0:
-            #     print("history[-1]:", self.game_info.history[-1], flush=True)
-                # print("history[-1]:", self.game_info.history[-1], flush=True)
-                # if ActionType.PrimaryAction in self.game_info.history[-1]:
-                #     print(self.game_info.history[-1][ActionType.PrimaryAction].__dict__)
+            if self.logger.enabled(DEBUG):
+                self.log_game_info()
 
             if requested_move == RequestedMove.PrimaryAction:
                 primary_action, target = self.primary_action_handler()
@@ -108,7 +154,7 @@ class BaseBot:
 
     @classmethod
     def as_name(cls, name: str) -> "BaseBot":
-        class TempBot(cls):
+        class TempBot(cls, metaclass=NamedBotType):
             pass
         TempBot.__name__ = name
         return TempBot
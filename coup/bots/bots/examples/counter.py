@@ -34,7 +34,7 @@ class ExampleCounter(BaseBot):
         if action.action == PrimaryAction.Steal:
             # NOTE: technically the example bot maintains a state and will alternatie
             # We just select randomly bc its easier
-            if random.random() < 0.5:
+            if self.rng.random() < 0.5:
                 return CounterAction.BlockStealingAsCaptain
             else:
                 return CounterAction.BlockStealingAsAmbassador
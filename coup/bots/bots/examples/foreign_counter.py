@@ -32,7 +32,7 @@ class ExampleForeignCounter(BaseBot):
 
     def challenge_action_handler(self) -> ChallengeAction:
         # No joke this is literally what the example does
-        if random.randint(1,10) == 10:
+        if self.rng.randint(1,10) == 10:
             return ChallengeAction.Challenge
 
         return ChallengeAction.NoChallenge
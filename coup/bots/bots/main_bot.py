@@ -3,18 +3,79 @@ from coup.bots.bots.base_bot import BaseBot
 
 """END LOCAL IMPORTS"""
 
+from dataclasses import dataclass, replace
 from typing import Optional
 import random
 
 
+@dataclass(frozen=True)
+class MainBotParams:
+    """
+        The hand tuned constants of MainBot, so they can be swept without editing the bot.
+        The defaults are the values we submitted with.
+    """
+
+    # Coup whenever we have at least this many coins (we must at 10)
+    coup_balance: int = 7
+
+    # Coup the previous player first if they have at least this many coins
+    prev_player_coup_balance: int = 7
+
+    # Attack the previous player (whatever our cards) if they have at least this many coins
+    prev_player_assassinate_balance: int = 9
+    prev_player_steal_balance: int = 7
+
+    # Only steal (as Captain) from players with at least this many coins
+    steal_balance: int = 5
+
+    # Tax (with or without a Duke) after this turn if fewer than late_tax_dukes Dukes are revealed
+    late_tax_turn: int = 16
+    late_tax_dukes: int = 3
+
+    # The order in which character primary actions are tried when we hold the card
+    primary_priority: tuple[PrimaryAction, ...] = (
+        PrimaryAction.Assassinate,
+        PrimaryAction.Tax,
+        PrimaryAction.Steal,
+    )
+
+    # The order in which we give up cards, first to last
+    discard_order: tuple[Character, ...] = (
+        Character.Contessa,
+        Character.Ambassador,
+        Character.Assassin,
+        Character.Duke,
+        Character.Captain,
+    )
+
+
 class MainBot(BaseBot):
     """
         Our main submission bot.
     """
+
+    params = MainBotParams()
+
+    @classmethod
+    def with_params(cls, params: Optional[MainBotParams] = None, name: Optional[str] = None, **changes) -> "MainBot":
+        """
+            A subclass of this bot using the given params, with any changes applied on top.
+            The name defaults to one listing the changes, e.g. MainBot(steal_balance=4).
+        """
+        params = replace(params or cls.params, **changes)
+        if name is None:
+            name = f'{cls.__name__}({", ".join(f"{k}={v}" for k, v in changes.items())})'
+
+        bot_class = cls.as_name(name)
+        bot_class.params = params
+        return bot_class
+
+
     def primary_action_handler(self) -> tuple[PrimaryAction, Optional[int]]:
+        params = self.params
 
         # We must coup if we can afford it (technically if >=10)
-        if self.game_info.current_player.balance >= 7:
+        if self.game_info.current_player.balance >= params.coup_balance:
             # TODO: Find who to coup
 
             # Likely a good idea is to coup the player who seems to be "best"
@@ -35,7 +96,7 @@ class MainBot(BaseBot):
 
 
             prev_player = self.game_info.get_prev_alive_player()
-            if prev_player.balance >= 7:
+            if prev_player.balance >= params.prev_player_coup_balance:
                 return (PrimaryAction.Coup, prev_player.player_id)
 
             target_player = self.game_info.get_winning_player()
@@ -54,12 +115,12 @@ class MainBot(BaseBot):
         # NOTE: This is good. Often prev player is who coups us so we should try to stop them at our own risk.
 
         prev_player = self.game_info.get_prev_alive_player()
-        if prev_player.balance >= 9 and self.game_info.current_player.balance >= 3:
+        if prev_player.balance >= params.prev_player_assassinate_balance and self.game_info.current_player.balance >= 3:
             return (PrimaryAction.Assassinate, prev_player.player_id)
 
 
         prev_player = self.game_info.get_prev_alive_player()
-        if prev_player.balance >= 7:
+        if prev_player.balance >= params.prev_player_steal_balance:
             return (PrimaryAction.Steal, prev_player.player_id)
 
 
@@ -84,65 +145,10 @@ class MainBot(BaseBot):
 
 
 
-        # if self.game_info.current_player.balance >= 3:
-        if Character.Assassin in self.game_info.own_cards and self.game_info.current_player.balance >= 3:
-
-
-            # richest_player = self.game_info.get_richest_player()
-            # if richest_player.balance >= 7 and not richest_player.has_blocked(CounterAction.BlockAssassination):
-            #     return (PrimaryAction.Assassinate, richest_player.player_id)
-
-            # for p in self.game_info.remaining_players_richest:
-            for p in self.game_info.remaining_players_winning:
-                if p.has_blocked(CounterAction.BlockAssassination): continue
-
-                return (PrimaryAction.Assassinate, p.player_id)
-
-
-            # Avoiding players who historically block is important, obviously
-            # Idk whether to start applying this stuff now or waiting until the deadline approaches
-            # target_player = self.game_info.get_winning_player_without_counter(CounterAction.BlockAssassination)
-            # if target_player is not None:
-            #     return (PrimaryAction.Assassinate, target_player.player_id)
-
-
-        if Character.Duke in self.game_info.own_cards:
-            return (PrimaryAction.Tax, None)
-
-
-        if Character.Captain in self.game_info.own_cards:
-
-            # target_player = self.game_info.get_winning_player_without_counter(CounterAction.BlockStealingAsCaptain)
-            # if target_player is not None and target_player.balance >= 5:
-            #     return (PrimaryAction.Steal, target_player.player_id)
-
-
-            # print(self.game_info.remaining_players_winning)
-            # input()
-
-
-            # for p in self.game_info.remaining_players_richest:
-            for p in self.game_info.remaining_players_winning:
-                if p.balance < 5: continue
-                if p.has_blocked_steal(): continue
-
-                return (PrimaryAction.Steal, p.player_id)
-
-
-            # Maybe steal from people with >=3 who have successfully assassinated a player in the past
-            # if richest_player.balance >= 4 and 
-
-            # Steal if it gives us a coup opportunity
-            # if richest_player.balance == 1 and self.game_info.current_player.balance == 6:
-            #     return (PrimaryAction.Steal, richest_player.player_id)
-
-
-            # richest_player = self.game_info.get_richest_player()  # >=5 is best?
-
-            # # Steal if we can get 2 coins
-            # if richest_player.balance >= 5:
-            #     return (PrimaryAction.Steal, richest_player.player_id)
-
+        for primary_action in params.primary_priority:
+            action = self.character_action_handlers[primary_action](self)
+            if action is not None:
+                return action
 
 
         # if Character.Ambassador in self.game_info.own_cards:
@@ -187,7 +193,7 @@ class MainBot(BaseBot):
 
         # if len(self.game_info.remaining_players) == 2:
         # if dukes <= 1 and self.game_info.turn > 16:
-        if dukes < 3 and self.game_info.turn > 16:
+        if dukes < params.late_tax_dukes and self.game_info.turn > params.late_tax_turn:
             return (PrimaryAction.Tax, None)
 
 
@@ -196,6 +202,83 @@ class MainBot(BaseBot):
 
 
 
+    def assassinate_handler(self) -> Optional[tuple[PrimaryAction, Optional[int]]]:
+        """ Assassinate (if we hold an Assassin) the best player who has not blocked it """
+        # if self.game_info.current_player.balance >= 3:
+        if Character.Assassin not in self.game_info.own_cards or self.game_info.current_player.balance < 3:
+            return None
+
+        # richest_player = self.game_info.get_richest_player()
+        # if richest_player.balance >= 7 and not richest_player.has_blocked(CounterAction.BlockAssassination):
+        #     return (PrimaryAction.Assassinate, richest_player.player_id)
+
+        # for p in self.game_info.remaining_players_richest:
+        for p in self.game_info.remaining_players_winning:
+            if p.has_blocked(CounterAction.BlockAssassination): continue
+
+            return (PrimaryAction.Assassinate, p.player_id)
+
+
+        # Avoiding players who historically block is important, obviously
+        # Idk whether to start applying this stuff now or waiting until the deadline approaches
+        # target_player = self.game_info.get_winning_player_without_counter(CounterAction.BlockAssassination)
+        # if target_player is not None:
+        #     return (PrimaryAction.Assassinate, target_player.player_id)
+
+        return None
+
+
+    def tax_handler(self) -> Optional[tuple[PrimaryAction, Optional[int]]]:
+        """ Tax if we hold a Duke """
+        if Character.Duke in self.game_info.own_cards:
+            return (PrimaryAction.Tax, None)
+
+        return None
+
+
+    def steal_handler(self) -> Optional[tuple[PrimaryAction, Optional[int]]]:
+        """ Steal (if we hold a Captain) from the best player worth stealing from """
+        if Character.Captain not in self.game_info.own_cards:
+            return None
+
+        # target_player = self.game_info.get_winning_player_without_counter(CounterAction.BlockStealingAsCaptain)
+        # if target_player is not None and target_player.balance >= 5:
+        #     return (PrimaryAction.Steal, target_player.player_id)
+
+
+        # for p in self.game_info.remaining_players_richest:
+        for p in self.game_info.remaining_players_winning:
+            if p.balance < self.params.steal_balance: continue
+            if p.has_blocked_steal(): continue
+
+            return (PrimaryAction.Steal, p.player_id)
+
+
+        # Maybe steal from people with >=3 who have successfully assassinated a player in the past
+        # if richest_player.balance >= 4 and 
+
+        # Steal if it gives us a coup opportunity
+        # if richest_player.balance == 1 and self.game_info.current_player.balance == 6:
+        #     return (PrimaryAction.Steal, richest_player.player_id)
+
+
+        # richest_player = self.game_info.get_richest_player()  # >=5 is best?
+
+        # # Steal if we can get 2 coins
+        # if richest_player.balance >= 5:
+        #     return (PrimaryAction.Steal, richest_player.player_id)
+
+        return None
+
+
+    # The handler of each character primary action in params.primary_priority
+    character_action_handlers = {
+        PrimaryAction.Assassinate: assassinate_handler,
+        PrimaryAction.Tax: tax_handler,
+        PrimaryAction.Steal: steal_handler,
+    }
+
+
     def counter_action_handler(self) -> CounterAction:
         action = self.game_info.get_history_primary_action()
 
@@ -327,21 +410,9 @@ class MainBot(BaseBot):
 
 
 
-        if Character.Contessa in self.game_info.own_cards:
-            return self.game_info.get_character_location(Character.Contessa)
-
-        if Character.Ambassador in self.game_info.own_cards:
-            return self.game_info.get_character_location(Character.Ambassador)
-
-        if Character.Assassin in self.game_info.own_cards:
-            return self.game_info.get_character_location(Character.Assassin)
-
-        if Character.Duke in self.game_info.own_cards:
-            return self.game_info.get_character_location(Character.Duke)
-
-        if Character.Captain in self.game_info.own_cards:
-            return self.game_info.get_character_location(Character.Captain)
-        
+        for character in self.params.discard_order:
+            if character in self.game_info.own_cards:
+                return self.game_info.get_character_location(character)
 
 
         # Initial guess: Duke, Assassin, Captain, Contessa, Ambassador
@@ -8,8 +8,12 @@ import random
 
 
 class MainBot(BaseBot):
-    def __init__(self, local_mode: int = False) -> None:
-        super(MainBot, self).__init__(local_mode=local_mode)
+    def __init__(
+        self,
+        local_mode: int = False,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        super(MainBot, self).__init__(local_mode=local_mode, rng=rng)
 
         # Tracks the cards we last put into the deck, and the turn we put them
         # in.
@@ -0,0 +1,418 @@
+from coup.bots.enums import *
+from coup.bots.bots.base_bot import BaseBot
+from coup.bots.game_info import GameInfo
+from coup.bots.bots.main_bot import MainBot
+from coup.bots.bots.examples.ambassador import ExampleAmbassador
+from coup.bots.bots.examples.assassin import ExampleAssassin
+from coup.bots.bots.examples.challenger import ExampleChallenger
+from coup.bots.bots.examples.counter import ExampleCounter
+from coup.bots.bots.examples.foreign_counter import ExampleForeignCounter
+from coup.bots.bots.examples.simple import ExampleSimple
+from coup.bots.bots.examples.submission_template import ExampleSubmissionTemplate
+from coup.engine.determinize import DeterminizationSampler
+from coup.engine.engine import Decision, Engine, EngineSnapshot, bot_answer
+from coup.engine.state import GameState, HAND_SLOTS, pack_turn
+from coup.common.rules import NUMBER_OF_PLAYERS, PRIMARY_ACTION_TO_COUNTER_ACTIONS
+
+"""END LOCAL IMPORTS"""
+
+import math
+import time
+from array import array
+from dataclasses import replace
+from typing import Any, Optional, Type
+
+
+# The class attributes of MCTSBot that with_search can change
+SEARCH_SETTINGS = (
+    'time_budget', 'iterations', 'exploration', 'switch_z', 'use_beliefs', 'rollout_bot',
+    'opponent_bots', 'sample_batch', 'default_visits',
+)
+
+
+class SearchNode:
+    """
+        One of our information sets in the search tree: everything we can see when we are asked
+        for a decision. Keeps the visits and total reward of each of our legal answers to it, and
+        which of them the default policy (the rollout bot) gives.
+    """
+
+    def __init__(self, answers: list[Any], default: int):
+        self.answers = answers
+        self.default = default
+        self.visits = [0] * len(answers)
+        self.rewards = [0.0] * len(answers)
+        self.total_visits = 0
+
+
+    def select(self, exploration: float, default_visits: int) -> int:
+        """
+            The answer to search next: the default policy's for the first default_visits visits,
+            then by UCB1, trying every answer once first
+        """
+        if self.total_visits < default_visits:
+            return self.default
+
+        for i, count in enumerate(self.visits):
+            if count == 0:
+                return i
+
+        log_visits = math.log(self.total_visits)
+        return max(
+            range(len(self.answers)),
+            key=lambda i: self.rewards[i] / self.visits[i] + exploration * math.sqrt(log_visits / self.visits[i]),
+        )
+
+
+    def update(self, i: int, reward: float) -> None:
+        self.visits[i] += 1
+        self.rewards[i] += reward
+        self.total_visits += 1
+
+
+
+class MCTSBot(MainBot):
+    """
+        Chooses primary actions by information set Monte Carlo tree search on the local engine,
+        and leaves every other decision to MainBot.
+
+        Each iteration takes a fresh deal of the hidden cards (the opponents' hands and the deck),
+        at random but consistent with our own cards and the revealed cards (see
+        DeterminizationSampler and sample_batch), and plays the game from the start of our turn.
+        Each opponent is played by a bot drawn from opponent_bots, since we do not know how they
+        play. Each of our own decisions (primary actions, challenges, counters, reveals and
+        discards) is a node of the tree, keyed by what we can see when making it (see
+        information_set), so the deals that look the same to us share it. Within the tree we pick
+        our answer by UCB1 (after default_visits visits), and one new node is added per
+        iteration, below which we play on as rollout_bot. The result of the game is then added to
+        every answer we picked.
+
+        MainBot's own choice is played unless the search finds an action that is clearly better
+        (see choose). Searching is anytime: the longer the time_budget, the deeper the tree and
+        the smaller the improvements the search can be sure of.
+
+        Only our primary actions are searched for during a game, as the search replays whole
+        turns from a snapshot taken before them. The search runs the local engine, so this bot
+        can only play locally (it is not part of the submission).
+    """
+
+    # Seconds of search per primary action
+    time_budget: float = 0.05
+
+    # If set, search this many iterations instead of for time_budget, which makes the bot
+    # reproducible from its rng
+    iterations: Optional[int] = None
+
+    # The UCB1 exploration constant of every node, for rewards between 0 and 1
+    exploration: float = 0.7
+
+    # How many standard errors better than MainBot's choice an action has to look to be played
+    # instead (see choose)
+    switch_z: float = 2.0
+
+    # Whether to deal the hidden cards weighted by what the opponents have done (see HandBeliefs),
+    # rather than only by which cards are unseen
+    use_beliefs: bool = True
+
+    # How many deals of the hidden cards to draw at once when searching for time_budget (with
+    # iterations, all of them are drawn at once). The deals of a batch are weighted against
+    # each other to undo the bias of dealing one player at a time (see DeterminizationSampler),
+    # which a batch of one cannot do.
+    sample_batch: int = 32
+
+    # How many times each node of the tree below the root gives the rollout_bot's answer before
+    # choosing by UCB1. Answers that have not been tried cannot be compared, so until a node has
+    # been visited this often, trying them all only adds noise to the nodes above.
+    default_visits: int = 10
+
+    # The bot we play out with below the tree
+    rollout_bot: Type[BaseBot] = MainBot
+
+    # The bots opponents are played out as, one drawn for each seat of each rollout. Playing
+    # them all as MainBot (which rarely challenges) makes bluffing look far safer than it is.
+    opponent_bots: tuple[Type[BaseBot], ...] = (
+        ExampleAmbassador,
+        ExampleAssassin,
+        ExampleChallenger,
+        ExampleCounter,
+        ExampleForeignCounter,
+        ExampleSimple,
+        ExampleSubmissionTemplate,
+        MainBot,
+    )
+
+
+    @classmethod
+    def with_search(cls, name: Optional[str] = None, **changes) -> "MCTSBot":
+        """
+            A subclass of this bot with the given search settings changed, e.g.
+            MCTSBot.with_search(time_budget=0.2). The name defaults to one listing the
+            changes.
+        """
+        for key in changes:
+            if key not in SEARCH_SETTINGS:
+                raise ValueError(f'Unknown search setting {key}')
+
+        if name is None:
+            settings = ", ".join(
+                f"{k}={v.__name__ if isinstance(v, type) else v}" for k, v in changes.items()
+            )
+            name = f'{cls.__name__}({settings})'
+
+        bot_class = cls.as_name(name)
+        for key, value in changes.items():
+            setattr(bot_class, key, value)
+        return bot_class
+
+
+    def primary_action_handler(self) -> tuple[PrimaryAction, Optional[int]]:
+        actions = self.candidate_actions(self.game_info)
+        if len(actions) == 1:
+            return actions[0]
+
+        default_action = MainBot.primary_action_handler(self)
+        if default_action not in actions:
+            actions.append(default_action)
+
+        snapshot = self.public_state()
+        sampler = DeterminizationSampler(
+            snapshot,
+            self.game_info.player_id,
+            self.game_info.hand_beliefs if self.use_beliefs else None,
+        )
+
+        root = SearchNode(actions, actions.index(default_action))
+        tree: dict[tuple, SearchNode] = {}
+
+        batch = self.iterations if self.iterations is not None else self.sample_batch
+        samples: list[EngineSnapshot] = []
+
+        deadline = time.perf_counter() + self.time_budget
+        iteration = 0
+        while True:
+            if self.iterations is not None:
+                if iteration >= self.iterations:
+                    break
+            elif iteration >= len(actions) and time.perf_counter() >= deadline:
+                break
+
+            if not samples:
+                samples = sampler.sample(self.rng, batch)
+                samples.reverse()
+            self.iterate(self.determinize(samples.pop()), root, tree)
+            iteration += 1
+
+        return actions[self.choose(actions.index(default_action), root.visits, root.rewards)]
+
+
+    def iterate(self, snapshot: EngineSnapshot, root: SearchNode, tree: dict[tuple, SearchNode]) -> None:
+        """
+            One iteration of the search on a determinized game: descends the tree from the root
+            (our primary action) by UCB1, adds the first of our information sets that is not yet
+            in it, plays the rest of the game out and adds our reward to every answer picked.
+        """
+        engine = Engine.from_snapshot(snapshot, seed=self.rng.getrandbits(64))
+        player_id = self.game_info.player_id
+
+        # The nodes we picked an answer at, and the index of the answer
+        path: list[tuple[SearchNode, int]] = []
+        in_tree = True
+
+        steps = engine.steps()
+        try:
+            decision = next(steps)
+            while True:
+                if decision.player_id == player_id and in_tree:
+                    if not path:
+                        node = root
+                    else:
+                        key = self.information_set(engine, snapshot, decision)
+                        node = tree.get(key)
+                        if node is None:
+                            node = tree[key] = self.new_node(engine, decision)
+                            in_tree = False
+
+                    i = node.select(self.exploration, 0 if node is root else self.default_visits)
+                    path.append((node, i))
+                    answer = node.answers[i]
+                elif not decision.game_info.own_cards:
+                    # A player who lost their last card this turn is still asked to counter, and
+                    # bots such as MainBot then block an assassination they could not defend
+                    answer = self.legal_answers(decision)[0]
+                else:
+                    answer = bot_answer(engine.players[decision.player_id].bot, decision)
+
+                decision = steps.send(answer)
+        except StopIteration:
+            pass
+
+        reward = self.reward(engine)
+        for node, i in path:
+            node.update(i, reward)
+
+
+    def new_node(self, engine: Engine, decision: Decision) -> SearchNode:
+        """ The node of one of our decisions in a search, the first time it is reached """
+        answers = self.legal_answers(decision)
+        if len(answers) == 1:
+            return SearchNode(answers, 0)
+
+        default_answer = bot_answer(engine.players[decision.player_id].bot, decision)
+        if default_answer not in answers:
+            answers.append(default_answer)
+
+        return SearchNode(answers, answers.index(default_answer))
+
+
+    def information_set(self, engine: Engine, snapshot: EngineSnapshot, decision: Decision) -> tuple:
+        """
+            What we can see when asked for a decision in a search, as a key of its tree: what is
+            being asked, the public history and reveals since the root, and our hand (in order,
+            as reveals and discards are answered by its index).
+        """
+        state = engine.state
+        return (
+            decision.requested_move,
+            tuple(state.history[snapshot.turn:]),
+            tuple(state.reveals[len(snapshot.state.reveals):]),
+            state.hand(decision.player_id),
+        )
+
+
+    def legal_answers(self, decision: Decision) -> list[Any]:
+        """ Every answer we could give to a decision in a search """
+        game_info = decision.game_info
+        requested_move = decision.requested_move
+
+        if requested_move == RequestedMove.PrimaryAction:
+            return self.candidate_actions(game_info)
+
+        # We can still be asked to challenge or counter in the turn we lose our last card, and
+        # then only pass
+        if requested_move == RequestedMove.ChallengeAction:
+            if not game_info.own_cards:
+                return [ChallengeAction.NoChallenge]
+            return list(ChallengeAction)
+
+        if requested_move == RequestedMove.CounterAction:
+            if not game_info.own_cards:
+                return [CounterAction.NoCounterAction]
+            primary_action = game_info.history[-1][ActionType.PrimaryAction].action
+            return [
+                CounterAction.NoCounterAction,
+                *sorted(PRIMARY_ACTION_TO_COUNTER_ACTIONS[primary_action]),
+            ]
+
+        # A card to reveal or discard, which only matters up to which character it is
+        own_cards = game_info.own_cards
+        return [own_cards.index(card) for card in dict.fromkeys(own_cards)]
+
+
+    def candidate_actions(self, game_info: GameInfo) -> list[tuple[PrimaryAction, Optional[int]]]:
+        """ Every legal primary action of the current player, whatever their cards """
+        balance = game_info.current_player.balance
+        targets = [p.player_id for p in game_info.remaining_players]
+
+        # The rules force a Coup at 10 coins
+        if balance >= 10:
+            return [(PrimaryAction.Coup, t) for t in targets]
+
+        actions: list[tuple[PrimaryAction, Optional[int]]] = [
+            (PrimaryAction.Income, None),
+            (PrimaryAction.ForeignAid, None),
+            (PrimaryAction.Tax, None),
+            (PrimaryAction.Exchange, None),
+        ]
+        actions += [(PrimaryAction.Steal, t) for t in targets if game_info.balances[t] > 0]
+        if balance >= 3:
+            actions += [(PrimaryAction.Assassinate, t) for t in targets]
+        if balance >= 7:
+            actions += [(PrimaryAction.Coup, t) for t in targets]
+        return actions
+
+
+    def choose(self, default: int, visits: list[int], rewards: list[float]) -> int:
+        """
+            The action with the best mean reward, but only if it beats the default (MainBot's
+            choice) by more than switch_z standard errors. Otherwise the default, since with few
+            rollouts the best mean is mostly noise, and MainBot is a strong prior.
+        """
+        means = [r / n if n else 0.0 for r, n in zip(rewards, visits)]
+        best = max(range(len(visits)), key=lambda i: (means[i], visits[i]))
+        if best == default or visits[default] == 0:
+            return best
+
+        def variance(i: int) -> float:
+            return means[i] * (1 - means[i]) / visits[i]
+
+        standard_error = math.sqrt(variance(best) + variance(default))
+        if means[best] - means[default] > self.switch_z * standard_error:
+            return best
+        return default
+
+
+    def public_state(self) -> EngineSnapshot:
+        """
+            A snapshot of what we can see of the game, at the start of our turn. Only the hands of
+            the other players and the deck are unknown, they are left empty to be filled in by a
+            DeterminizationSampler.
+        """
+        game_info = self.game_info
+
+        # The last turn of the history is the one we are about to play
+        history = game_info.history[:-1]
+
+        state = GameState()
+        state.balances = array('H', game_info.balances)
+        state.cards_num = array('B', game_info.players_cards_num)
+        state.revealed = array('B', [game_info.revealed_cards.get(c, 0) for c in sorted(Character)])
+        state.history = array('Q', (pack_turn(turn) for turn in history))
+        if game_info.reveal_log is not None:
+            state.reveals = array('I', game_info.reveal_log)
+
+        own_start = game_info.player_id * HAND_SLOTS
+        for i, card in enumerate(game_info.own_cards):
+            state.hands[own_start + i] = card
+
+        # Every seat of a rollout carries on from our index and beliefs (Engine.from_snapshot
+        # copies them), rather than going through the whole history again. Our beliefs are only
+        # missing what the opponents know of our own hand, which their bots do not use.
+        history_index = game_info.history_index
+        hand_beliefs = game_info.hand_beliefs
+        return EngineSnapshot(
+            bot_classes=[self.rollout_bot] * NUMBER_OF_PLAYERS,
+            state=state,
+            history=history,
+            history_indexes=[history_index] * NUMBER_OF_PLAYERS,
+            hand_beliefs=[hand_beliefs] * NUMBER_OF_PLAYERS,
+            turn=len(history),
+            primary_player_id=game_info.player_id,
+            eliminated_player_ids=[p.player_id for p in game_info.players if p.dead],
+            complete=False,
+            deck_random_state=None,
+            bot_random_states=None,
+        )
+
+
+    def determinize(self, snapshot: EngineSnapshot) -> EngineSnapshot:
+        """
+            A game consistent with everything we know, from a snapshot with the hidden cards dealt
+            by a DeterminizationSampler, with a bot drawn to play each opponent.
+        """
+        bot_classes = [
+            self.rollout_bot if player_id == self.game_info.player_id else self.rng.choice(self.opponent_bots)
+            for player_id in range(NUMBER_OF_PLAYERS)
+        ]
+        return replace(snapshot, bot_classes=bot_classes)
+
+
+    def reward(self, engine: Engine) -> float:
+        """ Our reward for a complete game: 1 for a win, a share of 1 for a tie we are part of, otherwise 0 """
+        player_id = self.game_info.player_id
+
+        if engine.tied:
+            if engine.state.cards_num[player_id] == 0:
+                return 0.0
+            return 1 / len(engine.remaining_players)
+
+        return 1.0 if engine.winner.player_id == player_id else 0.0
@@ -32,7 +32,7 @@ class OpponentBot(BaseBot):
             #     return (PrimaryAction.Coup, richest_player.player_id)
 
 
-            if random.random() < 0.5:
+            if self.rng.random() < 0.5:
                 target_player = self.game_info.get_winning_player()
             else:
                 target_player = self.game_info.get_richest_player()
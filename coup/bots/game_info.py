@@ -1,11 +1,14 @@
 from coup.bots.enums import *
 from coup.bots.action import Action
+from coup.bots.history_index import HistoryIndex
+from coup.bots.belief import HandBeliefs
+from coup.bots.history_decoder import HistoryDecoder, decode_turn
 from coup.common.rules import *
 
 
 """END LOCAL IMPORTS"""
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 from dataclasses import dataclass
 
 
@@ -16,7 +19,7 @@ class Player:
         balance: int,
         card_num: int,
         is_current: bool,
-        game_info: "GameInfo",
+        game_info: Optional["GameInfo"] = None,
     ):
         self.player_id = player_id
         self.balance = balance
@@ -35,6 +38,10 @@ class Player:
         return self.card_num == 0
 
     def __repr__(self) -> str:
+        # A player outside of a game (such as in a game tree) has no history
+        if self.game_info is None:
+            return f"<Plyr id={self.player_id} bal={self.balance} cn={self.card_num}>"
+
         return f"<Plyr id={self.player_id} bal={self.balance} \
 cn={self.card_num} k={self.kill_count} blk_s={self.has_blocked_steal()}>"
 
@@ -43,28 +50,17 @@ cn={self.card_num} k={self.kill_count} blk_s={self.has_blocked_steal()}>"
         """
             Returns whether the player has historically performed a given counter action.
         """
-        for h in self.game_info.history[:-1]:
-            # Skip if no counteraction
-            if ActionType.CounterAction not in h: continue
-            counter_action = h[ActionType.CounterAction]
-
-            # Skip if wrong type
-            if counter_action.action != counter_action_type: continue 
+        history_index = self.game_info.history_index
 
-            # Skip if not successful
-            if counter_action.successful == False: continue
+        if history_index.counters[self.player_id][counter_action_type] == 0:
+            return False
 
-            # Skip if it was a different player
-            if counter_action.player_id != self.player_id: continue
-
-            # Return False if most recent successful counter action was challenged
-            # This means they lost the card, so we should assume they don't have it anymore
-            if check_challenge and ActionType.ChallengeCounterAction in h:
-                return False
-
-            return True
+        # Return False if the first successful counter action was challenged
+        # This means they lost the card, so we should assume they don't have it anymore
+        if check_challenge and history_index.first_counter_challenged[self.player_id][counter_action_type]:
+            return False
 
-        return False
+        return True
 
 
     def has_blocked_steal(self) -> bool:
@@ -79,18 +75,35 @@ cn={self.card_num} k={self.kill_count} blk_s={self.has_blocked_steal()}>"
     @property
     def kill_count(self) -> int:
         """ Returns the number of times a player has primary killed with assassination or coup """
-        k = 0
+        return self.game_info.history_index.kills[self.player_id]
 
-        for h in self.game_info.history[:-1]:
-            primary_action = h[ActionType.PrimaryAction]
 
-            if primary_action.successful == False: continue
-            if primary_action.player_id != self.player_id: continue
 
-            if primary_action.action in [PrimaryAction.Coup, PrimaryAction.Assassinate]:
-                k += 1
+class PlayerView(Player):
+    """
+        A player of a GameInfo, whose balance and card count are read through to the GameInfo
+        rather than stored, so that the local engine can update one GameInfo in place.
+    """
 
-        return k
+    def __init__(
+        self,
+        player_id: int,
+        is_current: bool,
+        game_info: "GameInfo",
+    ):
+        self.player_id = player_id
+
+        self.is_current = is_current
+
+        self.game_info = game_info
+
+    @property
+    def balance(self) -> int:
+        return self.game_info.balances[self.player_id]
+
+    @property
+    def card_num(self) -> int:
+        return self.game_info.players_cards_num[self.player_id]
 
 
 
@@ -101,15 +114,21 @@ class GameInfo:
         self,
         requested_move: RequestedMove,
         player_id: int,
-        balances: list[int],
+        balances: Sequence[int],
         own_cards: list[Character],
-        players_cards_num: list[int],
+        players_cards_num: Sequence[int],
         revealed_cards: dict[Character, int],
         history: list[dict[ActionType, Action]],
         current_primary_player_id: int,
+        history_index: Optional[HistoryIndex] = None,
+        hand_beliefs: Optional[HandBeliefs] = None,
+        reveal_log: Optional[Sequence[int]] = None,
     ) -> None:
         self.requested_move = requested_move
         self.player_id = player_id
+
+        # Lists from the competition engine, but arrays that the local engine updates in place
+        # (see GameState), so only index or iterate over these
         self.balances = balances
         self.own_cards = own_cards
         self.players_cards_num = players_cards_num
@@ -117,23 +136,36 @@ class GameInfo:
         self.history = history
         self.current_primary_player_id = current_primary_player_id
 
+        # Who revealed each revealed card, in order (see belief.pack_reveal). Only the local
+        # engine knows this, the competition engine only sends the revealed_cards counts.
+        self.reveal_log = reveal_log
+
+        # Only valid for this history, use the history_index property which brings it up to date
+        self._history_index = history_index if history_index is not None else HistoryIndex()
+        self._hand_beliefs = hand_beliefs if hand_beliefs is not None else HandBeliefs()
+
         self.players = []
         for i in range(GameInfo.PLAYER_NUM):
-            p = Player(
+            p = PlayerView(
                 player_id = i,
-                balance = self.balances[i],
-                card_num = self.players_cards_num[i],
                 is_current = (i==self.player_id),
                 game_info = self,
             )
             self.players.append(p)
 
         self.current_player = self.players[self.player_id]
-        self.current_primary_player = self.players[self.current_primary_player_id]
+
+    @property
+    def current_primary_player(self) -> Player:
+        return self.players[self.current_primary_player_id]
 
 
     @staticmethod
-    def from_dictionary(dict) -> 'GameInfo':
+    def from_dictionary(dict, history_decoder: Optional[HistoryDecoder] = None) -> 'GameInfo':
+        """
+            Decodes a message from the engine. With a history_decoder that was given the previous
+            messages of the game, only the new turns of the history are decoded.
+        """
         # The move currently requested from you.
         requested_move: RequestedMove = RequestedMove(int(dict['requested_move']))
 
@@ -161,13 +193,21 @@ class GameInfo:
 
         # A list of turns. Each turn is a dictionary keyed by the action type in that turn.
         # The value is an Action which contains the move made & all relevant information.
-        history: List[Dict[ActionType, Action]] = [{ActionType(int(move['action_type'])):Action.from_dictionary(move['action']) for move in turn['turn']} for turn in dict['history']]
+        history: List[Dict[ActionType, Action]]
+        history_index: Optional[HistoryIndex] = None
+        hand_beliefs: Optional[HandBeliefs] = None
+        if history_decoder is not None:
+            history = history_decoder.decode(dict['history'], players_cards_num)
+            history_index = history_decoder.history_index
+            hand_beliefs = history_decoder.hand_beliefs
+        else:
+            history = [decode_turn(turn) for turn in dict['history']]
 
         # An integer representing the player who played/is playing the current
         # primary action. Note: this can be you. 
         current_primary_player_id: int = int(dict['current_primary_player'])
 
-        return GameInfo(
+        game_info = GameInfo(
             requested_move=requested_move,
             player_id=player_id,
             balances=balances,
@@ -176,8 +216,49 @@ class GameInfo:
             revealed_cards=revealed_cards,
             history=history,
             current_primary_player_id=current_primary_player_id,
+            history_index=history_index,
+            hand_beliefs=hand_beliefs,
         )
 
+        # Without a reveal log, who revealed a card is worked out from the revealed cards of
+        # successive messages, so take in every message as it comes
+        if hand_beliefs is not None:
+            hand_beliefs.update(game_info)
+
+        return game_info
+
+
+    def to_dictionary(self) -> dict:
+        """ The inverse of from_dictionary, as the engine sends it """
+        return {
+            'requested_move': int(self.requested_move),
+            'player_id': self.player_id,
+            'balances': list(self.balances),
+            'own_cards': [int(c) for c in self.own_cards],
+            'players_cards_num': list(self.players_cards_num),
+            'revealed_cards': {str(int(c)): num for c, num in self.revealed_cards.items()},
+            'history': [
+                {'turn': [
+                    {'action_type': int(action_type), 'action': action.to_dictionary()}
+                    for action_type, action in turn.items()
+                ]}
+                for turn in self.history
+            ],
+            'current_primary_player': self.current_primary_player_id,
+        }
+
+
+    @property
+    def history_index(self) -> HistoryIndex:
+        """ The HistoryIndex of the completed turns of the history """
+        self._history_index.update(self.history)
+        return self._history_index
+
+    @property
+    def hand_beliefs(self) -> HandBeliefs:
+        """ The HandBeliefs of what we have seen of the game so far """
+        self._hand_beliefs.update(self)
+        return self._hand_beliefs
 
     @property
     def turn(self) -> int:
@@ -281,29 +362,21 @@ class GameInfo:
 
             Useful if we want to check, for example, whether any other player is willing to block ForeignAid.
         """
-        for h in self.history[:-1]:
-            # Skip if no counteraction
-            if ActionType.CounterAction not in h: continue 
-
-            counter_action = h[ActionType.CounterAction]
-
-            # Skip it wrong type
-            if counter_action.action != counter_action_type: continue 
-
-            # Skip if not successful
-            if counter_action.successful == False: continue
+        counters = self.history_index.counters
 
+        for p in self.players:
             # Skip if it was us
-            if counter_action.player_id == self.player_id: continue
+            if p.player_id == self.player_id: continue
 
             # Skip if not specified target player
-            if player_id is not None and counter_action.player_id != player_id: continue
+            if player_id is not None and p.player_id != player_id: continue
 
             # Exclude counters from eliminated players
-            if alive and self.players[counter_action.player_id].dead: continue
+            if alive and p.dead: continue
+
+            if counters[p.player_id][counter_action_type] > 0:
+                return True
 
-            return True
-        
         return False
 
 
@@ -377,9 +450,5 @@ class GameInfo:
         if action.player_id == self.current_player.player_id:
             raise Exception("We made the move???")
 
-        # Check known cards to determine whether they are certainly lying
-        known_cards = self.known_cards
-        if action_card in known_cards and known_cards[action_card] == 3:
-            return True
-
-        return False
+        # Certainly lying if every card of the claim is known to be elsewhere
+        return self.hand_beliefs.certainly_lacks(action_card)
@@ -0,0 +1,88 @@
+from coup.bots.enums import *
+from coup.bots.action import Action
+from coup.bots.history_index import HistoryIndex
+from coup.bots.belief import HandBeliefs
+
+"""END LOCAL IMPORTS"""
+
+from typing import Optional, Sequence
+
+
+def decode_turn(turn: dict) -> dict[ActionType, Action]:
+    """ Decodes one turn of a history as sent by the engine """
+    return {
+        ActionType(int(move['action_type'])): Action.from_dictionary(move['action'])
+        for move in turn['turn']
+    }
+
+
+class HistoryDecoder:
+    """
+        Decodes the history of successive messages of a game, reusing what it decoded last time.
+
+        Every message carries the whole history, but only its last turn (the one being played)
+        can have changed since the previous message. So as long as the completed turns of the
+        previous message are still at the start of the history, their decoded turns (and the
+        HistoryIndex and HandBeliefs over them) are kept and only the turns after them are decoded.
+
+        Anything else starts the decoding again: a history that is shorter than the last one, one
+        whose completed turns differ, or the first turn of a game with every player on two cards
+        (a new game, even if the last game ended before any turn was completed).
+    """
+
+    def __init__(self) -> None:
+        # The raw completed turns of the last history decoded, and their decoded turns
+        self._raw_turns: list[dict] = []
+        self._turns: list[dict[ActionType, Action]] = []
+
+        # The number of turns in the last history, completed or not
+        self._length = 0
+
+        self.history_index: Optional[HistoryIndex] = None
+        self.hand_beliefs: Optional[HandBeliefs] = None
+
+
+    def decode(
+        self,
+        raw_history: list[dict],
+        players_cards_num: Optional[Sequence[int]] = None,
+    ) -> list[dict[ActionType, Action]]:
+        """
+            Returns the decoded history. It is a new list each time, but the completed turns in
+            it are the same objects as in the previous histories of the game.
+
+            With the players_cards_num of the message, the first turn of a new game is told apart
+            from the first turn of the last game, so nothing is carried over between games.
+        """
+        reused = len(self._raw_turns)
+
+        new_game = (
+            players_cards_num is not None
+            and len(raw_history) <= 1
+            and all(cards_num == 2 for cards_num in players_cards_num)
+        )
+
+        # Comparing the raw turns is far cheaper than decoding them again
+        if (
+            self.history_index is None
+            or new_game
+            or len(raw_history) < self._length
+            or raw_history[:reused] != self._raw_turns
+        ):
+            reused = 0
+            self._raw_turns = []
+            self._turns = []
+            self.history_index = HistoryIndex()
+            self.hand_beliefs = HandBeliefs()
+
+        # All but the last turn are complete, and will not change again in this game
+        completed = max(len(raw_history) - 1, 0)
+        for turn in raw_history[reused:completed]:
+            self._turns.append(decode_turn(turn))
+        self._raw_turns.extend(raw_history[reused:completed])
+        self._length = len(raw_history)
+
+        history = self._turns[:]
+        if raw_history:
+            history.append(decode_turn(raw_history[-1]))
+        return history
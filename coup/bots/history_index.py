@@ -0,0 +1,110 @@
+from coup.bots.enums import *
+from coup.bots.action import Action
+
+"""END LOCAL IMPORTS"""
+
+from typing import Optional
+
+
+class HistoryIndex:
+    """
+        Per-player totals over the completed turns of a game history.
+
+        The index is updated incrementally, so as long as it is kept with the same (append only)
+        history list each turn is only ever looked at once. The last turn of the history is the
+        one currently being played, so it is never indexed.
+    """
+
+    def __init__(self, player_num: int = 5) -> None:
+        # Number of turns from the start of the history that have been indexed
+        self.indexed_turns = 0
+
+        # Number of successful counter actions of each type, indexed [player_id][CounterAction]
+        self.counters: list[list[int]] = [[0] * len(CounterAction) for _ in range(player_num)]
+
+        # Whether the first successful counter of each type was challenged, indexed as counters
+        self.first_counter_challenged: list[list[bool]] = [
+            [False] * len(CounterAction) for _ in range(player_num)
+        ]
+
+        # Number of successful Coups and Assassinations made
+        self.kills: list[int] = [0] * player_num
+
+        # Number of challenges won and lost, both as the challenger and as the challenged player
+        self.challenges_won: list[int] = [0] * player_num
+        self.challenges_lost: list[int] = [0] * player_num
+
+        # The last turn in which cards were returned to the deck (an Exchange, or a challenge
+        # that was defended), or None if the deck is unchanged since the deal
+        self.last_deck_change_turn: Optional[int] = None
+
+
+    def copy(self) -> "HistoryIndex":
+        """ An independent copy, to carry on indexing a copy of the same history """
+        history_index = HistoryIndex.__new__(HistoryIndex)
+        history_index.indexed_turns = self.indexed_turns
+        history_index.counters = [counters[:] for counters in self.counters]
+        history_index.first_counter_challenged = [
+            challenged[:] for challenged in self.first_counter_challenged
+        ]
+        history_index.kills = self.kills[:]
+        history_index.challenges_won = self.challenges_won[:]
+        history_index.challenges_lost = self.challenges_lost[:]
+        history_index.last_deck_change_turn = self.last_deck_change_turn
+        return history_index
+
+
+    def update(self, history: list[dict[ActionType, Action]]) -> None:
+        """ Indexes any turns that have been completed since the last update """
+        completed_turns = len(history) - 1
+        for turn in range(self.indexed_turns, completed_turns):
+            self._index_turn(turn, history[turn])
+
+        self.indexed_turns = max(self.indexed_turns, completed_turns)
+
+
+    def _index_turn(self, turn: int, h: dict[ActionType, Action]) -> None:
+        primary_action = h[ActionType.PrimaryAction]
+
+        if primary_action.successful != False:
+            if primary_action.action in (PrimaryAction.Coup, PrimaryAction.Assassinate):
+                self.kills[primary_action.player_id] += 1
+
+        deck_changed = primary_action.action == PrimaryAction.Exchange and primary_action.successful
+
+        if ActionType.ChallengePrimaryAction in h:
+            challenge = h[ActionType.ChallengePrimaryAction]
+            self._index_challenge(challenge, primary_action.player_id)
+            deck_changed = deck_changed or not challenge.successful
+
+        if ActionType.CounterAction in h:
+            counter_action = h[ActionType.CounterAction]
+
+            if counter_action.successful != False:
+                player_counters = self.counters[counter_action.player_id]
+                if player_counters[counter_action.action] == 0:
+                    self.first_counter_challenged[counter_action.player_id][counter_action.action] = (
+                        ActionType.ChallengeCounterAction in h
+                    )
+                player_counters[counter_action.action] += 1
+
+            if ActionType.ChallengeCounterAction in h:
+                challenge = h[ActionType.ChallengeCounterAction]
+                self._index_challenge(challenge, counter_action.player_id)
+                deck_changed = deck_changed or not challenge.successful
+
+        if deck_changed:
+            self.last_deck_change_turn = turn
+
+
+    def _index_challenge(self, challenge: Action, challenged_player_id: int) -> None:
+        if challenge.successful is None:
+            return
+
+        if challenge.successful:
+            winner, loser = challenge.player_id, challenged_player_id
+        else:
+            winner, loser = challenged_player_id, challenge.player_id
+
+        self.challenges_won[winner] += 1
+        self.challenges_lost[loser] += 1
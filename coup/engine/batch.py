@@ -0,0 +1,373 @@
+import numpy as np
+from typing import Callable, Optional, Type
+
+from coup.bots.bots.base_bot import BaseBot
+from coup.bots.bots.foreign_aid_bot import ForeignAidBot
+from coup.bots.bots.primary_action_bot import PrimaryActionBot
+from coup.bots.bots.examples.simple import ExampleSimple
+from coup.bots.bots.examples.submission_template import ExampleSubmissionTemplate
+from coup.bots.enums import Character, PrimaryAction
+
+from coup.common.rules import (
+    NUMBER_OF_PLAYERS, NUMBER_OF_EACH_CARD_IN_DECK, PRIMARY_ACTION_TO_COST
+)
+
+from coup.engine.engine import Engine
+
+
+NO_TARGET = -1
+
+# An array of the cost of each PrimaryAction, indexed by its value.
+_COSTS = np.zeros(max(PrimaryAction) + 1, dtype=np.int32)
+for _action, _cost in PRIMARY_ACTION_TO_COST.items():
+    _COSTS[_action] = _cost
+
+
+class BatchState:
+    """
+    The state of N games, advanced together by a BatchEngine.
+
+    - balances (N, 5): the coins of each player.
+    - hands (N, 5, 2): the Character values in each hand, 0 for no card.
+    - cards_num (N, 5): the number of cards in each hand.
+    - deck (N, 5): the number of each Character left in the deck (at index
+      value - 1).
+    - revealed (N, 5): the number of each Character revealed.
+    """
+
+    def __init__(self, hands: np.ndarray) -> None:
+        game_count = hands.shape[0]
+
+        self.hands = hands.astype(np.int8)
+        self.cards_num = (self.hands != 0).sum(axis=2).astype(np.int8)
+        self.balances = np.full((game_count, NUMBER_OF_PLAYERS), 2, np.int32)
+
+        dealt = np.stack(
+            [(self.hands == c).sum(axis=(1, 2)) for c in Character], axis=1
+        )
+        self.deck = (NUMBER_OF_EACH_CARD_IN_DECK - dealt).astype(np.int8)
+        self.revealed = np.zeros((game_count, len(Character)), np.int8)
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self.cards_num > 0
+
+
+# A batch policy is given the state, the games (rows) to decide for and the
+# primary player of each, and returns the PrimaryAction value and target of
+# each (NO_TARGET for none).
+BatchPolicy = Callable[
+    [BatchState, np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray]
+]
+
+
+def _holds(state: BatchState, rows: np.ndarray, players: np.ndarray, character: Character) -> np.ndarray:
+    return (state.hands[rows, players] == character).any(axis=1)
+
+
+def _next_alive_player(state: BatchState, rows: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """ As GameInfo.get_next_alive_player """
+    seats = (players[:, None] + np.arange(1, NUMBER_OF_PLAYERS)) % NUMBER_OF_PLAYERS
+    alive = state.cards_num[rows[:, None], seats] > 0
+    return seats[np.arange(len(rows)), alive.argmax(axis=1)]
+
+
+def _others_alive(state: BatchState, rows: np.ndarray, players: np.ndarray) -> np.ndarray:
+    others = state.cards_num[rows] > 0
+    others[np.arange(len(rows)), players] = False
+    return others
+
+
+def _winning_player(state: BatchState, rows: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """
+    As GameInfo.get_winning_player, the first (in player order) of the other
+    alive players with the most cards, and then the most coins.
+    """
+    score = state.cards_num[rows].astype(np.int64) * 1_000_000 + state.balances[rows]
+    score[~_others_alive(state, rows, players)] = -1
+    return score.argmax(axis=1)
+
+
+def _richest_player(state: BatchState, rows: np.ndarray, players: np.ndarray) -> np.ndarray:
+    """ As GameInfo.get_richest_player """
+    score = state.balances[rows].astype(np.int64)
+    score[~_others_alive(state, rows, players)] = -1
+    return score.argmax(axis=1)
+
+
+def _coup_or(
+    state: BatchState,
+    rows: np.ndarray,
+    players: np.ndarray,
+    coup_target: np.ndarray,
+    action: np.ndarray,
+    target: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """ Overrides the given actions with a Coup on coup_target at 7 or more coins """
+    coup = state.balances[rows, players] >= 7
+    action = np.where(coup, PrimaryAction.Coup, action)
+    target = np.where(coup, coup_target, target)
+    return action, target
+
+
+def base_policy(state: BatchState, rows: np.ndarray, players: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ BaseBot and ExampleSubmissionTemplate """
+    action = np.full(len(rows), PrimaryAction.Income)
+    target = np.full(len(rows), NO_TARGET)
+    return _coup_or(
+        state, rows, players, _next_alive_player(state, rows, players), action, target
+    )
+
+
+def foreign_aid_policy(state: BatchState, rows: np.ndarray, players: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ForeignAidBot. None of the batch bots ever block, so ForeignAid is never
+    historically countered and is always chosen.
+    """
+    action = np.full(len(rows), PrimaryAction.ForeignAid)
+    target = np.full(len(rows), NO_TARGET)
+    return _coup_or(
+        state, rows, players, _next_alive_player(state, rows, players), action, target
+    )
+
+
+def simple_policy(state: BatchState, rows: np.ndarray, players: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ ExampleSimple """
+    next_alive = _next_alive_player(state, rows, players)
+
+    assassinate = (
+        _holds(state, rows, players, Character.Assassin)
+        & (state.balances[rows, players] >= 3)
+    )
+    action = np.where(assassinate, PrimaryAction.Assassinate, PrimaryAction.Income)
+    target = np.where(assassinate, next_alive, NO_TARGET)
+
+    tax = _holds(state, rows, players, Character.Duke)
+    action = np.where(tax, PrimaryAction.Tax, action)
+    target = np.where(tax, NO_TARGET, target)
+
+    return _coup_or(state, rows, players, next_alive, action, target)
+
+
+def primary_action_policy(state: BatchState, rows: np.ndarray, players: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ PrimaryActionBot """
+    balances = state.balances[rows, players]
+    winning = _winning_player(state, rows, players)
+    richest = _richest_player(state, rows, players)
+
+    # Applied from the lowest priority to the highest.
+    action = np.full(len(rows), PrimaryAction.Income)
+    target = np.full(len(rows), NO_TARGET)
+
+    steal = (
+        _holds(state, rows, players, Character.Captain)
+        & (state.balances[rows, richest] > 0)
+    )
+    action = np.where(steal, PrimaryAction.Steal, action)
+    target = np.where(steal, richest, target)
+
+    assassinate = _holds(state, rows, players, Character.Assassin) & (balances >= 3)
+    action = np.where(assassinate, PrimaryAction.Assassinate, action)
+    target = np.where(assassinate, winning, target)
+
+    tax = _holds(state, rows, players, Character.Duke)
+    action = np.where(tax, PrimaryAction.Tax, action)
+    target = np.where(tax, NO_TARGET, target)
+
+    return _coup_or(state, rows, players, winning, action, target)
+
+
+# The bots that can be simulated in a batch. All of them only ever pick a
+# primary action: they never counter or challenge, and always discard their
+# first card, which is what makes them cheap to vectorise.
+BATCH_POLICIES: dict[Type[BaseBot], BatchPolicy] = {
+    BaseBot: base_policy,
+    ExampleSubmissionTemplate: base_policy,
+    ForeignAidBot: foreign_aid_policy,
+    ExampleSimple: simple_policy,
+    PrimaryActionBot: primary_action_policy,
+}
+
+
+class BatchEngine:
+    """
+    Plays N games between bots from BATCH_POLICIES in lockstep, with the
+    rules applied as masked array operations. The results match those of
+    Engine on the same deals, at a tiny fraction of the cost per game, so it
+    is useful for screening changes before running the full engine.
+    """
+
+    def __init__(
+        self,
+        bot_classes: list[Type[BaseBot]],
+        game_count: int,
+        shuffle_players: bool = False,
+        seed: Optional[int] = None,
+        hands: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Each game is dealt randomly from the seed unless the hands (N, 5, 2)
+        are given. With shuffle_players each game gets its own random seating
+        of bot_classes, otherwise every game seats them in order.
+        """
+
+        if len(bot_classes) != NUMBER_OF_PLAYERS:
+            raise ValueError(
+                f'Requires {NUMBER_OF_PLAYERS} competitors got '
+                f'{len(bot_classes)}'
+            )
+
+        for bot_class in bot_classes:
+            if bot_class not in BATCH_POLICIES:
+                raise ValueError(f'{bot_class.__name__} has no batch policy')
+
+        self.bot_classes = bot_classes
+        self.game_count = game_count
+
+        rng = np.random.default_rng(seed)
+
+        if hands is None:
+            deck = np.repeat(
+                np.array([int(c) for c in Character], np.int8),
+                NUMBER_OF_EACH_CARD_IN_DECK,
+            )
+            decks = rng.permuted(np.tile(deck, (game_count, 1)), axis=1)
+            hands = decks[:, :2 * NUMBER_OF_PLAYERS].reshape(
+                game_count, NUMBER_OF_PLAYERS, 2
+            )
+
+        self.state = BatchState(hands)
+
+        # The index into bot_classes of the bot in each seat of each game.
+        self.seat_bots = np.tile(
+            np.arange(NUMBER_OF_PLAYERS), (game_count, 1)
+        )
+        if shuffle_players:
+            self.seat_bots = rng.permuted(self.seat_bots, axis=1)
+
+        # The final turn of each game, as Engine.turn.
+        self.turns = np.zeros(game_count, np.int32)
+
+        # The order in which players were eliminated (0 first), -1 if never.
+        self.elimination_order = np.full(
+            (game_count, NUMBER_OF_PLAYERS), -1, np.int8
+        )
+
+        self.complete = False
+
+    def run(self) -> None:
+        state = self.state
+        game_count = self.game_count
+        policies = [BATCH_POLICIES[bot_class] for bot_class in self.bot_classes]
+
+        primary_players = np.zeros(game_count, np.int64)
+        alive_count = np.full(game_count, NUMBER_OF_PLAYERS)
+        running = np.arange(game_count)
+
+        for turn in range(Engine.TIMEOUT_TURN):
+            rows = running
+            players = primary_players[rows]
+            self.turns[rows] = turn
+
+            action = np.empty(len(rows), np.int64)
+            target = np.empty(len(rows), np.int64)
+            seat_bots = self.seat_bots[rows, players]
+            for bot_index, policy in enumerate(policies):
+                deciding = seat_bots == bot_index
+                if not deciding.any():
+                    continue
+                action[deciding], target[deciding] = policy(
+                    state, rows[deciding], players[deciding]
+                )
+
+            state.balances[rows, players] -= _COSTS[action]
+
+            for primary_action, gain in (
+                (PrimaryAction.Income, 1),
+                (PrimaryAction.ForeignAid, 2),
+                (PrimaryAction.Tax, 3),
+            ):
+                taking = action == primary_action
+                state.balances[rows[taking], players[taking]] += gain
+
+            stealing = action == PrimaryAction.Steal
+            steal_rows = rows[stealing]
+            steal_targets = target[stealing]
+            amount = np.minimum(state.balances[steal_rows, steal_targets], 2)
+            state.balances[steal_rows, steal_targets] -= amount
+            state.balances[steal_rows, players[stealing]] += amount
+
+            killing = (action == PrimaryAction.Coup) | (action == PrimaryAction.Assassinate)
+            self._lose_first_card(rows[killing], target[killing], alive_count)
+
+            # Carry on with the games that have more than one player left.
+            ongoing = alive_count[rows] > 1
+            running = rows[ongoing]
+            if len(running) == 0:
+                break
+
+            primary_players[running] = _next_alive_player(
+                state, running, primary_players[running]
+            )
+        else:
+            # Games that reach the timeout end on it, as in Engine.run_game.
+            self.turns[running] = Engine.TIMEOUT_TURN
+
+        self.complete = True
+
+    def _lose_first_card(
+        self,
+        rows: np.ndarray,
+        players: np.ndarray,
+        alive_count: np.ndarray,
+    ) -> None:
+        """
+        Every batch bot discards its first card. There is at most one card
+        lost per game per turn, so rows are unique.
+        """
+        state = self.state
+
+        cards = state.hands[rows, players, 0]
+        np.add.at(state.revealed, (rows, cards - 1), 1)
+
+        state.hands[rows, players, 0] = state.hands[rows, players, 1]
+        state.hands[rows, players, 1] = 0
+        state.cards_num[rows, players] -= 1
+
+        eliminated = state.cards_num[rows, players] == 0
+        eliminated_rows = rows[eliminated]
+        self.elimination_order[eliminated_rows, players[eliminated]] = (
+            NUMBER_OF_PLAYERS - alive_count[eliminated_rows]
+        )
+        alive_count[eliminated_rows] -= 1
+
+    @property
+    def tied(self) -> np.ndarray:
+        """ Whether each game ended with more than one player left """
+        if not self.complete:
+            raise Exception("Games are not complete yet!")
+        return (self.state.cards_num > 0).sum(axis=1) > 1
+
+    @property
+    def winners(self) -> np.ndarray:
+        """ The winning seat of each game, -1 for a tie """
+        if not self.complete:
+            raise Exception("Games are not complete yet!")
+        return np.where(self.tied, -1, (self.state.cards_num > 0).argmax(axis=1))
+
+    def win_rates(self) -> dict[str, float]:
+        """
+        The fraction of all games won by each bot class, by name. The wins of
+        bots with the same name (such as the same class twice) are added up.
+        """
+        winners = self.winners
+        won = winners >= 0
+        winning_bots = self.seat_bots[np.flatnonzero(won), winners[won]]
+        counts = np.bincount(winning_bots, minlength=NUMBER_OF_PLAYERS)
+
+        wins: dict[str, int] = {}
+        for bot_index, bot_class in enumerate(self.bot_classes):
+            name = bot_class.__name__
+            wins[name] = wins.get(name, 0) + int(counts[bot_index])
+
+        return {name: win / self.game_count for name, win in wins.items()}
@@ -0,0 +1,229 @@
+from array import array
+from bisect import bisect, bisect_left
+from dataclasses import replace
+from itertools import accumulate
+from math import comb
+from random import Random
+from typing import Optional
+
+from coup.bots.belief import HANDS, HandBeliefs
+from coup.bots.enums import Character
+
+from coup.common.rules import NUMBER_OF_PLAYERS, NUMBER_OF_EACH_CARD_IN_DECK
+
+from coup.engine.engine import EngineSnapshot
+from coup.engine.state import GameState, HAND_SLOTS
+
+
+# A pool of cards is keyed by its count of each character, as the digits of a
+# number in base POOL_BASE (the count of a character at digit value - 1).
+POOL_BASE = NUMBER_OF_EACH_CARD_IN_DECK + 1
+POOL_KEYS = POOL_BASE ** len(Character)
+
+_CHARACTER_KEYS = [POOL_BASE ** i for i in range(len(Character))]
+
+# How much removing each hand of HANDS takes off a pool key
+_HAND_KEYS: list[list[int]] = [
+    [sum(_CHARACTER_KEYS[c - 1] for c in hand) for hand in hands]
+    for hands in HANDS
+]
+
+
+def pool_key(counts: list[int]) -> int:
+    """ The key of a pool with the given count of each character """
+    return sum(count * key for count, key in zip(counts, _CHARACTER_KEYS))
+
+
+def pool_counts(key: int) -> list[int]:
+    """ The inverse of pool_key """
+    counts = []
+    for _ in Character:
+        key, count = divmod(key, POOL_BASE)
+        counts.append(count)
+    return counts
+
+
+def _deal_weights(counts: list[int], hand: tuple[Character, ...]) -> int:
+    """
+    The number of ways of dealing a hand from a pool, which over the number of
+    ways of dealing any hand of its size is its multivariate hypergeometric
+    probability.
+    """
+
+    weight = 1
+    for character in set(hand):
+        weight *= comb(counts[character - 1], hand.count(character))
+    return weight
+
+
+# The deal weight of each hand in HANDS, from each pool, indexed
+# [hand size][pool key], and their running totals for sampling by bisection
+DEAL_WEIGHTS: list[list[list[int]]] = []
+CUMULATIVE_DEAL_WEIGHTS: list[list[list[int]]] = []
+for _hands in HANDS:
+    DEAL_WEIGHTS.append([])
+    CUMULATIVE_DEAL_WEIGHTS.append([])
+    for _key in range(POOL_KEYS):
+        _counts = pool_counts(_key)
+        _weights = [_deal_weights(_counts, hand) for hand in _hands]
+        DEAL_WEIGHTS[-1].append(_weights)
+        CUMULATIVE_DEAL_WEIGHTS[-1].append(list(accumulate(_weights)))
+
+
+class DeterminizationSampler:
+    """
+    Samples the hidden cards of a game as seen by one player: the hand of
+    every other player and the cards left in the deck, consistent with the
+    revealed cards, the number of cards each player holds and the player's
+    own hand.
+
+    Hands are dealt one player at a time, from the cards not yet dealt, with
+    the precomputed DEAL_WEIGHTS of the pool that is left. With hand_beliefs,
+    each hand is also weighted by how likely it makes what its player has
+    done. Dealing one player at a time with those weights favours the players
+    dealt first, so each sample is weighted to correct for it and the samples
+    are drawn again by weight (see sample_states).
+
+    The samples are copies of the public state with the hidden cards filled
+    in, which the engine can carry on from (see sample).
+    """
+
+    def __init__(
+        self,
+        public_state: EngineSnapshot,
+        player_id: int,
+        hand_beliefs: Optional[HandBeliefs] = None,
+    ) -> None:
+        self.public_state = public_state
+        self.player_id = player_id
+
+        state = public_state.state
+        counts = [
+            NUMBER_OF_EACH_CARD_IN_DECK - revealed
+            for revealed in state.revealed
+        ]
+        for card in state.hand(player_id):
+            counts[card - 1] -= 1
+        self.pool_key = pool_key(counts)
+
+        # The players whose hands are hidden, their hand size and the
+        # likelihoods of their hands (None for all equally likely)
+        self.hidden: list[tuple[int, int, Optional[list[float]]]] = []
+        for other_player_id in range(NUMBER_OF_PLAYERS):
+            cards_num = state.cards_num[other_player_id]
+            if other_player_id == player_id or cards_num == 0:
+                continue
+
+            likelihoods = None
+            if hand_beliefs is not None:
+                likelihoods = hand_beliefs.likelihoods[other_player_id]
+                # Beliefs that are not about a hand of this size (the player
+                # is part way through redrawing) or that prefer no hand are
+                # no use
+                if len(likelihoods) != len(HANDS[cards_num]) or all(
+                    likelihood == likelihoods[0] for likelihood in likelihoods
+                ):
+                    likelihoods = None
+
+            self.hidden.append((other_player_id, cards_num, likelihoods))
+
+        self.weighted = any(
+            likelihoods is not None for _, _, likelihoods in self.hidden
+        )
+
+    def _deal(self, rng: Random) -> tuple[list[int], int, float]:
+        """
+        Deals one set of hidden hands. Returns the index in HANDS of each
+        hidden player's hand, the key of the pool left for the deck and the
+        weight of the deal.
+        """
+
+        key = self.pool_key
+        hand_indexes = []
+        weight = 1.0
+
+        for _, cards_num, likelihoods in self.hidden:
+            deal_weights = DEAL_WEIGHTS[cards_num][key]
+            cumulative = CUMULATIVE_DEAL_WEIGHTS[cards_num][key]
+            total = cumulative[-1]
+            if total == 0:
+                raise ValueError(
+                    'There are not enough unseen cards for the hidden hands'
+                )
+
+            if likelihoods is not None:
+                weighted = [w * l for w, l in zip(deal_weights, likelihoods)]
+                weighted_total = sum(weighted)
+                if weighted_total > 0:
+                    weight *= weighted_total / total
+                    cumulative = list(accumulate(weighted))
+                    total = weighted_total
+                else:
+                    # The beliefs rule out every hand left, so this deal is
+                    # impossible
+                    weight = 0.0
+
+            index = bisect(cumulative, rng.random() * total)
+            if index == len(cumulative):
+                # The random number was rounded up to the total
+                index = bisect_left(cumulative, total)
+
+            hand_indexes.append(index)
+            key -= _HAND_KEYS[cards_num][index]
+
+        return hand_indexes, key, weight
+
+    def _state(
+        self,
+        rng: Random,
+        hand_indexes: list[int],
+        deck_key: int,
+    ) -> GameState:
+        state = self.public_state.state.copy()
+        hands = state.hands
+
+        for (player_id, cards_num, _), index in zip(self.hidden, hand_indexes):
+            hand = HANDS[cards_num][index]
+            # HANDS are sorted, but which slot a card is in matters to bots
+            if cards_num == 2 and rng.getrandbits(1):
+                hand = hand[::-1]
+
+            start = player_id * HAND_SLOTS
+            hands[start:start + cards_num] = array('B', hand)
+
+        deck = state.deck
+        for i, count in enumerate(pool_counts(deck_key)):
+            deck[i] = count
+        state.deck_size = sum(deck)
+
+        return state
+
+    def sample_states(self, rng: Random, count: int = 1) -> list[GameState]:
+        """
+        count sampled states, at random from rng. With hand_beliefs, the
+        samples are only weighted against each other, so a single sample is
+        still biased towards the players dealt first: draw every sample
+        needed at once.
+        """
+        deals = [self._deal(rng) for _ in range(count)]
+
+        if self.weighted:
+            weights = [weight for _, _, weight in deals]
+            if sum(weights) > 0:
+                deals = rng.choices(deals, weights, k=count)
+
+        return [
+            self._state(rng, hand_indexes, deck_key)
+            for hand_indexes, deck_key, _ in deals
+        ]
+
+    def sample(self, rng: Random, count: int = 1) -> list[EngineSnapshot]:
+        """
+        count sampled snapshots of the game, which Engine.from_snapshot can
+        carry on from with a new seed
+        """
+
+        return [
+            replace(self.public_state, state=state)
+            for state in self.sample_states(rng, count)
+        ]
@@ -1,5 +1,6 @@
-from typing import Type, Optional, Literal
-from random import shuffle
+from typing import Any, Callable, Generator, Literal, Optional, Type, TypeVar
+from random import Random, getrandbits
+from dataclasses import dataclass
 
 from coup.bots.bots.base_bot import BaseBot
 from coup.bots.enums import (
@@ -8,13 +9,96 @@ from coup.bots.enums import (
 )
 from coup.bots.action import Action
 from coup.bots.game_info import GameInfo
+from coup.bots.history_index import HistoryIndex
+from coup.bots.belief import HandBeliefs
 
 from coup.common.rules import (
     NUMBER_OF_PLAYERS, PRIMARY_ACTION_TO_CARD, COUNTER_ACTION_TO_CARD,
     PRIMARY_ACTION_TO_COST, PRIMARY_ACTION_TO_COUNTER_ACTIONS
 )
 
+from coup.engine.latency import LatencyStats, instrument_bot
 from coup.engine.player import Player
+from coup.engine.state import GameState, GameStateView
+
+
+@dataclass(frozen=True)
+class EngineSnapshot:
+    """
+    Everything needed to carry on a game from between two turns (see
+    Engine.snapshot and Engine.from_snapshot).
+    """
+
+    bot_classes: list[Type[BaseBot]]
+    state: GameState
+
+    # The decoded history of the state. The turn dicts are shared with the
+    # engine the snapshot was taken from, which never changes a completed turn.
+    history: list[dict[ActionType, Action]]
+
+    # The HistoryIndex of each seat's GameInfo
+    history_indexes: list[HistoryIndex]
+
+    # The HandBeliefs of each seat's GameInfo, or None for new ones that
+    # catch up on the history when they are first used
+    hand_beliefs: Optional[list[HandBeliefs]]
+
+    turn: int
+    primary_player_id: int
+    eliminated_player_ids: list[int]
+    complete: bool
+
+    # None for a snapshot that was not taken from an engine (such as a
+    # determinization of what a bot can see), which can only be continued with
+    # a new seed.
+    deck_random_state: Optional[tuple]
+    bot_random_states: Optional[list[tuple]]
+
+
+@dataclass
+class Decision:
+    """
+    A decision the game is waiting on. The answer to send back depends on the
+    requested move:
+
+    - PrimaryAction: a (PrimaryAction, target) tuple
+    - ChallengeAction: a ChallengeAction
+    - CounterAction: a CounterAction
+    - ChallengeResponse: the index of the card to reveal
+    - DiscardChoice: the index of the card to discard
+
+    The game_info is the deciding seat's view of the game, exactly as its bot
+    sees it. It is only valid until the answer is sent.
+    """
+
+    player_id: int
+    requested_move: RequestedMove
+    game_info: GameInfo
+
+
+# A generator of the decisions of a game (or part of one), sent the answers.
+Steps = Generator[Decision, Any, None]
+
+T = TypeVar('T')
+
+
+def bot_answer(bot: BaseBot, decision: Decision) -> Any:
+    """ Answers a decision with the handler of a bot """
+
+    requested_move = decision.requested_move
+
+    if requested_move == RequestedMove.PrimaryAction:
+        return bot.primary_action_handler()
+    elif requested_move == RequestedMove.ChallengeAction:
+        return bot.challenge_action_handler()
+    elif requested_move == RequestedMove.CounterAction:
+        return bot.counter_action_handler()
+    elif requested_move == RequestedMove.ChallengeResponse:
+        return bot.challenge_response_handler()
+    elif requested_move == RequestedMove.DiscardChoice:
+        return bot.discard_choice_handler()
+
+    raise ValueError(f'Unknown requested move: {requested_move}')
 
 
 class Engine:
@@ -26,62 +110,251 @@ class Engine:
         bot_classes: list[Type[BaseBot]],
         debug: int = True,
         shuffle_players: int = False,
+        seed: Optional[int] = None,
+        latency: Optional[LatencyStats] = None,
     ) -> None:
+        """
+        All randomness in a game comes from the given seed (or a random one if
+        it is None, which is kept as self.seed so the game can be reproduced).
+
+        The deck, the seat order and each seat's bot get separate streams, so
+        that swapping the bot in one seat does not change the deals or the
+        decisions of the bots in the other seats.
+
+        If latency is given, every handler call of every bot is timed into it
+        (see latency.instrument_bot). Otherwise nothing is timed and the bots
+        are called directly.
+        """
+
         if len(bot_classes) != NUMBER_OF_PLAYERS:
             raise ValueError(
                 f'Requires {NUMBER_OF_PLAYERS} competitors got '
                 f'{len(bot_classes)}'
             )
 
-        self.deck: list[Character] = (
-            [Character.Duke] * 3 +
-            [Character.Assassin] * 3 +
-            [Character.Ambassador] * 3 +
-            [Character.Captain] * 3 +
-            [Character.Contessa] * 3
-        )
-        shuffle(self.deck)
+        if seed is None:
+            seed = getrandbits(64)
+        self.seed: int = seed
+
+        seed_random = Random(seed)
+        self.deck_random = Random(seed_random.getrandbits(64))
+        self.seat_random = Random(seed_random.getrandbits(64))
+        bot_seeds = [
+            seed_random.getrandbits(64) for _ in range(NUMBER_OF_PLAYERS)
+        ]
+
+        # The engine runs on the compact state (which includes the deck), the
+        # view keeps the GameInfo style structures that bots read in sync with
+        # it.
+        self.state = GameState()
+        self.view = GameStateView(self.state)
 
         self.players: list[Player] = []
 
         if shuffle_players:
             bot_classes = bot_classes.copy()
-            shuffle(bot_classes)
+            self.seat_random.shuffle(bot_classes)
 
         for player_id, bot_class in enumerate(bot_classes):
-            self.players.append(
-                Player(
-                    bot=bot_class(local_mode=True),
-                    player_id=player_id,
-                    hand=[self.deck.pop(), self.deck.pop()]
-                )
+            player = Player(
+                bot=bot_class(
+                    local_mode=True,
+                    rng=Random(bot_seeds[player_id])
+                ),
+                player_id=player_id,
+                state=self.state,
             )
+            player.add_card(self.draw_card())
+            player.add_card(self.draw_card())
+            self.players.append(player)
 
-        self.revealed_cards: dict[Character, int] = {
-            Character.Duke: 0,
-            Character.Assassin: 0,
-            Character.Ambassador: 0,
-            Character.Captain: 0,
-            Character.Contessa: 0,
-        }
-
-        self.history: list[dict[ActionType, Action]] = []
+        self.latency = latency
+        if latency is not None:
+            for player in self.players:
+                instrument_bot(player.bot, latency)
 
         # Sorry James, my usage of various class variables and methods is probably quite disagreeable
 
         self.debug:bool = debug
 
+        # The turn being played and its primary player
         self.turn:int = 0
+        self.primary_player_id: int = 0
         self.complete:bool = False
 
-        self.eliminated_players:List[Player] = []
+        self.eliminated_players: list[Player] = []
         """ A list of players which are appended as they are eliminated """
 
+        self.alive_count: int = NUMBER_OF_PLAYERS
+
+        self._init_game_infos()
+
+    def _init_game_infos(
+        self,
+        history_indexes: Optional[list[HistoryIndex]] = None,
+        hand_beliefs: Optional[list[HandBeliefs]] = None,
+    ) -> None:
+        """
+        One GameInfo per seat, built once and shared with that seat's bot.
+        Everything but the requested move and the current primary player
+        refers to the state or its view (which are updated in place), so only
+        those two fields are changed for each query (see _get_game_info).
+        """
+
+        self.game_infos: list[GameInfo] = []
+        for player in self.players:
+            game_info = GameInfo(
+                requested_move=RequestedMove.PrimaryAction,
+                player_id=player.player_id,
+                balances=self.state.balances,
+                own_cards=self.view.hands[player.player_id],
+                revealed_cards=self.view.revealed_cards,
+                players_cards_num=self.state.cards_num,
+                history=self.view.history,
+                reveal_log=self.state.reveals,
+                current_primary_player_id=self.primary_player_id,
+                history_index=(
+                    history_indexes[player.player_id]
+                    if history_indexes is not None else None
+                ),
+                hand_beliefs=(
+                    hand_beliefs[player.player_id]
+                    if hand_beliefs is not None else None
+                ),
+            )
+            player.bot.game_info = game_info
+            self.game_infos.append(game_info)
+
+    def snapshot(self) -> EngineSnapshot:
+        """
+        Captures the game as it is between two turns. This copies only the
+        flat state arrays and a list of references to the history turns, so
+        it is cheap enough to take at every turn.
+
+        Bots are not captured: a game continued from the snapshot gets new
+        bot instances, with the same random state but none of the memory of
+        the originals.
+        """
+
+        return EngineSnapshot(
+            bot_classes=[type(player.bot) for player in self.players],
+            state=self.state.copy(),
+            history=self.view.history[:],
+            history_indexes=[
+                game_info.history_index.copy() for game_info in self.game_infos
+            ],
+            hand_beliefs=[
+                game_info.hand_beliefs.copy() for game_info in self.game_infos
+            ],
+            turn=self.turn,
+            primary_player_id=self.primary_player_id,
+            eliminated_player_ids=[
+                player.player_id for player in self.eliminated_players
+            ],
+            complete=self.complete,
+            deck_random_state=self.deck_random.getstate(),
+            bot_random_states=[
+                player.bot.rng.getstate() for player in self.players
+            ],
+        )
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot: EngineSnapshot,
+        seed: Optional[int] = None,
+        bot_classes: Optional[list[Type[BaseBot]]] = None,
+        debug: bool = False,
+    ) -> 'Engine':
+        """
+        A new engine carrying on the game of the snapshot. Any number of
+        engines can be made from one snapshot, they share nothing that is
+        ever changed.
+
+        Without a seed the new engine continues with the random state of the
+        snapshot, so it plays out exactly as the original game would have
+        (given the same bots). With a seed the deck and bots get new streams,
+        which is what a rollout wants. The bots of each seat can also be
+        replaced, for example to roll out with a fast policy.
+        """
+
+        engine = cls.__new__(cls)
+        engine.seed = seed if seed is not None else getrandbits(64)
+
+        if bot_classes is None:
+            bot_classes = snapshot.bot_classes
+        if len(bot_classes) != NUMBER_OF_PLAYERS:
+            raise ValueError(
+                f'Requires {NUMBER_OF_PLAYERS} competitors got '
+                f'{len(bot_classes)}'
+            )
+
+        seed_random = Random(engine.seed)
+        engine.deck_random = Random(seed_random.getrandbits(64))
+        engine.seat_random = Random(seed_random.getrandbits(64))
+        bot_randoms = [
+            Random(seed_random.getrandbits(64))
+            for _ in range(NUMBER_OF_PLAYERS)
+        ]
+        if seed is None:
+            if snapshot.deck_random_state is None:
+                raise ValueError('The snapshot has no random state, give a seed')
+            engine.deck_random.setstate(snapshot.deck_random_state)
+            for bot_random, state in zip(
+                bot_randoms, snapshot.bot_random_states
+            ):
+                bot_random.setstate(state)
+
+        engine.state = snapshot.state.copy()
+        engine.view = GameStateView(engine.state, history=snapshot.history)
+
+        engine.players = [
+            Player(
+                bot=bot_class(local_mode=True, rng=bot_randoms[player_id]),
+                player_id=player_id,
+                state=engine.state,
+            )
+            for player_id, bot_class in enumerate(bot_classes)
+        ]
+
+        engine.debug = debug
+        engine.latency = None
+        engine.turn = snapshot.turn
+        engine.primary_player_id = snapshot.primary_player_id
+        engine.complete = snapshot.complete
+
+        engine.eliminated_players = [
+            engine.players[player_id]
+            for player_id in snapshot.eliminated_player_ids
+        ]
+        engine.alive_count = NUMBER_OF_PLAYERS - len(engine.eliminated_players)
+
+        engine._init_game_infos(
+            [
+                history_index.copy()
+                for history_index in snapshot.history_indexes
+            ],
+            [
+                hand_beliefs.copy() for hand_beliefs in snapshot.hand_beliefs
+            ] if snapshot.hand_beliefs is not None else None,
+        )
+
+        return engine
+
+    def fork(
+        self,
+        seed: Optional[int] = None,
+        bot_classes: Optional[list[Type[BaseBot]]] = None,
+    ) -> 'Engine':
+        """ A new engine carrying on this game, see from_snapshot """
+        return Engine.from_snapshot(self.snapshot(), seed, bot_classes)
+
 
     def next_player(self, current_player: int) -> int:
+        cards_num = self.state.cards_num
         player_id = (current_player + 1) % NUMBER_OF_PLAYERS
         iterated = 0
-        while self.players[player_id].eliminated:
+        while cards_num[player_id] == 0:
             player_id = (player_id + 1) % NUMBER_OF_PLAYERS
             iterated += 1
 
@@ -92,105 +365,250 @@ class Engine:
 
     @property
     def balances(self) -> list[int]:
-        return [player.balance for player in self.players]
+        return self.state.balances
 
     @property
     def players_cards_num(self) -> list[int]:
-        return [len(player.hand) for player in self.players]
+        return self.state.cards_num
+
+    @property
+    def revealed_cards(self) -> dict[Character, int]:
+        return self.view.revealed_cards
+
+    @property
+    def history(self) -> list[dict[ActionType, Action]]:
+        return self.view.history
+
+    def _get_game_info(
+        self,
+        player_id: int,
+        requested_move: RequestedMove,
+        primary_player_id: int,
+    ) -> GameInfo:
+        """
+        Returns the GameInfo of the given player, set up for a query.
+        """
+
+        game_info = self.game_infos[player_id]
+        game_info.requested_move = requested_move
+        game_info.current_primary_player_id = primary_player_id
+        return game_info
 
     def draw_card(self) -> Character:
         # The draw is always completely random, there is no preserved order.
-        shuffle(self.deck)
-        return self.deck.pop()
+        return self.state.draw_card(self.deck_random)
 
     def run_game(self) -> None:
-        # Print some stuff about the game
+        """
+        Plays the game to completion. In debug mode every turn is printed,
+        otherwise the headless loop is used, which does nothing but play.
+        """
+
+        if self.complete:
+            return
+
         if self.debug:
-            print("Cards dealt:")
-            for p in self.players:
-                print(p, '-', p.hand)
-            print()
+            self.run_game_debug()
+        else:
+            self.run_game_headless()
+
+    def run_game_headless(self) -> None:
+        """
+        The game loop for bulk simulation. Eliminations are recorded as they
+        happen (see _record_if_eliminated), so there is nothing to check per
+        turn other than the number of players left.
+        """
+
+        while not self.complete:
+            self.run_turn()
+
+    def run_turn(self) -> None:
+        """
+        Plays the current turn with the bots, then moves on to the next one or
+        completes the game. Between calls the engine can be snapshot (see
+        snapshot).
+        """
+
+        self._answer_with_bots(self.step_turn())
+
+    def run_game_debug(self) -> None:
+        """
+        The game loop for stepping through a single game, printing the deal,
+        and the state and actions of each turn.
+        """
+
+        print("Cards dealt:")
+        for p in self.players:
+            print(p, '-', list(p.hand))
+        print()
 
-        self.turn = 0
-        primary_player_id = 0
         while True:
+            primary_player_id = self.primary_player_id
+
             if self.turn == Engine.TIMEOUT_TURN:
-                if self.debug:
-                    print(f"Game timed out after {self.turn} turns")
-                    break
+                print(f"Game timed out after {self.turn} turns")
                 break
 
-            if self.debug:
-                print(f'Turn {self.turn}.')
-                print("Balances:", [p.balance for p in self.players])
-                print("Card Nums:", [len(p.hand) for p in self.players])
+            print(f'Turn {self.turn}.')
+            print("Balances:", [p.balance for p in self.players])
+            print("Card Nums:", [len(p.hand) for p in self.players])
 
-            primary_action_details = self.run_turn_without_primary_resolution(
-                primary_player_id
+            primary_action_details = self._answer_with_bots(
+                self.step_turn_without_primary_resolution(primary_player_id)
             )
 
             if primary_action_details is not None:
                 primary_action, target = primary_action_details
-                self.resolve_successful_primary_action(
-                    primary_player_id=primary_player_id,
-                    primary_action=primary_action,
-                    target=target
+                self._answer_with_bots(
+                    self.step_resolve_successful_primary_action(
+                        primary_player_id=primary_player_id,
+                        primary_action=primary_action,
+                        target=target
+                    )
                 )
 
-            if ActionType.PrimaryAction in self.history[-1]:
-                action = self.history[-1][ActionType.PrimaryAction]
-                if self.debug:
-                    print(
-                        f'PrimaryAction: {self.players[action.player_id]}; action '
-                        f'{action.action.name}; target {action.target}; '
-                        f'successful {action.successful}.'
-                    )
-            if ActionType.ChallengePrimaryAction in self.history[-1]:
-                action = self.history[-1][ActionType.ChallengePrimaryAction]
-                if self.debug:
-                    print(
-                        f'ChallengePrimaryAction: {self.players[action.player_id]}; '
-                        f'action {action.action.name}; successful '
-                        f'{action.successful}.'
-                    )
-            if ActionType.CounterAction in self.history[-1]:
-                action = self.history[-1][ActionType.CounterAction]
-                if self.debug:
-                    print(
-                        f'CounterAction: {self.players[action.player_id]}; action '
-                        f'{action.action.name}; successful {action.successful}.'
-                    )
-            if ActionType.ChallengeCounterAction in self.history[-1]:
-                action = self.history[-1][ActionType.ChallengeCounterAction]
-                if self.debug:
-                    print(
-                        f'ChallengeCounterAction: {self.players[action.player_id]}; '
-                        f'action {action.action.name}; successful '
-                        f'{action.successful}.'
-                    )
+            turn = self.history[-1]
+
+            if ActionType.PrimaryAction in turn:
+                action = turn[ActionType.PrimaryAction]
+                print(
+                    f'PrimaryAction: {self.players[action.player_id]}; action '
+                    f'{action.action.name}; target {action.target}; '
+                    f'successful {action.successful}.'
+                )
+            if ActionType.ChallengePrimaryAction in turn:
+                action = turn[ActionType.ChallengePrimaryAction]
+                print(
+                    f'ChallengePrimaryAction: {self.players[action.player_id]}; '
+                    f'action {action.action.name}; successful '
+                    f'{action.successful}.'
+                )
+            if ActionType.CounterAction in turn:
+                action = turn[ActionType.CounterAction]
+                print(
+                    f'CounterAction: {self.players[action.player_id]}; action '
+                    f'{action.action.name}; successful {action.successful}.'
+                )
+            if ActionType.ChallengeCounterAction in turn:
+                action = turn[ActionType.ChallengeCounterAction]
+                print(
+                    f'ChallengeCounterAction: {self.players[action.player_id]}; '
+                    f'action {action.action.name}; successful '
+                    f'{action.successful}.'
+                )
 
-            # Build eliminated_players list
-            # This is 100% a terrible way to do this but I'm too scared to insert this anywhere else 
-            # without breaking things.
-            for p in self.players:
-                if p.eliminated and p not in self.eliminated_players:
-                    self.eliminated_players.append(p)
-
-            if len(self.remaining_players) == 1:
-                if self.debug:
-                    print(f'Game over.')
-                    print(f'{self.remaining_players[0]} wins.')
+            if self.alive_count == 1:
+                print(f'Game over.')
+                print(f'{self.remaining_players[0]} wins.')
                 break
 
             self.turn += 1
-            primary_player_id = self.next_player(primary_player_id)
+            self.primary_player_id = self.next_player(primary_player_id)
 
         self.complete = True
 
-    def run_turn_without_primary_resolution(
+    def _answer_with_bots(self, steps: Generator[Decision, Any, T]) -> T:
+        """
+        Runs steps to the end, answering each decision with the bot of the
+        deciding seat, and returns what the steps return.
+        """
+
+        players = self.players
+        try:
+            decision = next(steps)
+            while True:
+                bot = players[decision.player_id].bot
+                decision = steps.send(bot_answer(bot, decision))
+        except StopIteration as stop:
+            return stop.value
+
+    def steps(self) -> Steps:
+        """
+        Yields every decision until the game is complete, to be sent back the
+        answer to each (see Decision):
+
+            steps = engine.steps()
+            decision = next(steps)
+            while True:
+                decision = steps.send(answer_to(decision))
+
+        until it raises StopIteration at the end of the game. This lets a
+        caller interleave many games and answer their decisions however it
+        likes, for example all at once with a vectorised policy (see
+        run_batched) or from another process.
+
+        run_game is these steps answered by the engine's bots, anything else
+        answering them plays exactly the same rules.
+        """
+
+        while not self.complete:
+            yield from self.step_turn()
+
+    def step_turn(self) -> Steps:
+        """
+        Plays the current turn, then moves on to the next one or completes the
+        game.
+        """
+
+        primary_player_id = self.primary_player_id
+
+        primary_action_details = yield from self.step_turn_without_primary_resolution(
+            primary_player_id
+        )
+
+        if primary_action_details is not None:
+            primary_action, target = primary_action_details
+            yield from self.step_resolve_successful_primary_action(
+                primary_player_id=primary_player_id,
+                primary_action=primary_action,
+                target=target
+            )
+
+        if self.alive_count == 1:
+            self.complete = True
+            return
+
+        self.turn += 1
+        if self.turn == Engine.TIMEOUT_TURN:
+            self.complete = True
+            return
+
+        self.primary_player_id = self.next_player(primary_player_id)
+
+    def _decision(
+        self,
+        player_id: int,
+        requested_move: RequestedMove,
+        primary_player_id: int,
+        game_info_move: Optional[RequestedMove] = None,
+    ) -> Decision:
+        """
+        The decision for a player, with their GameInfo set up for the query.
+        The GameInfo requested move is game_info_move if given, since discards
+        are shown to bots as a ChallengeResponse.
+        """
+
+        game_info = self._get_game_info(
+            player_id=player_id,
+            requested_move=game_info_move or requested_move,
+            primary_player_id=primary_player_id,
+        )
+        return Decision(player_id, requested_move, game_info)
+
+    def _record_if_eliminated(self, player: Player) -> None:
+        """
+        Must be called whenever a player permanently looses a card, so that
+        eliminated_players and alive_count stay up to date.
+        """
+
+        if player.eliminated:
+            self.eliminated_players.append(player)
+            self.alive_count -= 1
+
+    def step_turn_without_primary_resolution(
         self,
         primary_player_id: int
-    ) -> Optional[tuple[PrimaryAction, Optional[int]]]:
+    ) -> Generator[Decision, Any, Optional[tuple[PrimaryAction, Optional[int]]]]:
         """
         Runs a turn, but doesn't actually apply the primary action or eliminate
         players that are reduced to zero influence (hand size). Any resolution
@@ -206,16 +624,17 @@ class Engine:
         successfully, otherwise returns None, for ease of resolving it.
         """
 
-        self.history.append({})
-        turn = self.history[-1]
+        self.state.start_turn()
 
-        primary_action, target = self.run_primary_action(primary_player_id)
+        primary_action, target = yield from self.step_primary_action(
+            primary_player_id
+        )
 
         primary_challenger_id = None
         if primary_action in PRIMARY_ACTION_TO_CARD:
             # Only allow a challenge if the primary action taken corresponds to
             # a card.
-            primary_challenger_id = self.run_challenge(
+            primary_challenger_id = yield from self.step_challenge(
                 challenged_player_id=primary_player_id,
                 primary_player_id=primary_player_id,
                 action_type=ActionType.ChallengePrimaryAction,
@@ -223,22 +642,23 @@ class Engine:
 
         # If someone challenged, we run a challenge response.
         if primary_challenger_id is not None:
-            if self.run_challenge_response(
+            challenge_successful = yield from self.step_challenge_response(
                 challenged_player_id=primary_player_id,
                 challenging_player_id=primary_challenger_id,
                 primary_player_id=primary_player_id,
                 action_type=ActionType.ChallengePrimaryAction,
-            ):
+            )
+            if challenge_successful:
                 # If the challenge is successful, the primary action fails and
                 # we are done.
 
-                turn[ActionType.PrimaryAction].successful = False
-                turn[ActionType.ChallengePrimaryAction].successful = True
+                self.state.set_successful(ActionType.PrimaryAction, False)
+                self.state.set_successful(ActionType.ChallengePrimaryAction, True)
 
                 return None
 
             # Otherwise, the challenge fails, and the turn continues.
-            turn[ActionType.ChallengePrimaryAction].successful = False
+            self.state.set_successful(ActionType.ChallengePrimaryAction, False)
 
         # The PrimaryAction has now survived any challenges.
 
@@ -246,14 +666,14 @@ class Engine:
             # There are no possible counter actions, so the primary action goes
             # ahead and we are done.
 
-            turn[ActionType.PrimaryAction].successful = True
+            self.state.set_successful(ActionType.PrimaryAction, True)
 
             return primary_action, target
 
         # Otherwise, we still need to run the counter action and any challenges
         # to the counter action.
 
-        counterer_id = self.run_counter_action(
+        counterer_id = yield from self.step_counter_action(
             target=target,
             primary_action=primary_action,
             primary_player_id=primary_player_id,
@@ -263,13 +683,13 @@ class Engine:
             # No counter action was taken, so the primary action goes ahead and
             # we are done.
 
-            turn[ActionType.PrimaryAction].successful = True
+            self.state.set_successful(ActionType.PrimaryAction, True)
 
             return primary_action, target
 
         # All counter actions can be challenged, so we always run a challenge.
 
-        counter_challenger_id = self.run_challenge(
+        counter_challenger_id = yield from self.step_challenge(
             challenged_player_id=counterer_id,
             primary_player_id=primary_player_id,
             action_type=ActionType.ChallengeCounterAction,
@@ -277,18 +697,19 @@ class Engine:
 
         # If the counter action was challenged, we run a challenge response.
         if counter_challenger_id is not None:
-            if self.run_challenge_response(
+            challenge_successful = yield from self.step_challenge_response(
                 challenged_player_id=counterer_id,
                 challenging_player_id=counter_challenger_id,
                 primary_player_id=primary_player_id,
                 action_type=ActionType.ChallengeCounterAction
-            ):
+            )
+            if challenge_successful:
                 # If the challenge was successful, the counter action fails,
                 # and so the primary action succeeds, and the turn is over.
 
-                turn[ActionType.ChallengeCounterAction].successful = True
-                turn[ActionType.CounterAction].successful = False
-                turn[ActionType.PrimaryAction].successful = True
+                self.state.set_successful(ActionType.ChallengeCounterAction, True)
+                self.state.set_successful(ActionType.CounterAction, False)
+                self.state.set_successful(ActionType.PrimaryAction, True)
 
                 return primary_action, target
 
@@ -296,9 +717,9 @@ class Engine:
                 # Otherwise, the challenge fails, the counter succeeds, and so
                 # the primary action fails. And then the turn is over.
 
-                turn[ActionType.ChallengeCounterAction].successful = False
-                turn[ActionType.CounterAction].successful = True
-                turn[ActionType.PrimaryAction].successful = False
+                self.state.set_successful(ActionType.ChallengeCounterAction, False)
+                self.state.set_successful(ActionType.CounterAction, True)
+                self.state.set_successful(ActionType.PrimaryAction, False)
 
                 return None
 
@@ -306,34 +727,37 @@ class Engine:
         # counter action succeeds, so the primary action fails, and we are
         # done.
 
-        turn[ActionType.CounterAction].successful = True
-        turn[ActionType.PrimaryAction].successful = False
+        self.state.set_successful(ActionType.CounterAction, True)
+        self.state.set_successful(ActionType.PrimaryAction, False)
 
         return None
 
-    def run_primary_action(
+    def step_primary_action(
         self,
         primary_player_id: int
-    ) -> tuple[PrimaryAction, Optional[int]]:
+    ) -> Generator[Decision, Any, tuple[PrimaryAction, Optional[int]]]:
         """
         Returns the PrimaryAction taken and its target, for ease of checking if
         challenges / counter actions are allowed.
         """
 
-        player = self.players[primary_player_id]
-        game_info = GameInfo(
-            requested_move=RequestedMove.PrimaryAction,
-            player_id=primary_player_id,
-            balances=self.balances,
-            own_cards=player.hand,
-            revealed_cards=self.revealed_cards,
-            players_cards_num=self.players_cards_num,
-            history=self.history,
-            current_primary_player_id=primary_player_id,
+        primary_action, target = yield self._decision(
+            primary_player_id, RequestedMove.PrimaryAction, primary_player_id
         )
-        player.bot.game_info = game_info
 
-        primary_action, target = player.bot.primary_action_handler()
+        self._apply_primary_action(primary_player_id, primary_action, target)
+
+        return primary_action, target
+
+    def _apply_primary_action(
+        self,
+        primary_player_id: int,
+        primary_action: PrimaryAction,
+        target: Optional[int],
+    ) -> None:
+        """ Charges for and records the chosen primary action """
+
+        player = self.players[primary_player_id]
 
         # Charge the cost of the action, because they pay this regardless of
         # their success.
@@ -344,19 +768,14 @@ class Engine:
             )
         player.balance -= PRIMARY_ACTION_TO_COST[primary_action]
 
-        action = Action(
+        self.state.set_action(
             action_type=ActionType.PrimaryAction,
             action=primary_action,
             player_id=primary_player_id,
-            successful=None,
             target=target,
         )
 
-        self.history[-1][ActionType.PrimaryAction] = action
-
-        return primary_action, target
-
-    def run_challenge(
+    def step_challenge(
         self,
         challenged_player_id: int,
         primary_player_id: int,
@@ -364,20 +783,23 @@ class Engine:
             Literal[ActionType.ChallengePrimaryAction]
             | Literal[ActionType.ChallengeCounterAction]
         )
-    ) -> Optional[int]:
+    ) -> Generator[Decision, Any, Optional[int]]:
         """
         Returns the id of the player that challenged, or None if nobody did.
 
-        If the action the challenge is being offered for targetted a player,
-        only that player may choose to challenge.
+        Each other player is asked in turn, with the challenged player as the
+        GameInfo's current primary player.
         """
 
         challenging_player_id = self.next_player(challenged_player_id)
         while challenging_player_id != challenged_player_id:
-            if self.run_single_challenge(
-                player_id=challenging_player_id,
-                primary_player_id=challenged_player_id,
-                action_type=action_type,
+            challenge_action = yield self._decision(
+                challenging_player_id,
+                RequestedMove.ChallengeAction,
+                challenged_player_id,
+            )
+            if self._apply_challenge(
+                challenging_player_id, action_type, challenge_action
             ):
                 return challenging_player_id
 
@@ -385,33 +807,16 @@ class Engine:
 
         return None
 
-    def run_single_challenge(
+    def _apply_challenge(
         self,
         player_id: int,
-        primary_player_id: int,
         action_type: (
             Literal[ActionType.ChallengePrimaryAction]
             | Literal[ActionType.ChallengeCounterAction]
-        )
+        ),
+        challenge_action: ChallengeAction,
     ) -> bool:
-        """
-        Returns True if a challenge is made.
-        """
-
-        player = self.players[player_id]
-        game_info = GameInfo(
-            requested_move=RequestedMove.ChallengeAction,
-            player_id=player_id,
-            balances=self.balances,
-            own_cards=player.hand,
-            revealed_cards=self.revealed_cards,
-            players_cards_num=self.players_cards_num,
-            history=self.history,
-            current_primary_player_id=primary_player_id,
-        )
-        player.bot.game_info = game_info
-
-        challenge_action = player.bot.challenge_action_handler()
+        """ Records a challenge if one is made, returns whether it was """
 
         if challenge_action == ChallengeAction.NoChallenge:
             # This player is not issuing a challenge, so we don't need to add
@@ -420,17 +825,14 @@ class Engine:
 
         # This player is issuing a challenge.
 
-        action = Action(
+        self.state.set_action(
             action_type=action_type,
             action=challenge_action,
             player_id=player_id,
-            successful=None,
         )
-
-        self.history[-1][action_type] = action
         return True
 
-    def run_challenge_response(
+    def step_challenge_response(
         self,
         challenged_player_id: int,
         challenging_player_id: int,
@@ -439,63 +841,32 @@ class Engine:
             Literal[ActionType.ChallengePrimaryAction]
             | Literal[ActionType.ChallengeCounterAction]
         )
-    ) -> bool:
+    ) -> Generator[Decision, Any, bool]:
         """
         Returns whether or not the challenge was successful, to help in the
         setting of history. Does not set history directly.
         """
 
-        challenged_player = self.players[challenged_player_id]
-        game_info = GameInfo(
-            requested_move=RequestedMove.ChallengeResponse,
-            player_id=challenged_player_id,
-            balances=self.balances,
-            own_cards=challenged_player.hand,
-            revealed_cards=self.revealed_cards,
-            players_cards_num=self.players_cards_num,
-            history=self.history,
-            current_primary_player_id=primary_player_id,
+        card_to_reveal = yield self._decision(
+            challenged_player_id,
+            RequestedMove.ChallengeResponse,
+            primary_player_id,
         )
-        challenged_player.bot.game_info = game_info
-
-        card_to_reveal = challenged_player.bot.challenge_response_handler()
-
-        # Note that this will make their hand look 1 card smaller than it
-        # should be (which may causes the challenged_player to temporarily look
-        # eliminated).
-        revealed_card = challenged_player.hand.pop(card_to_reveal)
-
-        if action_type == ActionType.ChallengePrimaryAction:
-            primary_action = self.history[-1][ActionType.PrimaryAction].action
-            if not isinstance(primary_action, PrimaryAction):
-                raise TypeError('Expected PrimaryAction')
 
-            allowed = PRIMARY_ACTION_TO_CARD[primary_action] == revealed_card
-
-        elif action_type == ActionType.ChallengeCounterAction:
-            counter_action = self.history[-1][ActionType.CounterAction].action
-            if not isinstance(counter_action, CounterAction):
-                raise TypeError('Expected CounterAction')
-
-            allowed = COUNTER_ACTION_TO_CARD[counter_action] == revealed_card
-
-        else:
-            raise ValueError(f'Unexpected action_type {action_type}')
+        revealed_card, allowed = self._reveal_for_challenge(
+            challenged_player_id, action_type, card_to_reveal
+        )
 
         if allowed:
             # The challenged player was telling the truth, challenging player
             # looses a card.
 
-            self.run_influence_loss(
+            yield from self.step_influence_loss(
                 player_id=challenging_player_id,
                 primary_player_id=primary_player_id
             )
 
-            # The challenged player returns their card to the draw deck, and
-            # then draws a new one.
-
-            self.deck.append(revealed_card)
-            challenged_player.hand.append(self.draw_card())
+            self._replace_revealed_card(challenged_player_id, revealed_card)
 
             # The challenge was unsuccessful.
             return False
@@ -503,6 +874,8 @@ class Engine:
         # Otherwise, the challenged player was lying, and they just don't get
         # back the card they revealed.
 
+        self._record_if_eliminated(self.players[challenged_player_id])
+
         # TODO: Check if this is the case, or if they are instead issued
         # with a choice of what to discard. If that is the case, then the
         # "revealed card" shouldn't be popped from their hand.
@@ -510,90 +883,149 @@ class Engine:
         # The challenge was successful.
         return True
 
-    def run_discard(
+    def _reveal_for_challenge(
+        self,
+        challenged_player_id: int,
+        action_type: (
+            Literal[ActionType.ChallengePrimaryAction]
+            | Literal[ActionType.ChallengeCounterAction]
+        ),
+        card_to_reveal: int,
+    ) -> tuple[Character, bool]:
+        """
+        Takes the revealed card from the challenged player's hand, and returns
+        it and whether it allows the challenged action.
+        """
+
+        # Note that this will make their hand look 1 card smaller than it
+        # should be (which may causes the challenged_player to temporarily look
+        # eliminated).
+        revealed_card = self.players[challenged_player_id].pop_card(
+            card_to_reveal
+        )
+
+        if action_type == ActionType.ChallengePrimaryAction:
+            primary_action = PrimaryAction(
+                self.state.get_action_value(ActionType.PrimaryAction)
+            )
+
+            allowed = PRIMARY_ACTION_TO_CARD[primary_action] == revealed_card
+
+        elif action_type == ActionType.ChallengeCounterAction:
+            counter_action = CounterAction(
+                self.state.get_action_value(ActionType.CounterAction)
+            )
+
+            allowed = COUNTER_ACTION_TO_CARD[counter_action] == revealed_card
+
+        else:
+            raise ValueError(f'Unexpected action_type {action_type}')
+
+        return revealed_card, allowed
+
+    def _replace_revealed_card(
+        self,
+        challenged_player_id: int,
+        revealed_card: Character,
+    ) -> None:
+        """
+        After defending a challenge, the challenged player returns their card
+        to the draw deck, and then draws a new one.
+        """
+
+        self.state.return_card(revealed_card)
+        self.players[challenged_player_id].add_card(self.draw_card())
+
+    def step_discard(
         self,
         player_id: int,
         primary_player_id: int,
-    ) -> Character:
+    ) -> Generator[Decision, Any, Character]:
         """
         Returns the discarded character. Note that this does not discard _to_
         anywhere, so should not be used directly. It should be called through
-        run_influence_loss (which discards to the revealed cards) or
-        run_discard_to_deck (which discards to the deck).
-        """
+        step_influence_loss (which discards to the revealed cards) or
+        step_discard_to_deck (which discards to the deck).
 
-        player = self.players[player_id]
+        The discard is shown to the bot as a ChallengeResponse.
+        """
 
-        game_info = GameInfo(
-            requested_move=RequestedMove.ChallengeResponse,
-            player_id=player_id,
-            balances=self.balances,
-            own_cards=player.hand,
-            revealed_cards=self.revealed_cards,
-            players_cards_num=self.players_cards_num,
-            history=self.history,
-            current_primary_player_id=primary_player_id,
+        card_to_loose_index = yield self._decision(
+            player_id,
+            RequestedMove.DiscardChoice,
+            primary_player_id,
+            game_info_move=RequestedMove.ChallengeResponse,
         )
-        player.bot.game_info = game_info
 
-        card_to_loose_index = player.bot.discard_choice_handler()
+        return self._pop_discard(player_id, card_to_loose_index)
+
+    def _pop_discard(
+        self,
+        player_id: int,
+        card_to_loose_index: int,
+    ) -> Character:
+        """ Checks and takes a discard choice from the player's hand """
+
+        player = self.players[player_id]
 
-        if card_to_loose_index < 0 or card_to_loose_index >= len(player.hand):
+        if card_to_loose_index < 0 or card_to_loose_index >= player.card_num:
             raise Exception(
-                f'Player {player_id} with hand of size {len(player.hand)} '
+                f'Player {player_id} with hand of size {player.card_num} '
                 'gave invalid discard choice of card with index '
                 f'{card_to_loose_index}'
             )
 
-        return player.hand.pop(card_to_loose_index)
+        return player.pop_card(card_to_loose_index)
 
-    def run_influence_loss(
+    def step_influence_loss(
         self,
         player_id: int,
         primary_player_id: int,
-    ) -> None:
+    ) -> Steps:
         player = self.players[player_id]
 
-        if len(player.hand) == 0:
+        if player.card_num == 0:
             # print(
-            #     'WARNING: run_influence_loss on a player with no cards. Doing '
+            #     'WARNING: step_influence_loss on a player with no cards. Doing '
             #     'nothing. I believe this is correct behaviour.'
             # )
             return
 
-        revealed_card = self.run_discard(
+        revealed_card = yield from self.step_discard(
             player_id=player_id,
             primary_player_id=primary_player_id
         )
 
-        self.revealed_cards[revealed_card] += 1
+        self.state.reveal(player_id, revealed_card)
+
+        self._record_if_eliminated(player)
 
-    def run_discard_to_deck(
+    def step_discard_to_deck(
         self,
         player_id: int,
         primary_player_id: int,
-    ) -> None:
+    ) -> Steps:
         player = self.players[player_id]
 
-        if len(player.hand) == 0:
+        if player.card_num == 0:
             print(
-                'WARNING: run_discard_to_deck on a player with no cards. '
+                'WARNING: step_discard_to_deck on a player with no cards. '
                 'Doing nothing. I believe this is correct behaviour.'
             )
 
-        revealed_card = self.run_discard(
+        revealed_card = yield from self.step_discard(
             player_id=player_id,
             primary_player_id=primary_player_id
         )
 
-        self.deck.append(revealed_card)
+        self.state.return_card(revealed_card)
 
-    def run_counter_action(
+    def step_counter_action(
         self,
         primary_action: PrimaryAction,
         target: Optional[int],
         primary_player_id: int,
-    ) -> Optional[int]:
+    ) -> Generator[Decision, Any, Optional[int]]:
         """
         If a counter action was taken, returns the id of the player that took
         the counter action. Otherwise returns None.
@@ -606,7 +1038,7 @@ class Engine:
         """
 
         if target is not None:
-            counter_action = self.run_single_counter_action(
+            counter_action = yield from self.step_single_counter_action(
                 player_id=target,
                 primary_action=primary_action,
                 primary_player_id=primary_player_id,
@@ -624,7 +1056,7 @@ class Engine:
 
         counterer_player_id = self.next_player(primary_player_id)
         while counterer_player_id == primary_player_id:
-            counter_action = self.run_single_counter_action(
+            counter_action = yield from self.step_single_counter_action(
                 player_id=counterer_player_id,
                 primary_action=primary_action,
                 primary_player_id=primary_player_id,
@@ -637,30 +1069,31 @@ class Engine:
 
         return None
 
-    def run_single_counter_action(
+    def step_single_counter_action(
         self,
         player_id: int,
         primary_action: PrimaryAction,
         primary_player_id: int
-    ) -> CounterAction:
+    ) -> Generator[Decision, Any, CounterAction]:
         """
         Returns the counter action issued by the given player.
         """
 
-        player = self.players[player_id]
-        game_info = GameInfo(
-            requested_move=RequestedMove.CounterAction,
-            player_id=player_id,
-            balances=self.balances,
-            own_cards=player.hand,
-            revealed_cards=self.revealed_cards,
-            players_cards_num=self.players_cards_num,
-            history=self.history,
-            current_primary_player_id=primary_player_id,
+        counter_action = yield self._decision(
+            player_id, RequestedMove.CounterAction, primary_player_id
+        )
+
+        return self._apply_counter_action(
+            player_id, primary_action, counter_action
         )
-        player.bot.game_info = game_info
 
-        counter_action = player.bot.counter_action_handler()
+    def _apply_counter_action(
+        self,
+        player_id: int,
+        primary_action: PrimaryAction,
+        counter_action: CounterAction,
+    ) -> CounterAction:
+        """ Checks and records a counter action if one is issued """
 
         if counter_action == CounterAction.NoCounterAction:
             # The player has issued no CounterAction.
@@ -681,22 +1114,20 @@ class Engine:
 
         # Otherwise we update the history and return their counter action.
 
-        action = Action(
+        self.state.set_action(
             action_type=ActionType.CounterAction,
             action=counter_action,
             player_id=player_id,
-            successful=None
         )
-        self.history[-1][ActionType.CounterAction] = action
 
         return counter_action
 
-    def resolve_successful_primary_action(
+    def step_resolve_successful_primary_action(
         self,
         primary_player_id: int,
         primary_action: PrimaryAction,
         target: Optional[int]
-    ) -> None:
+    ) -> Steps:
         primary_player = self.players[primary_player_id]
 
         if primary_action == PrimaryAction.Income:
@@ -709,7 +1140,7 @@ class Engine:
             if target is None:
                 raise ValueError(f'Coup requires a target.')
 
-            self.run_influence_loss(
+            yield from self.step_influence_loss(
                 player_id=target,
                 primary_player_id=primary_player_id
             )
@@ -721,19 +1152,19 @@ class Engine:
             if target is None:
                 raise ValueError(f'Assassinate requires a target.')
 
-            self.run_influence_loss(
+            yield from self.step_influence_loss(
                 player_id=target,
                 primary_player_id=primary_player_id
             )
 
         elif primary_action == PrimaryAction.Exchange:
-            primary_player.hand.append(self.draw_card())
-            primary_player.hand.append(self.draw_card())
-            self.run_discard_to_deck(
+            primary_player.add_card(self.draw_card())
+            primary_player.add_card(self.draw_card())
+            yield from self.step_discard_to_deck(
                 player_id=primary_player_id,
                 primary_player_id=primary_player_id
             )
-            self.run_discard_to_deck(
+            yield from self.step_discard_to_deck(
                 player_id=primary_player_id,
                 primary_player_id=primary_player_id
             )
@@ -772,3 +1203,43 @@ class Engine:
         if self.tied:
             raise Exception("Game was a tie")
         return self.remaining_players[0]
+
+
+def run_batched(
+    engines: list[Engine],
+    policy: Callable[[RequestedMove, list[Decision]], list[Any]],
+) -> None:
+    """
+    Plays many games together. Each round, every game that is still running
+    is advanced to its next decision, and the pending decisions are grouped
+    by requested move and answered by a single policy call per group.
+    """
+
+    running: list[tuple[Steps, Decision]] = []
+    for engine in engines:
+        steps = engine.steps()
+        try:
+            running.append((steps, next(steps)))
+        except StopIteration:
+            pass
+
+    while running:
+        groups: dict[RequestedMove, list[int]] = {}
+        for i, (_, decision) in enumerate(running):
+            groups.setdefault(decision.requested_move, []).append(i)
+
+        answers: list[Any] = [None] * len(running)
+        for requested_move, indexes in groups.items():
+            group_answers = policy(
+                requested_move, [running[i][1] for i in indexes]
+            )
+            for i, answer in zip(indexes, group_answers):
+                answers[i] = answer
+
+        still_running = []
+        for (steps, _), answer in zip(running, answers):
+            try:
+                still_running.append((steps, steps.send(answer)))
+            except StopIteration:
+                pass
+        running = still_running
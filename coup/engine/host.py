@@ -0,0 +1,341 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Literal, Optional, Type
+
+from coup.bots.bots.base_bot import BaseBot
+from coup.bots.enums import (
+    RequestedMove, PrimaryAction, ChallengeAction, CounterAction
+)
+
+from coup.engine.engine import Decision, Engine, bot_answer
+
+
+# The message delimiter of the bot protocol
+DELIMITER = b';'
+
+Transport = Literal['stdio', 'fifo']
+
+
+class BotProcess:
+    """
+    A persistent bot subprocess (such as a built submission.py), spoken to
+    with the same ;-terminated JSON messages as the competition engine uses.
+
+    With the 'stdio' transport messages go over the process's stdin and
+    stdout. With 'fifo' they go over a pair of named pipes, exactly as in the
+    competition, just at temporary paths (passed to BotBattle through
+    COUP_FROM_ENGINE and COUP_TO_ENGINE).
+    """
+
+    def __init__(
+        self,
+        command: list[str],
+        transport: Transport = 'stdio',
+        stderr: Optional[int] = asyncio.subprocess.DEVNULL,
+    ) -> None:
+        self.command = command
+        self.transport = transport
+        self.stderr = stderr
+
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self._fifo_dir: Optional[tempfile.TemporaryDirectory] = None
+        self._fifo_keepalive_fds: list[int] = []
+        self._exited: Optional[asyncio.Future] = None
+
+    async def start(self) -> None:
+        env = dict(os.environ)
+        loop = asyncio.get_running_loop()
+
+        if self.transport == 'stdio':
+            env['COUP_FROM_ENGINE'] = '-'
+            env['COUP_TO_ENGINE'] = '-'
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=self.stderr,
+                env=env,
+            )
+            self.reader = self.process.stdout
+            self.writer = self.process.stdin
+            self._exited = asyncio.ensure_future(self.process.wait())
+            return
+
+        if self.transport != 'fifo':
+            raise ValueError(f'Unknown transport {self.transport}')
+
+        self._fifo_dir = tempfile.TemporaryDirectory(prefix='coup-bot-')
+        from_engine = Path(self._fifo_dir.name) / 'from_engine.pipe'
+        to_engine = Path(self._fifo_dir.name) / 'to_engine.pipe'
+        os.mkfifo(from_engine)
+        os.mkfifo(to_engine)
+        env['COUP_FROM_ENGINE'] = str(from_engine)
+        env['COUP_TO_ENGINE'] = str(to_engine)
+
+        # Holding both pipes open for reading and writing means neither side
+        # blocks waiting for the other to open theirs, and our writes never
+        # fail before the bot has opened its end. These are kept apart from
+        # the ends asyncio uses, which must only see one direction each.
+        self._fifo_keepalive_fds = [
+            os.open(from_engine, os.O_RDWR),
+            os.open(to_engine, os.O_RDWR),
+        ]
+        write_fd = os.open(from_engine, os.O_WRONLY | os.O_NONBLOCK)
+        read_fd = os.open(to_engine, os.O_RDONLY | os.O_NONBLOCK)
+
+        self.reader = asyncio.StreamReader(limit=2**24)
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(self.reader),
+            os.fdopen(read_fd, 'rb', buffering=0),
+        )
+        transport, protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin,
+            os.fdopen(write_fd, 'wb', buffering=0),
+        )
+        self.writer = asyncio.StreamWriter(transport, protocol, None, loop)
+
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=self.stderr,
+            stderr=self.stderr,
+            env=env,
+        )
+        self._exited = asyncio.ensure_future(self.process.wait())
+
+    async def ask(self, message: dict) -> dict:
+        """ Sends a game info message and returns the move sent back """
+        self.writer.write(json.dumps(message).encode() + DELIMITER)
+        await self.writer.drain()
+
+        # A fifo never reaches EOF while we hold it open, so also watch for the
+        # process exiting.
+        read = asyncio.ensure_future(self.reader.readuntil(DELIMITER))
+        await asyncio.wait(
+            (read, self._exited), return_when=asyncio.FIRST_COMPLETED
+        )
+        if not read.done():
+            read.cancel()
+            raise EOFError(f'Bot process {self.command} exited')
+
+        try:
+            move = read.result()
+        except asyncio.IncompleteReadError:
+            raise EOFError(f'Bot process {self.command} exited') from None
+
+        return json.loads(move[:-1])
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        if self.process is not None:
+            if self.transport == 'fifo':
+                # The bot only sees EOF once every writer is closed
+                self.process.terminate()
+            await self.process.wait()
+        for fd in self._fifo_keepalive_fds:
+            os.close(fd)
+        if self._fifo_dir is not None:
+            self._fifo_dir.cleanup()
+
+
+class BotPool:
+    """
+    A bounded pool of identical persistent bot processes. Processes are lent
+    out a game at a time (see lease), so each process sees every one of its
+    seat's decisions of a game, in order, as it would in the competition.
+    """
+
+    def __init__(
+        self,
+        command: list[str],
+        size: int = os.cpu_count() or 1,
+        transport: Transport = 'stdio',
+        stderr: Optional[int] = asyncio.subprocess.DEVNULL,
+    ) -> None:
+        self.command = command
+        self.processes = [
+            BotProcess(command, transport, stderr) for _ in range(size)
+        ]
+        self._idle: Optional[asyncio.Queue] = None
+        self._leasing: Optional[asyncio.Lock] = None
+
+    async def start(self) -> None:
+        self._idle = asyncio.Queue()
+        self._leasing = asyncio.Lock()
+        await asyncio.gather(*(process.start() for process in self.processes))
+        for process in self.processes:
+            self._idle.put_nowait(process)
+
+    @asynccontextmanager
+    async def lease(self, count: int = 1) -> AsyncIterator[list[BotProcess]]:
+        """
+        Lends count free processes (one per seat of a game) until the context
+        exits. The processes of a lease are taken together, so two games
+        each holding some processes and waiting on more cannot stall each
+        other.
+        """
+
+        if count > len(self.processes):
+            raise ValueError(
+                f'A lease of {count} processes is more than the pool of '
+                f'{len(self.processes)}'
+            )
+
+        async with self._leasing:
+            processes = [await self._idle.get() for _ in range(count)]
+        try:
+            yield processes
+        finally:
+            for process in processes:
+                self._idle.put_nowait(process)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(process.close() for process in self.processes))
+
+    async def __aenter__(self) -> 'BotPool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+def decision_message(decision: Decision) -> dict:
+    """ The message the competition engine would send for a decision """
+    message = decision.game_info.to_dictionary()
+    # Engine shows discards to its in-process bots as a ChallengeResponse
+    message['requested_move'] = int(decision.requested_move)
+    return message
+
+
+def parse_move(decision: Decision, move: dict) -> Any:
+    """ Turns a move sent by a bot into the answer to its decision """
+    requested_move = decision.requested_move
+
+    if move['type'] != requested_move.name:
+        raise ValueError(
+            f'Player {decision.player_id} sent a {move["type"]} move when '
+            f'asked for a {requested_move.name}'
+        )
+
+    if requested_move == RequestedMove.PrimaryAction:
+        target = move['target']
+        return (
+            PrimaryAction(int(move['action'])),
+            int(target) if target is not None else None,
+        )
+    elif requested_move == RequestedMove.ChallengeAction:
+        return ChallengeAction(int(move['action']))
+    elif requested_move == RequestedMove.CounterAction:
+        return CounterAction(int(move['action']))
+
+    return int(move['card_index'])
+
+
+async def play_game(engine: Engine, seat_pools: list[Optional[BotPool]]) -> Engine:
+    """
+    Plays a game where the decisions of each seat with a BotPool are made by
+    one process of it, leased for the whole game, and the rest by the
+    engine's in-process bots.
+    """
+
+    async with AsyncExitStack() as stack:
+        seat_processes: list[Optional[BotProcess]] = [None] * len(seat_pools)
+        pools: list[BotPool] = []
+        for pool in seat_pools:
+            if pool is not None and pool not in pools:
+                pools.append(pool)
+        for pool in pools:
+            seats = [seat for seat, seat_pool in enumerate(seat_pools) if seat_pool is pool]
+            processes = await stack.enter_async_context(pool.lease(len(seats)))
+            for seat, process in zip(seats, processes):
+                seat_processes[seat] = process
+
+        steps = engine.steps()
+        try:
+            decision = next(steps)
+            while True:
+                process = seat_processes[decision.player_id]
+                if process is None:
+                    answer = bot_answer(engine.players[decision.player_id].bot, decision)
+                else:
+                    move = await process.ask(decision_message(decision))
+                    answer = parse_move(decision, move)
+                decision = steps.send(answer)
+        except StopIteration:
+            pass
+
+    return engine
+
+
+async def play_games(
+    engines: list[Engine],
+    seat_pools: list[Optional[BotPool]],
+    max_concurrent_games: int = 64,
+) -> list[Engine]:
+    """
+    Plays many games at once, interleaving their decisions over the pools.
+    Each game holds a process per pool seat for its whole life, so a pool of
+    n processes plays at most n games (per seat) at a time, and to keep every
+    process busy there should be at least that many concurrent games.
+    """
+
+    semaphore = asyncio.Semaphore(max_concurrent_games)
+
+    async def play(engine: Engine) -> Engine:
+        async with semaphore:
+            return await play_game(engine, seat_pools)
+
+    return await asyncio.gather(*(play(engine) for engine in engines))
+
+
+async def host_submission(
+    command: list[str],
+    bot_classes: list[Optional[Type[BaseBot]]],
+    game_count: int,
+    processes: int = os.cpu_count() or 1,
+    transport: Transport = 'stdio',
+    seed: int = 0,
+) -> list[Engine]:
+    """
+    Plays game_count games of a submission against in-process bots. The
+    submission sits in every seat whose bot class is None.
+    """
+
+    async with BotPool(command, processes, transport) as pool:
+        seat_pools = [pool if bot_class is None else None for bot_class in bot_classes]
+        engine_bot_classes = [bot_class or BaseBot for bot_class in bot_classes]
+
+        engines = [
+            Engine(engine_bot_classes, debug=False, seed=(seed << 32) + g)
+            for g in range(game_count)
+        ]
+        return await play_games(engines, seat_pools, max_concurrent_games=4 * processes)
+
+
+if __name__ == "__main__":
+    from coup.bots.bots.examples.simple import ExampleSimple
+    from coup.bots.bots.examples.counter import ExampleCounter
+    from coup.bots.bots.examples.challenger import ExampleChallenger
+    from coup.bots.bots.examples.assassin import ExampleAssassin
+
+    # Build this with make_submission.py first
+    SUBMISSION = [sys.executable, 'submission.py']
+    GAME_COUNT = 1000
+
+    # The submission plays in seat 0 (None), the others are in-process bots
+    BOT_CLASSES = [None, ExampleSimple, ExampleCounter, ExampleChallenger, ExampleAssassin]
+
+    engines = asyncio.run(host_submission(SUBMISSION, BOT_CLASSES, GAME_COUNT))
+
+    wins = sum(not e.tied and e.winner.player_id == 0 for e in engines)
+    ties = sum(e.tied for e in engines)
+    print(f"Submission won {wins}/{GAME_COUNT} games ({ties} ties)")
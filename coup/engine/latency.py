@@ -0,0 +1,132 @@
+from time import perf_counter_ns
+from typing import Any, Callable
+
+from coup.bots.bots.base_bot import BaseBot
+
+
+# The bot methods the engine calls for moves
+HANDLER_NAMES = (
+    'primary_action_handler',
+    'challenge_action_handler',
+    'counter_action_handler',
+    'challenge_response_handler',
+    'discard_choice_handler',
+)
+
+# Each power of two of nanoseconds is split into 2 ** SUB_BUCKET_BITS
+# buckets, so a bucket is at most 25% wide. Below 2 ** (SUB_BUCKET_BITS + 1)
+# every value has its own bucket.
+SUB_BUCKET_BITS = 2
+_EXACT_LIMIT = 1 << (SUB_BUCKET_BITS + 1)
+
+# Enough buckets for any 64 bit duration
+BUCKET_COUNT = 64 << SUB_BUCKET_BITS
+
+
+def bucket_index(ns: int) -> int:
+    if ns < _EXACT_LIMIT:
+        return ns
+    shift = ns.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (ns >> shift)
+
+
+def bucket_upper_bound(index: int) -> int:
+    """ The largest duration in ns that falls in a bucket """
+    index += 1
+    if index < _EXACT_LIMIT:
+        return index - 1
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    top = (index & ((1 << SUB_BUCKET_BITS) - 1)) | (1 << SUB_BUCKET_BITS)
+    return (top << shift) - 1
+
+
+class HandlerLatency:
+    """ A histogram of the durations of the calls to one handler """
+
+    __slots__ = ('calls', 'total_ns', 'max_ns', 'buckets')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * BUCKET_COUNT
+
+    def add(self, ns: int) -> None:
+        self.calls += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.buckets[bucket_index(ns)] += 1
+
+    def merge(self, other: 'HandlerLatency') -> None:
+        self.calls += other.calls
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        for i, count in enumerate(other.buckets):
+            self.buckets[i] += count
+
+    def percentile(self, q: float) -> int:
+        """
+        The duration in ns that a fraction q of the calls took at most (the
+        upper bound of its bucket, so accurate to within 25%).
+        """
+
+        if self.calls == 0:
+            return 0
+
+        rank = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(bucket_upper_bound(i), self.max_ns)
+        return self.max_ns
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.calls if self.calls else 0.0
+
+
+class LatencyStats:
+    """
+    The HandlerLatency of each handler of each bot class. Give one to an
+    Engine to have it time every move of its bots (see instrument_bot), and
+    share it between engines to collect many games.
+    """
+
+    def __init__(self) -> None:
+        self.handlers: dict[tuple[str, str], HandlerLatency] = {}
+
+    def handler(self, bot_name: str, handler_name: str) -> HandlerLatency:
+        key = (bot_name, handler_name)
+        latency = self.handlers.get(key)
+        if latency is None:
+            latency = self.handlers[key] = HandlerLatency()
+        return latency
+
+    def merge(self, other: 'LatencyStats') -> None:
+        for (bot_name, handler_name), latency in other.handlers.items():
+            self.handler(bot_name, handler_name).merge(latency)
+
+
+def _timed(handler: Callable[[], Any], latency: HandlerLatency) -> Callable[[], Any]:
+    def timed_handler() -> Any:
+        start = perf_counter_ns()
+        result = handler()
+        latency.add(perf_counter_ns() - start)
+        return result
+    return timed_handler
+
+
+def instrument_bot(bot: BaseBot, stats: LatencyStats) -> None:
+    """
+    Times every handler call of a bot into stats. The timed handlers are set
+    on the bot instance, shadowing its methods, so the engine calls them as
+    usual and bots that are not instrumented pay nothing at all.
+    """
+
+    bot_name = type(bot).__name__
+    for handler_name in HANDLER_NAMES:
+        setattr(bot, handler_name, _timed(
+            getattr(bot, handler_name), stats.handler(bot_name, handler_name)
+        ))
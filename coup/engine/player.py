@@ -1,18 +1,50 @@
 from coup.bots.enums import Character
 from coup.bots.bots.base_bot import BaseBot
 
+from coup.engine.state import GameState
+
 
 class Player:
-    def __init__(self, bot: BaseBot, player_id: int, hand: list[Character]):
+    def __init__(self, bot: BaseBot, player_id: int, state: GameState):
+        """
+        The balance and hand of a player live in the engine's GameState, this
+        is just the player's bot plus a convenient handle on its part of the
+        state.
+        """
+
         self.bot = bot
         self.player_id = player_id
-        self.hand = hand
 
-        self.balance = 2
+        self.state = state
+
+    @property
+    def balance(self) -> int:
+        return self.state.balances[self.player_id]
+
+    @balance.setter
+    def balance(self, balance: int) -> None:
+        self.state.balances[self.player_id] = balance
+
+    @property
+    def hand(self) -> tuple[Character, ...]:
+        """
+        The player's hand, read only, change it with pop_card and add_card
+        """
+        return self.state.hand(self.player_id)
+
+    @property
+    def card_num(self) -> int:
+        return self.state.cards_num[self.player_id]
+
+    def pop_card(self, index: int) -> Character:
+        return self.state.pop_card(self.player_id, index)
+
+    def add_card(self, card: Character) -> None:
+        self.state.add_card(self.player_id, card)
 
     @property
     def eliminated(self) -> bool:
-        return len(self.hand) == 0
+        return self.state.cards_num[self.player_id] == 0
 
     def __repr__(self):
         return f'P{self.player_id} ({str(self.bot)})'
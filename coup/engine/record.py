@@ -0,0 +1,314 @@
+import mmap
+import struct
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+from coup.bots.bots.base_bot import BaseBot
+from coup.bots.enums import RequestedMove, PrimaryAction, ChallengeAction, CounterAction
+
+from coup.common.rules import NUMBER_OF_PLAYERS
+
+from coup.engine.state import HAND_SLOTS
+from coup.engine.engine import Decision, Engine, Steps, bot_answer
+
+
+# A file of game records starts with this, and is then a sequence of entries
+# each starting with one of the entry tags.
+MAGIC = b'COUPREC1'
+
+# Gives the next bot id its name, as a u8 length and utf-8 bytes
+NAME_TAG = b'N'
+MAX_NAME_BYTES = 0xff
+# A game record, see GameRecord.pack
+GAME_TAG = b'G'
+
+# seed, the bot id of each seat, the two dealt cards of each seat, and the
+# number of eliminated players, history turns and decisions
+_HEADER = struct.Struct(f'<Q{NUMBER_OF_PLAYERS}H{2 * NUMBER_OF_PLAYERS}BBHH')
+MAX_SEED = 2**64 - 1
+
+# A primary action answer is packed into one byte as the action in the high
+# bits and the target plus one (0 for no target) in the low bits.
+TARGET_BITS = 3
+TARGET_MASK = (1 << TARGET_BITS) - 1
+
+
+def encode_answer(requested_move: RequestedMove, answer: Any) -> int:
+    """ Packs the answer to a decision into a byte """
+    if requested_move == RequestedMove.PrimaryAction:
+        primary_action, target = answer
+        return (int(primary_action) << TARGET_BITS) | (
+            target + 1 if target is not None else 0
+        )
+    return int(answer)
+
+
+def decode_answer(requested_move: RequestedMove, value: int) -> Any:
+    """ The inverse of encode_answer """
+    if requested_move == RequestedMove.PrimaryAction:
+        target = value & TARGET_MASK
+        return (
+            PrimaryAction(value >> TARGET_BITS),
+            target - 1 if target != 0 else None,
+        )
+    elif requested_move == RequestedMove.ChallengeAction:
+        return ChallengeAction(value)
+    elif requested_move == RequestedMove.CounterAction:
+        return CounterAction(value)
+    return value
+
+
+@dataclass
+class GameRecord:
+    """
+    Everything about a game that was played: the engine seed, the bot of each
+    seat, the deal, the packed history (see state.pack_turn), the order
+    players were eliminated in and the answer to every decision (see
+    encode_answer).
+
+    The decisions are all that is needed to replay the game (see replay),
+    since the seed gives every draw from the deck. The rest is kept so that
+    games can be analysed without replaying them.
+    """
+
+    seed: int
+    bot_names: list[str]
+    deal: list[tuple[int, int]]
+    history: array
+    eliminated_player_ids: list[int]
+    decisions: bytes
+
+    @property
+    def turns(self) -> int:
+        return len(self.history)
+
+    @property
+    def tied(self) -> bool:
+        return len(self.eliminated_player_ids) < NUMBER_OF_PLAYERS - 1
+
+    def pack(self, bot_ids: list[int]) -> bytes:
+        """ The record as bytes, with the given file bot ids for its seats """
+        if not 0 <= self.seed <= MAX_SEED:
+            raise ValueError(
+                f'The engine seed {self.seed} does not fit in the 64 bit '
+                'seed of a record, only games of engines seeded from 0 to '
+                f'{MAX_SEED} can be recorded'
+            )
+
+        return b''.join((
+            _HEADER.pack(
+                self.seed,
+                *bot_ids,
+                *(card for hand in self.deal for card in hand),
+                len(self.eliminated_player_ids),
+                len(self.history),
+                len(self.decisions),
+            ),
+            bytes(self.eliminated_player_ids),
+            self.history.tobytes(),
+            self.decisions,
+        ))
+
+    @staticmethod
+    def unpack(
+        data: bytes | mmap.mmap,
+        offset: int,
+        bot_names: list[str],
+    ) -> tuple['GameRecord', int]:
+        """ The record packed at offset, and the offset after it """
+        header = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+
+        seed = header[0]
+        bot_ids = header[1:1 + NUMBER_OF_PLAYERS]
+        cards = header[1 + NUMBER_OF_PLAYERS:1 + 3 * NUMBER_OF_PLAYERS]
+        eliminated_count, turn_count, decision_count = header[-3:]
+
+        eliminated_player_ids = list(data[offset:offset + eliminated_count])
+        offset += eliminated_count
+
+        history = array('Q')
+        history.frombytes(data[offset:offset + turn_count * history.itemsize])
+        offset += turn_count * history.itemsize
+
+        decisions = bytes(data[offset:offset + decision_count])
+        offset += decision_count
+
+        record = GameRecord(
+            seed=seed,
+            bot_names=[bot_names[i] for i in bot_ids],
+            deal=[(cards[2 * i], cards[2 * i + 1]) for i in range(NUMBER_OF_PLAYERS)],
+            history=history,
+            eliminated_player_ids=eliminated_player_ids,
+            decisions=decisions,
+        )
+        return record, offset
+
+
+def _recording(steps: Steps, decisions: bytearray) -> Steps:
+    """ Passes the decisions of steps through, recording each answer """
+    try:
+        decision = next(steps)
+        while True:
+            answer = yield decision
+            decisions.append(encode_answer(decision.requested_move, answer))
+            decision = steps.send(answer)
+    except StopIteration:
+        pass
+
+
+def _deal(engine: Engine) -> list[tuple[int, int]]:
+    hands = engine.state.hands
+    return [
+        (hands[player_id * HAND_SLOTS], hands[player_id * HAND_SLOTS + 1])
+        for player_id in range(NUMBER_OF_PLAYERS)
+    ]
+
+
+def record_game(engine: Engine) -> GameRecord:
+    """
+    Plays a new game with the engine's bots (as Engine.run_game) and
+    returns its record.
+    """
+
+    if engine.turn != 0 or len(engine.state.history) != 0:
+        raise ValueError('Only a game that has not started can be recorded')
+
+    deal = _deal(engine)
+
+    decisions = bytearray()
+    steps = _recording(engine.steps(), decisions)
+    try:
+        decision = next(steps)
+        while True:
+            bot = engine.players[decision.player_id].bot
+            decision = steps.send(bot_answer(bot, decision))
+    except StopIteration:
+        pass
+
+    return GameRecord(
+        seed=engine.seed,
+        bot_names=[type(player.bot).__name__ for player in engine.players],
+        deal=deal,
+        history=engine.state.history[:],
+        eliminated_player_ids=[
+            player.player_id for player in engine.eliminated_players
+        ],
+        decisions=bytes(decisions),
+    )
+
+
+def replay(record: GameRecord) -> Iterator[tuple[Decision, Any]]:
+    """
+    Replays a recorded game, yielding each decision with the answer that was
+    given to it. No bots are run, the answers come from the record.
+
+    The decision's GameInfo is exactly what the deciding bot was shown, and
+    is valid until the replay is advanced. So to look at the game at one
+    decision point, stop there (see decision_at).
+    """
+
+    engine = Engine([BaseBot] * NUMBER_OF_PLAYERS, debug=False, seed=record.seed)
+    if _deal(engine) != record.deal:
+        raise ValueError(
+            'The deal of the record does not match its seed, it was recorded '
+            'with a different engine'
+        )
+
+    steps = engine.steps()
+    decisions = iter(record.decisions)
+    try:
+        decision = next(steps)
+        while True:
+            value = next(decisions, None)
+            if value is None:
+                raise ValueError('The record ends before its game does')
+
+            answer = decode_answer(decision.requested_move, value)
+            yield decision, answer
+            decision = steps.send(answer)
+    except StopIteration:
+        pass
+
+    if engine.state.history != record.history:
+        raise ValueError('The replayed history does not match the record')
+
+
+def decision_at(record: GameRecord, index: int) -> Decision:
+    """ The decision with the given index in a recorded game """
+    for i, (decision, _) in enumerate(replay(record)):
+        if i == index:
+            return decision
+
+    raise IndexError(f'The game has no decision {index}')
+
+
+class GameRecordWriter:
+    """
+    Writes game records to a binary file. Bot names are written once each,
+    the first time a record uses them, and records refer to them by id.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.file = open(path, 'wb')
+        self.bot_ids: dict[str, int] = {}
+        self.file.write(MAGIC)
+
+    def _bot_id(self, name: str) -> int:
+        bot_id = self.bot_ids.get(name)
+        if bot_id is None:
+            encoded = name.encode()
+            if len(encoded) > MAX_NAME_BYTES:
+                raise ValueError(
+                    f'The bot name {name!r} is {len(encoded)} bytes, a record '
+                    f'file can only hold names of up to {MAX_NAME_BYTES}'
+                )
+            self.file.write(NAME_TAG + bytes((len(encoded),)) + encoded)
+            bot_id = self.bot_ids[name] = len(self.bot_ids)
+        return bot_id
+
+    def write(self, record: GameRecord) -> None:
+        bot_ids = [self._bot_id(name) for name in record.bot_names]
+        self.file.write(GAME_TAG + record.pack(bot_ids))
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> 'GameRecordWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_game_records(path: Path) -> Iterator[GameRecord]:
+    """
+    Yields the records of a file written by GameRecordWriter. The file is
+    memory mapped, so only the records being looked at are ever in memory.
+    """
+
+    with open(path, 'rb') as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a game record file')
+
+        bot_names: list[str] = []
+        offset = len(MAGIC)
+        while offset < len(data):
+            tag = data[offset:offset + 1]
+            offset += 1
+
+            if tag == NAME_TAG:
+                length = data[offset]
+                bot_names.append(data[offset + 1:offset + 1 + length].decode())
+                offset += 1 + length
+            elif tag == GAME_TAG:
+                record, offset = GameRecord.unpack(data, offset, bot_names)
+                yield record
+            else:
+                raise ValueError(
+                    f'Unknown entry {tag!r} at offset {offset - 1} of {path}'
+                )
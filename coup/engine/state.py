@@ -0,0 +1,450 @@
+from array import array
+from random import Random
+from typing import Optional
+
+from coup.bots.enums import (
+    Character, ActionType, PrimaryAction, ChallengeAction, CounterAction,
+    ActionEnum
+)
+from coup.bots.action import Action
+from coup.bots.belief import pack_reveal
+
+from coup.common.rules import NUMBER_OF_PLAYERS, NUMBER_OF_EACH_CARD_IN_DECK
+
+
+# The most cards a player can hold at once (two cards plus the two drawn
+# during an Exchange).
+HAND_SLOTS = 4
+
+# Empty hand slots hold 0, which is not a Character value.
+EMPTY_SLOT = 0
+
+
+# Each turn of the history is packed into a single 64 bit integer. Each
+# ActionType gets its own byte, at bit 8 * (action_type - 1):
+#
+#   bits 0-2  the action value (0 if the ActionType is not in the turn)
+#   bits 3-5  the player id
+#   bits 6-7  successful (0 for None, 1 for False, 2 for True)
+#
+# The primary action target is stored above those, at TARGET_SHIFT, as the
+# target id plus one (0 for no target).
+ACTION_BITS = 8
+ACTION_MASK = 0b111
+PLAYER_SHIFT = 3
+SUCCESSFUL_SHIFT = 6
+SUCCESSFUL_MASK = 0b11 << SUCCESSFUL_SHIFT
+TARGET_SHIFT = ACTION_BITS * len(ActionType)
+
+_SUCCESSFUL_TO_BITS: dict[Optional[bool], int] = {None: 0, False: 1, True: 2}
+_BITS_TO_SUCCESSFUL: tuple[Optional[bool], ...] = (None, False, True)
+
+# Lookups from a packed value back to its enum, much faster than calling the
+# enum itself.
+_ACTION_ENUMS = {
+    ActionType.PrimaryAction: PrimaryAction,
+    ActionType.ChallengePrimaryAction: ChallengeAction,
+    ActionType.CounterAction: CounterAction,
+    ActionType.ChallengeCounterAction: ChallengeAction,
+}
+_VALUE_TO_ACTION = {
+    action_type: {int(action): action for action in enum}
+    for action_type, enum in _ACTION_ENUMS.items()
+}
+_VALUE_TO_CHARACTER: tuple[Optional[Character], ...] = (
+    None, *sorted(Character)
+)
+
+
+# The shift of the byte of each ActionType, indexed by ActionType.
+_ACTION_SHIFTS: tuple[int, ...] = (
+    0, *(ACTION_BITS * (action_type - 1) for action_type in sorted(ActionType))
+)
+
+
+def pack_action(
+    record: int,
+    action_type: ActionType,
+    action: int,
+    player_id: int,
+    target: Optional[int] = None,
+) -> int:
+    """
+    Returns the record with the given action added (with unknown success).
+    """
+
+    shift = _ACTION_SHIFTS[action_type]
+    record &= ~(0xff << shift)
+    record |= (action | (player_id << PLAYER_SHIFT)) << shift
+
+    if action_type == ActionType.PrimaryAction:
+        record &= ~(ACTION_MASK << TARGET_SHIFT)
+        if target is not None:
+            record |= (target + 1) << TARGET_SHIFT
+
+    return record
+
+
+# For each ActionType, the mask keeping everything but its successful bits, and
+# the bits of each successful value.
+_SUCCESSFUL_CLEAR_MASKS: tuple[int, ...] = tuple(
+    ~(SUCCESSFUL_MASK << shift) for shift in _ACTION_SHIFTS
+)
+_SUCCESSFUL_BITS: tuple[dict[Optional[bool], int], ...] = tuple(
+    {
+        successful: (bits << SUCCESSFUL_SHIFT) << shift
+        for successful, bits in _SUCCESSFUL_TO_BITS.items()
+    }
+    for shift in _ACTION_SHIFTS
+)
+
+
+def pack_successful(
+    record: int,
+    action_type: ActionType,
+    successful: Optional[bool],
+) -> int:
+    """
+    Returns the record with the success of the given action set.
+    """
+
+    return (
+        (record & _SUCCESSFUL_CLEAR_MASKS[action_type])
+        | _SUCCESSFUL_BITS[action_type][successful]
+    )
+
+
+def unpack_action_value(record: int, action_type: ActionType) -> int:
+    """
+    The value of the action of the given type, or 0 if there is none.
+    """
+
+    return (record >> _ACTION_SHIFTS[action_type]) & ACTION_MASK
+
+
+def pack_turn(turn: dict[ActionType, Action]) -> int:
+    record = 0
+    for action_type, action in turn.items():
+        record = pack_action(
+            record,
+            action_type,
+            action.action,
+            action.player_id,
+            action.target,
+        )
+        record = pack_successful(record, action_type, action.successful)
+    return record
+
+
+# (ActionType, shift, value to action lookup) for each ActionType in order.
+_UNPACK_FIELDS = tuple(
+    (action_type, _ACTION_SHIFTS[action_type], _VALUE_TO_ACTION[action_type])
+    for action_type in ActionType
+)
+
+
+def unpack_turn(record: int) -> dict[ActionType, Action]:
+    turn: dict[ActionType, Action] = {}
+
+    for action_type, shift, value_to_action in _UNPACK_FIELDS:
+        byte = (record >> shift) & 0xff
+        action_value = byte & ACTION_MASK
+        if action_value == 0:
+            continue
+
+        target = None
+        if action_type == ActionType.PrimaryAction:
+            target_bits = (record >> TARGET_SHIFT) & ACTION_MASK
+            if target_bits != 0:
+                target = target_bits - 1
+
+        turn[action_type] = Action(
+            action_type=action_type,
+            action=value_to_action[action_value],
+            player_id=(byte >> PLAYER_SHIFT) & ACTION_MASK,
+            successful=_BITS_TO_SUCCESSFUL[byte >> SUCCESSFUL_SHIFT],
+            target=target,
+        )
+
+    return turn
+
+
+class GameState:
+    """
+    The complete public and private state of a game, as flat integer arrays.
+
+    - balances: the coins of each player.
+    - cards_num: the number of cards in each player's hand.
+    - hands: HAND_SLOTS Character values per player, filled from the left in
+      hand order, with EMPTY_SLOT after the last card.
+    - revealed: the number of each Character revealed, at index value - 1.
+    - deck: the number of each Character in the deck, at index value - 1. The
+      deck has no order, every draw is uniformly random.
+    - deck_size: the number of cards in the deck, kept up to date by
+      draw_card and return_card so drawing need not add up the deck.
+    - history: one packed record per turn (see pack_turn), the last being the
+      turn currently being played.
+    - reveals: one packed record per revealed card, in the order they were
+      revealed, of who revealed what in which turn (see belief.pack_reveal).
+
+    Copying only copies the arrays, and the state can be hashed and compared,
+    so it is cheap to keep many of them around, for example in a search.
+
+    A state may have a GameStateView attached. While it does, the hands and
+    the history are only kept up to date in the view, which is what the
+    engine and the bots read during a game, and the hands and history arrays
+    are brought up to date from it when they are next read. So with a view
+    attached, those two arrays must only be changed through the state's
+    methods. Copies never have a view.
+    """
+
+    __slots__ = (
+        'balances', 'cards_num', '_hands', 'revealed', 'deck', 'deck_size',
+        '_history', 'reveals', 'view'
+    )
+
+    def __init__(self) -> None:
+        self.balances = array('H', [2] * NUMBER_OF_PLAYERS)
+        self.cards_num = array('B', [0] * NUMBER_OF_PLAYERS)
+        self._hands = array('B', [EMPTY_SLOT] * (NUMBER_OF_PLAYERS * HAND_SLOTS))
+        self.revealed = array('B', [0] * len(Character))
+        self.deck = array('B', [NUMBER_OF_EACH_CARD_IN_DECK] * len(Character))
+        self.deck_size = NUMBER_OF_EACH_CARD_IN_DECK * len(Character)
+        self._history = array('Q')
+        self.reveals = array('I')
+
+        self.view: Optional['GameStateView'] = None
+
+    @property
+    def hands(self) -> array:
+        if self.view is not None:
+            hands = self._hands
+            for player_id, hand in enumerate(self.view.hands):
+                start = player_id * HAND_SLOTS
+                hands[start:start + HAND_SLOTS] = array(
+                    'B', hand + [EMPTY_SLOT] * (HAND_SLOTS - len(hand))
+                )
+        return self._hands
+
+    @hands.setter
+    def hands(self, hands: array) -> None:
+        self._hands = hands
+
+    @property
+    def history(self) -> array:
+        if self.view is not None:
+            # Only the last packed turn can have changed since the history was
+            # last read, the turns before it were complete.
+            history = self._history
+            turns = self.view.history
+            packed_turns = max(len(history) - 1, 0)
+            del history[packed_turns:]
+            history.extend(pack_turn(turn) for turn in turns[packed_turns:])
+        return self._history
+
+    @history.setter
+    def history(self, history: array) -> None:
+        self._history = history
+
+    def copy(self) -> 'GameState':
+        state = GameState.__new__(GameState)
+        state.balances = self.balances[:]
+        state.cards_num = self.cards_num[:]
+        state._hands = self.hands[:]
+        state.revealed = self.revealed[:]
+        state.deck = self.deck[:]
+        state.deck_size = self.deck_size
+        state._history = self.history[:]
+        state.reveals = self.reveals[:]
+        state.view = None
+        return state
+
+    def key(self) -> bytes:
+        """ A bytes key that is equal for equal states """
+        return b''.join((
+            self.balances.tobytes(),
+            self.cards_num.tobytes(),
+            self.hands.tobytes(),
+            self.revealed.tobytes(),
+            self.deck.tobytes(),
+            self.history.tobytes(),
+            self.reveals.tobytes(),
+        ))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def hand(self, player_id: int) -> tuple[Character, ...]:
+        if self.view is not None:
+            return tuple(self.view.hands[player_id])
+
+        start = player_id * HAND_SLOTS
+        return tuple(
+            _VALUE_TO_CHARACTER[value]
+            for value in self._hands[start:start + self.cards_num[player_id]]
+        )
+
+    def pop_card(self, player_id: int, index: int) -> Character:
+        """ Removes and returns the card at the given index of a hand """
+        cards_num = self.cards_num[player_id]
+        if index < 0 or index >= cards_num:
+            raise IndexError(
+                f'Player {player_id} has no card at index {index}'
+            )
+        self.cards_num[player_id] = cards_num - 1
+
+        if self.view is not None:
+            return self.view.hands[player_id].pop(index)
+
+        start = player_id * HAND_SLOTS
+        hands = self._hands
+        card = hands[start + index]
+
+        # Shift the cards after it down to keep the hand in order.
+        end = start + cards_num
+        hands[start + index:end - 1] = hands[start + index + 1:end]
+        hands[end - 1] = EMPTY_SLOT
+
+        return _VALUE_TO_CHARACTER[card]
+
+    def add_card(self, player_id: int, card: Character) -> None:
+        """ Adds a card to the end of a hand """
+        cards_num = self.cards_num[player_id]
+        if cards_num == HAND_SLOTS:
+            raise ValueError(f'Player {player_id} has a full hand')
+        self.cards_num[player_id] = cards_num + 1
+
+        if self.view is not None:
+            self.view.hands[player_id].append(card)
+        else:
+            self._hands[player_id * HAND_SLOTS + cards_num] = card
+
+    def reveal(self, player_id: int, card: Character) -> None:
+        """ Reveals a card lost by a player in the current turn """
+        self.revealed[card - 1] += 1
+
+        turns = self.view.history if self.view is not None else self._history
+        self.reveals.append(pack_reveal(len(turns) - 1, player_id, card))
+
+        if self.view is not None:
+            self.view.revealed_cards[card] += 1
+
+    def draw_card(self, rng: Random) -> Character:
+        """ Removes and returns a uniformly random card of the deck """
+        # Picking the index of a card in the deck, then finding which
+        # Character it falls on, takes the same time whatever the deck holds.
+        deck = self.deck
+        index = rng.randrange(self.deck_size)
+        for i, count in enumerate(deck):
+            if index < count:
+                deck[i] = count - 1
+                self.deck_size -= 1
+                return _VALUE_TO_CHARACTER[i + 1]
+            index -= count
+
+        raise ValueError('Card index out of range of the deck')
+
+    def return_card(self, card: Character) -> None:
+        """ Returns a card to the deck """
+        self.deck[card - 1] += 1
+        self.deck_size += 1
+
+    def start_turn(self) -> None:
+        if self.view is not None:
+            self.view.history.append({})
+        else:
+            self._history.append(0)
+
+    def set_action(
+        self,
+        action_type: ActionType,
+        action: ActionEnum,
+        player_id: int,
+        target: Optional[int] = None,
+    ) -> None:
+        """ Adds an action (of unknown success) to the current turn """
+        if self.view is not None:
+            self.view.history[-1][action_type] = Action(
+                action_type=action_type,
+                action=action,
+                player_id=player_id,
+                successful=None,
+                target=target,
+            )
+        else:
+            self._history[-1] = pack_action(
+                self._history[-1], action_type, action, player_id, target
+            )
+
+    def set_successful(
+        self,
+        action_type: ActionType,
+        successful: Optional[bool],
+    ) -> None:
+        """ Sets the success of an action of the current turn """
+        if self.view is not None:
+            self.view.history[-1][action_type].successful = successful
+        else:
+            self._history[-1] = (
+                (self._history[-1] & _SUCCESSFUL_CLEAR_MASKS[action_type])
+                | _SUCCESSFUL_BITS[action_type][successful]
+            )
+
+    def get_action_value(self, action_type: ActionType) -> int:
+        """ The value of an action of the current turn, or 0 if there is none """
+        if self.view is not None:
+            action = self.view.history[-1].get(action_type)
+            return 0 if action is None else int(action.action)
+
+        return unpack_action_value(self._history[-1], action_type)
+
+
+class GameStateView:
+    """
+    The GameInfo style structures of a GameState: a history list of Action
+    dicts, a revealed_cards dict and a hand list per player.
+
+    The view is built once from the state, and from then on the state updates
+    it in place as it changes, so the structures can be shared with GameInfo
+    objects for the whole game without ever being decoded again. The balances
+    and card counts need no view, the state's arrays are used directly. The
+    state's hands and history arrays are instead brought up to date from the
+    view when read.
+
+    If the decoded history of the state is already known (from the view of
+    the state this one was copied from), it can be given to save decoding it
+    again. The completed turns are shared, only the last turn, which is the
+    only one ever changed, is decoded afresh.
+    """
+
+    def __init__(
+        self,
+        state: GameState,
+        history: Optional[list[dict[ActionType, Action]]] = None,
+    ) -> None:
+        self.state = state
+        packed_history = state.history
+
+        if history is None:
+            shared_turns = 0
+            self.history: list[dict[ActionType, Action]] = []
+        else:
+            shared_turns = max(len(history) - 1, 0)
+            self.history = history[:shared_turns]
+
+        self.history.extend(
+            unpack_turn(record) for record in packed_history[shared_turns:]
+        )
+        self.revealed_cards: dict[Character, int] = {
+            character: state.revealed[character - 1] for character in Character
+        }
+        self.hands: list[list[Character]] = [
+            list(state.hand(player_id)) for player_id in range(NUMBER_OF_PLAYERS)
+        ]
+
+        state.view = self
@@ -1,5 +1,6 @@
 from coup.tree.game_tree_node import GameTreeNode, MultipleDeciderNode
 from coup.tree.challenge_result_node import ChallengeResultNode
+from coup.tree.primary_action_result_node import PrimaryActionResultNode
 
 from coup.bots.enums import Character
 
@@ -36,6 +37,9 @@ class ChallengeNode(MultipleDeciderNode):
                     primary_player_id=self.primary_player_id,
                     perspective_player_id=self.perspective_player_id,
                     perspective_hand=self.perspective_hand,
+                    hand_beliefs=self.hand_beliefs,
+                    transposition_table=self.transposition_table,
+                    state_hash=self.state_hash,
 
                     challenged_player_id=self.subject_player_id,
                     claimed_card=self.claimed_card,
@@ -50,8 +54,23 @@ class ChallengeNode(MultipleDeciderNode):
                 starting_player_id=current_player_id
             )
 
-        # Add the child for no player making the decision.
+        # Add the child for no player making the decision, the action goes
+        # ahead.
+        # TODO: Let counter actions be made first.
+        self.children.append(
+            PrimaryActionResultNode(
+                players=self.players,
+                revealed_cards=self.revealed_cards,
+                primary_player_id=self.primary_player_id,
+                perspective_player_id=self.perspective_player_id,
+                perspective_hand=self.perspective_hand,
+                hand_beliefs=self.hand_beliefs,
+                transposition_table=self.transposition_table,
+                state_hash=self.state_hash,
 
-        # TODO: This.
+                unresolved_primary_action=self.unresolved_primary_action,
+                unresolved_primary_action_target_id=self.unresolved_primary_action_target_id,  # nopep8
+            )
+        )
 
         return self.children
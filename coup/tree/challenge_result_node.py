@@ -42,7 +42,9 @@ class ChallengeResultNode(NonPrimaryNode):
             # revealed.
             for card in set(self.perspective_hand):
                 if card == self.claimed_card:
-
+                    # TODO: the claimed card is shown and swapped, the
+                    # challenging player loses a card instead
+                    pass
 
         for loosing_player_id in (
             self.challenged_player_id,
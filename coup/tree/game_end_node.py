@@ -1,6 +1,7 @@
 from coup.common.rules import NUMBER_OF_PLAYERS
 
 from coup.tree.game_tree_node import GameTreeNode
+from coup.tree.transposition import EXACT_DEPTH
 
 """END LOCAL IMPORTS"""
 
@@ -19,10 +20,10 @@ class GameEndNode(GameTreeNode):
     ) -> None:
         """
         This is a terminal node, there are no child states. The tree is already
-        generated.
+        generated, and its evaluation is final however deep the search.
         """
 
-        return
+        self.search_depth = EXACT_DEPTH
 
     def evaluate(self) -> tuple[list[float], bool]:
         """
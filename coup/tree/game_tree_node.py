@@ -1,10 +1,21 @@
 from coup.bots.enums import Character, PrimaryAction
 from coup.bots.game_info import Player
+from coup.bots.belief import HandBeliefs
+from coup.tree.transposition import (
+    TranspositionTable,
+    state_hash,
+    update_balance,
+    update_card_num,
+    update_hand,
+    update_primary_player,
+    update_revealed,
+    zobrist_key,
+)
 from coup.common.rules import NUMBER_OF_PLAYERS, NUMBER_OF_EACH_CARD_IN_DECK
 
 """END LOCAL IMPORTS"""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Optional
 from fractions import Fraction
 
@@ -28,6 +39,24 @@ class GameTreeNode:
     # players list. I'll just have to try to keep both updated.
     perspective_hand: list[Character]
 
+    # What the perspective player believes the other players hold, from what
+    # they did before the root of the tree. None to assume nothing about them.
+    hand_beliefs: Optional[HandBeliefs] = None
+
+    # Evaluations shared by every node of the tree, so that a state reached
+    # by different orders of actions is only searched once. None to search
+    # every path.
+    transposition_table: Optional[TranspositionTable] = None
+
+    # The Zobrist hash of players, revealed_cards, primary_player_id and the
+    # perspective. Children that share those with their parent should be
+    # given the parent's, anything else is hashed when first needed.
+    state_hash: Optional[int] = None
+
+    # How many actions deep the tree below this node was generated, which its
+    # evaluation is only as good as (see generate_tree).
+    search_depth: int = 0
+
     # None unless the children have been generated.
     children: Optional[list['GameTreeNode']] = None
 
@@ -66,11 +95,22 @@ class GameTreeNode:
     ) -> None:
         """
         Generates the game tree from this node down to a given depth.
+
+        With a transposition_table, each node is evaluated as soon as the tree
+        below it is generated, which puts it in the table. A state reached
+        again later in the same generation (by a different order of actions)
+        is then not expanded again, so the same budget searches deeper.
         """
 
+        self.search_depth = max(self.search_depth, to_depth - current_depth)
+
         if current_depth == to_depth:
             return
 
+        # A state that has already been searched as deep needs no children
+        if self._transposition_lookup() is not None:
+            return
+
         children = self._generate_own_children()
         for child in children:
             child.generate_tree(
@@ -78,6 +118,9 @@ class GameTreeNode:
                 current_depth=current_depth + 1
             )
 
+        if self.transposition_table is not None:
+            self.evaluate()
+
     def _next_player_id(
         self,
         *,
@@ -98,6 +141,125 @@ class GameTreeNode:
 
         return testing_player_id
 
+    @property
+    def zobrist_hash(self) -> int:
+        """
+        The hash of the state of this node and the action pending in it (the
+        fields of the node's class beyond those of GameTreeNode).
+        """
+
+        node_class = type(self)
+        pending_field_names = _PENDING_FIELD_NAMES.get(node_class)
+        if pending_field_names is None:
+            pending_field_names = _PENDING_FIELD_NAMES[node_class] = tuple(
+                field.name for field in fields(self)
+                if field.name not in _GAME_TREE_NODE_FIELD_NAMES
+            )
+
+        pending = []
+        for name in pending_field_names:
+            value = getattr(self, name)
+            pending.append(None if value is None else int(value))
+
+        return self._get_state_hash() ^ zobrist_key(
+            node_class.__name__, *pending
+        )
+
+    def _get_state_hash(self) -> int:
+        """
+        The state_hash, hashed in full if it was not given. Nodes that change
+        the state give their children one updated from this instead (see
+        _child_state_hash).
+        """
+
+        if self.state_hash is None:
+            self.state_hash = state_hash(
+                players=self.players,
+                revealed_cards=self.revealed_cards,
+                primary_player_id=self.primary_player_id,
+                perspective_player_id=self.perspective_player_id,
+                perspective_hand=self.perspective_hand,
+            )
+
+        return self.state_hash
+
+    def _child_state_hash(
+        self,
+        *,
+        players: list[Player],
+        revealed_cards: dict[Character, int],
+        primary_player_id: int,
+        perspective_hand: list[Character],
+    ) -> int:
+        """
+        The state_hash of a child with the given state, from this node's by
+        updating only what differs. Unchanged players, revealed_cards and
+        perspective_hand are expected to be the same objects as this node's.
+        """
+
+        h = self._get_state_hash()
+
+        if primary_player_id != self.primary_player_id:
+            h = update_primary_player(h, self.primary_player_id, primary_player_id)
+
+        for old, new in zip(self.players, players):
+            if old is new:
+                continue
+            if old.balance != new.balance:
+                h = update_balance(h, old.player_id, old.balance, new.balance)
+            if old.card_num != new.card_num:
+                h = update_card_num(h, old.player_id, old.card_num, new.card_num)
+
+        if revealed_cards is not self.revealed_cards:
+            for character in Character:
+                old_count = self.revealed_cards.get(character, 0)
+                new_count = revealed_cards.get(character, 0)
+                if old_count != new_count:
+                    h = update_revealed(h, character, old_count, new_count)
+
+        if perspective_hand is not self.perspective_hand:
+            for character in Character:
+                old_count = self.perspective_hand.count(character)
+                new_count = perspective_hand.count(character)
+                if old_count != new_count:
+                    h = update_hand(h, character, old_count, new_count)
+
+        return h
+
+    def _transposition_lookup(self) -> Optional[tuple[list[float], bool]]:
+        """
+        The evaluation of this node's state from the transposition table, if
+        it has been searched before at least as deep as this node is.
+        """
+
+        if self.transposition_table is None:
+            return None
+
+        evaluation = self.transposition_table.get(
+            self.zobrist_hash, self.search_depth
+        )
+        if evaluation is not None:
+            self.evaluation = evaluation
+        return evaluation
+
+    def _searched_depth(self) -> int:
+        """
+        How deep the evaluation of this node looked: one more than the
+        shallowest of its children, or its search_depth if it has none.
+        """
+
+        if self.children is None:
+            return self.search_depth
+
+        return 1 + min(child.search_depth for child in self.children)
+
+    def _transposition_store(self) -> None:
+        if self.transposition_table is not None and self.evaluation is not None:
+            self.search_depth = self._searched_depth()
+            self.transposition_table.put(
+                self.zobrist_hash, self.evaluation, self.search_depth
+            )
+
     def subtree_size(self) -> int:
         if self.children is None:
             return 1
@@ -139,7 +301,7 @@ class GameTreeNode:
         it doesn't need to rely on the specific properties of either subclass.
         """
 
-        best_for_decider: list[float] = [0] * len(children)
+        best_for_decider: list[float] = [0] * NUMBER_OF_PLAYERS
         was_heuristic = False
 
         for child in children:
@@ -183,6 +345,11 @@ class GameTreeNode:
         given card. This assumes that if a player has the card that they
         claimed they reveal it, and that if they don't they reveal a card
         selected uniformly at random from the cards the unknown cards.
+
+        With hand_beliefs, the chance of each hand they could have is weighted
+        by what they have done so far, rather than only by the unknown cards.
+        The beliefs are of the hands at the root, so a player who has lost a
+        card since is taken to have lost either of theirs with equal chance.
         """
 
         # We do not do anything probabilistic with the perspective player. We
@@ -195,6 +362,16 @@ class GameTreeNode:
         player = self.players[player_id]
 
         unknown_card_counts = self._get_unknown_card_counts()
+
+        if self.hand_beliefs is not None:
+            return self.hand_beliefs.probability_reveals(
+                player_id,
+                character,
+                claimed_card,
+                unknown_card_counts,
+                player.card_num,
+            )
+
         unknown_cards = sum(unknown_card_counts.values())
 
         probability_card_is_not_claimed_card = 1 - (
@@ -225,6 +402,14 @@ class GameTreeNode:
         )
 
 
+# The fields every node has. The fields a subclass adds describe the action
+# pending in its node, and are part of its zobrist_hash.
+_GAME_TREE_NODE_FIELD_NAMES = frozenset(
+    field.name for field in fields(GameTreeNode)
+)
+_PENDING_FIELD_NAMES: dict[type, tuple[str, ...]] = {}
+
+
 @dataclass(kw_only=True)
 class DeciderNode(GameTreeNode):
     # The player who picks which of the current actions is to be applied.
@@ -246,7 +431,11 @@ class DeciderNode(GameTreeNode):
         if self.evaluation is not None and not self.evaluation[1]:
             return self.evaluation
 
+        if self._transposition_lookup() is not None:
+            return self.evaluation
+
         if self.children is None:
+            self.search_depth = 0
             self.evaluation = self._heuristically_evaluate(), True
             return self.evaluation
 
@@ -254,9 +443,11 @@ class DeciderNode(GameTreeNode):
             children=self.children,
             player_id=self.deciding_player_id,
         )
+        self._transposition_store()
         return self.evaluation
 
 
+@dataclass(kw_only=True)
 class CardRevealNode(GameTreeNode):
     perspective_player_deciding: bool
 
@@ -274,7 +465,11 @@ class CardRevealNode(GameTreeNode):
         if self.evaluation is not None and not self.evaluation[1]:
             return self.evaluation
 
+        if self._transposition_lookup() is not None:
+            return self.evaluation
+
         if self.children is None:
+            self.search_depth = 0
             self.evaluation = self._heuristically_evaluate(), True
             return self.evaluation
 
@@ -283,6 +478,7 @@ class CardRevealNode(GameTreeNode):
                 children=self.children,
                 player_id=self.perspective_player_id,
             )
+            self._transposition_store()
             return self.evaluation
 
         # The children are expected to correspond exactly to the cards that
@@ -308,6 +504,7 @@ class CardRevealNode(GameTreeNode):
                 scores[index] += self.child_probabilities[index] * score
 
         self.evaluation = scores, was_heuristic
+        self._transposition_store()
         return self.evaluation
 
 
@@ -350,7 +547,11 @@ class MultipleDeciderNode(NonPrimaryNode):
         if self.evaluation is not None and not self.evaluation[1]:
             return self.evaluation
 
+        if self._transposition_lookup() is not None:
+            return self.evaluation
+
         if self.children is None:
+            self.search_depth = 0
             self.evaluation = self._heuristically_evaluate(), True
             return self.evaluation
 
@@ -393,4 +594,5 @@ class MultipleDeciderNode(NonPrimaryNode):
             )
 
         self.evaluation = chosen_so_far, was_heuristic
+        self._transposition_store()
         return self.evaluation
@@ -1,18 +1,26 @@
 from coup.tree.primary_action_node import PrimaryActionNode
 from coup.bots.enums import Character
 from coup.bots.game_info import Player
+from coup.bots.belief import HandBeliefs
+from coup.tree.transposition import TranspositionTable
 from coup.common.rules import NUMBER_OF_PLAYERS
 
 """END LOCAL IMPORTS"""
 
+from typing import Optional
+
 
 def make_game_root(
     perspective_player_id: int,
     perspective_player_hand: list[Character],
+    hand_beliefs: Optional[HandBeliefs] = None,
+    transposition_table: Optional[TranspositionTable] = None,
 ) -> PrimaryActionNode:
     """
     Creates the root node of a game tree from the perspective of the player
-    with the given id and the given hand.
+    with the given id and the given hand, and optionally what they believe
+    the other players hold. A transposition_table is shared by the whole tree
+    to search each state only once.
     """
 
     if len(perspective_player_hand) != 2:
@@ -31,6 +39,9 @@ def make_game_root(
         players=players,
         revealed_cards={},
         primary_player_id=0,
+        deciding_player_id=0,
         perspective_player_id=perspective_player_id,
         perspective_hand=perspective_player_hand,
+        hand_beliefs=hand_beliefs,
+        transposition_table=transposition_table,
     )
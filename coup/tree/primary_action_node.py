@@ -1,14 +1,18 @@
-from more_itertools import first
 from coup.tree.game_tree_node import DeciderNode, GameTreeNode
 from coup.tree.challenge_node import ChallengeNode
+from coup.tree.primary_action_result_node import PrimaryActionResultNode
 
 from coup.bots.enums import PrimaryAction
 
-from coup.common.rules import PRIMARY_ACTION_HAS_TARGET, PRIMARY_ACTION_TO_CARD
+from coup.common.rules import (
+    PRIMARY_ACTION_HAS_TARGET, PRIMARY_ACTION_TO_CARD, PRIMARY_ACTION_TO_COST
+)
 
 
 """END LOCAL IMPORTS"""
 
+from typing import Optional
+
 
 class PrimaryActionNode(DeciderNode):
     def _generate_own_children(self,) -> list[GameTreeNode]:
@@ -17,22 +21,15 @@ class PrimaryActionNode(DeciderNode):
 
         self.children = []
 
+        balance = self.players[self.primary_player_id].balance
+
         for primary_action in PrimaryAction:
+            if PRIMARY_ACTION_TO_COST[primary_action] > balance:
+                continue
+
             if not PRIMARY_ACTION_HAS_TARGET[primary_action]:
                 self.children.append(
-                    ChallengeNode(
-                        players=self.players,
-                        revealed_cards=self.revealed_cards,
-                        primary_player_id=self.primary_player_id,
-                        perspective_player_id=self.perspective_player_id,
-                        perspective_hand=self.perspective_hand,
-
-                        unresolved_primary_action=primary_action,
-                        unresolved_primary_action_target_id=None,
-                        subject_player_id=self.primary_player_id,
-                        claimed_card=PRIMARY_ACTION_TO_CARD[primary_action],
-                        challenging_primary_action=True,
-                    )
+                    self._action_node(primary_action, None)
                 )
 
                 continue
@@ -42,19 +39,7 @@ class PrimaryActionNode(DeciderNode):
             )
             while target_id != self.primary_player_id:
                 self.children.append(
-                    ChallengeNode(
-                        players=self.players,
-                        revealed_cards=self.revealed_cards,
-                        primary_player_id=self.primary_player_id,
-                        perspective_player_id=self.perspective_player_id,
-                        perspective_hand=self.perspective_hand,
-
-                        unresolved_primary_action=primary_action,
-                        unresolved_primary_action_target_id=target_id,
-                        subject_player_id=self.primary_player_id,
-                        claimed_card=PRIMARY_ACTION_TO_CARD[primary_action],
-                        challenging_primary_action=True
-                    )
+                    self._action_node(primary_action, target_id)
                 )
 
                 target_id = self._next_player_id(
@@ -62,3 +47,45 @@ class PrimaryActionNode(DeciderNode):
                 )
 
         return self.children
+
+    def _action_node(
+        self,
+        primary_action: PrimaryAction,
+        target_id: Optional[int],
+    ) -> GameTreeNode:
+        """
+        The node for the given action being taken. Actions that claim a card
+        can first be challenged, the rest go straight ahead.
+        """
+
+        if primary_action not in PRIMARY_ACTION_TO_CARD:
+            return PrimaryActionResultNode(
+                players=self.players,
+                revealed_cards=self.revealed_cards,
+                primary_player_id=self.primary_player_id,
+                perspective_player_id=self.perspective_player_id,
+                perspective_hand=self.perspective_hand,
+                hand_beliefs=self.hand_beliefs,
+                transposition_table=self.transposition_table,
+                state_hash=self.state_hash,
+
+                unresolved_primary_action=primary_action,
+                unresolved_primary_action_target_id=target_id,
+            )
+
+        return ChallengeNode(
+            players=self.players,
+            revealed_cards=self.revealed_cards,
+            primary_player_id=self.primary_player_id,
+            perspective_player_id=self.perspective_player_id,
+            perspective_hand=self.perspective_hand,
+            hand_beliefs=self.hand_beliefs,
+            transposition_table=self.transposition_table,
+            state_hash=self.state_hash,
+
+            unresolved_primary_action=primary_action,
+            unresolved_primary_action_target_id=target_id,
+            subject_player_id=self.primary_player_id,
+            claimed_card=PRIMARY_ACTION_TO_CARD[primary_action],
+            challenging_primary_action=True,
+        )
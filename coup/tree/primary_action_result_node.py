@@ -1,83 +1,95 @@
-from coup.tree.game_tree_node import NonPrimaryNode, UsuallyStochasticNode
+from coup.tree.game_tree_node import GameTreeNode, NonPrimaryNode
+from coup.bots.enums import PrimaryAction
+from coup.bots.game_info import Player
 
 """END LOCAL IMPORTS"""
 
 from dataclasses import dataclass
 
 
+# The coins the primary player takes for the actions that only take coins
+PRIMARY_ACTION_COINS: dict[PrimaryAction, int] = {
+    PrimaryAction.Income: 1,
+    PrimaryAction.ForeignAid: 2,
+}
+
+
 @dataclass(kw_only=True)
-class PrimaryActionResultNode(NonPrimaryNode, UsuallyStochasticNode):
-    def generate_children(
-        self, *,
-        to_depth: int,
-        current_depth: int = 0
-    ) -> None:
-        """
-        Something like this... this was written for a different piece of code
-        that no longer exists, so, obviously needs a lot of fixing.
-        """
+class PrimaryActionResultNode(NonPrimaryNode):
+    """
+    The unresolved primary action goes ahead. Its one child is the turn of the
+    next player, after the action.
+
+    Only the actions that take coins are resolved so far.
+    TODO: Block ForeignAid, and resolve the actions that take a card.
+    """
 
+    def _generate_own_children(self) -> list[GameTreeNode]:
+        if self.children is not None:
+            return self.children
+
+        # Imported here because the next turn's node makes these nodes
+        from coup.tree.primary_action_node import PrimaryActionNode
+
+        if self.unresolved_primary_action not in PRIMARY_ACTION_COINS:
+            raise NotImplementedError(
+                f'Resolving {self.unresolved_primary_action} is not done yet'
+            )
+
+        primary_player = self.players[self.primary_player_id]
         players = [*self.players]
-        perspective_hand = [*self.perspective_hand]
-
-        match self.unresolved_primary_action:
-            case PrimaryAction.Income:
-                players[self.primary_player_id] = Player(
-                    self.primary_player_id,
-                    self.players[self.primary_player_id].balance + 1,
-                    self.players[self.primary_player_id].card_num,
-                    False
-                )
-
-            case PrimaryAction.ForeignAid:
-                players[self.primary_player_id] = Player(
-                    self.primary_player_id,
-                    self.players[self.primary_player_id].balance + 1,
-                    self.players[self.primary_player_id].card_num,
-                    False
-                )
-
-            case PrimaryAction.Coup:
-                if (
-                    self.unresolved_primary_action_target is None
-                    or self.unresolved_primary_action_revealed_card is None
-                ):
-                    raise Exception(
-                        'For a Coup action, the target and revealed card must '
-                        'be set'
-                    )
-                
-                players[self.unresolved_primary_action_target] = Player(
-
-                )
-                
-                
-
-            case PrimaryAction.Tax:
-                pass
-
-            case PrimaryAction.Assassinate:
-                pass
-
-            case PrimaryAction.Exchange:
-                pass
-
-            case PrimaryAction.Steal:
-                pass
-
-            case other:
-                raise ValueError(
-                    'Unknown unresolved primary action '
-                    f'{self.unresolved_primary_action}'
-                )
-
-        next_primary_player = self.next_player_id(self.primary_player_id)
-
-        return PrimaryActionNode(
-            players=players,
-            revealed_cards=self.revealed_cards,
-            primary_player_id=next_primary_player,
-            deciding_player_id=next_primary_player,
-            perspective_player_id=self.perspective_player_id,
-            perspective_hand=perspective_hand
+        players[self.primary_player_id] = Player(
+            player_id=primary_player.player_id,
+            balance=(
+                primary_player.balance
+                + PRIMARY_ACTION_COINS[self.unresolved_primary_action]
+            ),
+            card_num=primary_player.card_num,
+            is_current=False,
         )
+
+        next_primary_player_id = self._next_player_id(
+            starting_player_id=self.primary_player_id
+        )
+
+        self.children = [
+            PrimaryActionNode(
+                players=players,
+                revealed_cards=self.revealed_cards,
+                primary_player_id=next_primary_player_id,
+                deciding_player_id=next_primary_player_id,
+                perspective_player_id=self.perspective_player_id,
+                perspective_hand=self.perspective_hand,
+                hand_beliefs=self.hand_beliefs,
+                transposition_table=self.transposition_table,
+                state_hash=self._child_state_hash(
+                    players=players,
+                    revealed_cards=self.revealed_cards,
+                    primary_player_id=next_primary_player_id,
+                    perspective_hand=self.perspective_hand,
+                ),
+            )
+        ]
+
+        return self.children
+
+    def evaluate(self) -> tuple[list[float], bool]:
+        """
+        Output as per DeciderNode.evaluate. There is nothing to decide, this
+        is the evaluation of the one child.
+        """
+
+        if self.evaluation is not None and not self.evaluation[1]:
+            return self.evaluation
+
+        if self._transposition_lookup() is not None:
+            return self.evaluation
+
+        if self.children is None:
+            self.search_depth = 0
+            self.evaluation = self._heuristically_evaluate(), True
+            return self.evaluation
+
+        self.evaluation = self.children[0].evaluate()
+        self._transposition_store()
+        return self.evaluation
@@ -0,0 +1,172 @@
+from coup.bots.enums import Character
+from coup.bots.game_info import Player
+
+"""END LOCAL IMPORTS"""
+
+from collections import OrderedDict
+from functools import lru_cache
+from random import Random
+from sys import maxsize
+from typing import Optional
+
+
+# The depth stored with an evaluation that involved no heuristic, which no
+# deeper search could change
+EXACT_DEPTH = maxsize
+
+
+@lru_cache(maxsize=None)
+def zobrist_key(*parts: object) -> int:
+    """
+    The random 64 bit key of one component of a state, such as
+    ('balance', player_id, balance). Keys are drawn from a generator seeded
+    with the component, so they are the same in every run without a table
+    having to be sized for every value up front.
+    """
+
+    return Random(repr(parts)).getrandbits(64)
+
+
+def balance_key(player_id: int, balance: int) -> int:
+    return zobrist_key('balance', player_id, balance)
+
+
+def card_num_key(player_id: int, card_num: int) -> int:
+    return zobrist_key('card_num', player_id, card_num)
+
+
+def revealed_key(character: Character, count: int) -> int:
+    return zobrist_key('revealed', int(character), count)
+
+
+def hand_key(character: Character, count: int) -> int:
+    return zobrist_key('hand', int(character), count)
+
+
+def primary_player_key(player_id: int) -> int:
+    return zobrist_key('primary_player', player_id)
+
+
+def perspective_player_key(player_id: int) -> int:
+    return zobrist_key('perspective_player', player_id)
+
+
+def state_hash(
+    *,
+    players: list[Player],
+    revealed_cards: dict[Character, int],
+    primary_player_id: int,
+    perspective_player_id: int,
+    perspective_hand: list[Character],
+) -> int:
+    """
+    The Zobrist hash of everything about a state but the action pending in
+    it: the XOR of the key of each component. When one component changes,
+    the hash can be updated by XORing out its old key and XORing in its new
+    one (see update_balance and friends), rather than hashed again.
+    """
+
+    h = primary_player_key(primary_player_id)
+    h ^= perspective_player_key(perspective_player_id)
+
+    for player in players:
+        h ^= balance_key(player.player_id, player.balance)
+        h ^= card_num_key(player.player_id, player.card_num)
+
+    for character in Character:
+        h ^= revealed_key(character, revealed_cards.get(character, 0))
+        h ^= hand_key(character, perspective_hand.count(character))
+
+    return h
+
+
+def update_balance(h: int, player_id: int, old: int, new: int) -> int:
+    return h ^ balance_key(player_id, old) ^ balance_key(player_id, new)
+
+
+def update_card_num(h: int, player_id: int, old: int, new: int) -> int:
+    return h ^ card_num_key(player_id, old) ^ card_num_key(player_id, new)
+
+
+def update_revealed(h: int, character: Character, old: int, new: int) -> int:
+    return h ^ revealed_key(character, old) ^ revealed_key(character, new)
+
+
+def update_hand(h: int, character: Character, old: int, new: int) -> int:
+    return h ^ hand_key(character, old) ^ hand_key(character, new)
+
+
+def update_primary_player(h: int, old: int, new: int) -> int:
+    return h ^ primary_player_key(old) ^ primary_player_key(new)
+
+
+class TranspositionTable:
+    """
+    The evaluations of states already searched, by their Zobrist hash, so
+    that a state reached by more than one order of actions is only searched
+    once. Each evaluation is kept with the depth it was searched to, and is
+    only reused for a search that needs no more depth than that. Evaluations
+    that involved no heuristic are final, so are kept with EXACT_DEPTH.
+
+    The table holds at most capacity evaluations, and when full forgets the
+    one least recently used.
+
+    The evaluations are only valid for the beliefs of the tree they came
+    from, so a table should not be shared between searches with different
+    hand_beliefs.
+    """
+
+    def __init__(self, capacity: int = 100_000) -> None:
+        if capacity < 1:
+            raise ValueError('A transposition table needs a capacity of 1 or more')
+
+        self.capacity = capacity
+        self.evaluations: OrderedDict[
+            int, tuple[tuple[list[float], bool], int]
+        ] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.evaluations)
+
+    def get(
+        self,
+        key: int,
+        depth: int,
+    ) -> Optional[tuple[list[float], bool]]:
+        """
+        The evaluation of a state, if it has been searched at least depth
+        actions deep.
+        """
+
+        entry = self.evaluations.get(key)
+        if entry is None or entry[1] < depth:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.evaluations.move_to_end(key)
+        return entry[0]
+
+    def put(
+        self,
+        key: int,
+        evaluation: tuple[list[float], bool],
+        depth: int,
+    ) -> None:
+        """
+        Keeps the evaluation of a state searched depth actions deep, unless
+        the table already has a deeper one.
+        """
+
+        if not evaluation[1]:
+            depth = EXACT_DEPTH
+
+        entry = self.evaluations.get(key)
+        if entry is None or entry[1] <= depth:
+            self.evaluations[key] = evaluation, depth
+        self.evaluations.move_to_end(key)
+        if len(self.evaluations) > self.capacity:
+            self.evaluations.popitem(last=False)
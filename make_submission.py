@@ -9,7 +9,11 @@ FILE_NAMES = [
     'coup/bots/enums.py',
     'coup/common/rules.py',
     'coup/bots/action.py',
+    'coup/bots/history_index.py',
+    'coup/bots/belief.py',
+    'coup/bots/history_decoder.py',
     'coup/bots/game_info.py',
+    'coup/bots/bot_logger.py',
     'coup/bots/bot_battle.py',
     *(['coup/bots/bots/'+b for b in BOT_FILE_NAMES]),
     'coup/bots/run.py',
@@ -0,0 +1,172 @@
+from array import array
+from random import Random
+
+from coup.bots.belief import HANDS, HandBeliefs
+from coup.bots.enums import Character
+from coup.bots.bots.main_bot import MainBot
+from coup.common.rules import NUMBER_OF_PLAYERS
+from coup.engine.determinize import (
+    DEAL_WEIGHTS,
+    DeterminizationSampler,
+    _HAND_KEYS,
+)
+from coup.engine.engine import EngineSnapshot
+from coup.engine.state import GameState, HAND_SLOTS
+
+
+SAMPLES = 20_000
+TOLERANCE = 0.02
+
+
+def public_state() -> EngineSnapshot:
+    """
+    Player 0 holds a Duke and a Captain, player 4 is out having revealed an
+    Assassin and a Contessa, and player 2 has revealed an Ambassador.
+    """
+
+    state = GameState()
+    state.cards_num = array('B', [2, 2, 1, 2, 0])
+    state.hands[0:2] = array('B', [Character.Duke, Character.Captain])
+    state.revealed[Character.Assassin - 1] = 1
+    state.revealed[Character.Contessa - 1] = 1
+    state.revealed[Character.Ambassador - 1] = 1
+
+    return EngineSnapshot(
+        bot_classes=[MainBot] * NUMBER_OF_PLAYERS,
+        state=state,
+        history=[],
+        history_indexes=[],
+        hand_beliefs=None,
+        turn=0,
+        primary_player_id=0,
+        eliminated_player_ids=[4],
+        complete=False,
+        deck_random_state=None,
+        bot_random_states=None,
+    )
+
+
+def skewed_beliefs() -> HandBeliefs:
+    """ Beliefs that strongly prefer some hands, to make any bias show """
+
+    rng = Random(0)
+    hand_beliefs = HandBeliefs()
+    for player_id in range(1, NUMBER_OF_PLAYERS):
+        hand_beliefs.likelihoods[player_id] = [
+            rng.choice((0.05, 1.0)) for _ in HANDS[2]
+        ]
+    hand_beliefs.likelihoods[2] = [0.05, 1.0, 0.05, 0.2, 1.0]
+    return hand_beliefs
+
+
+def exact_marginals(sampler: DeterminizationSampler) -> dict[int, list[float]]:
+    """ The chance of each hand of each hidden player, by enumerating deals """
+
+    marginals = {
+        player_id: [0.0] * len(HANDS[cards_num])
+        for player_id, cards_num, _ in sampler.hidden
+    }
+
+    def deal(i: int, key: int, weight: float, indexes: list[int]) -> None:
+        if i == len(sampler.hidden):
+            for (player_id, _, _), index in zip(sampler.hidden, indexes):
+                marginals[player_id][index] += weight
+            return
+
+        _, cards_num, likelihoods = sampler.hidden[i]
+        for index, deal_weight in enumerate(DEAL_WEIGHTS[cards_num][key]):
+            if deal_weight == 0:
+                continue
+            likelihood = likelihoods[index] if likelihoods is not None else 1.0
+            deal(
+                i + 1,
+                key - _HAND_KEYS[cards_num][index],
+                weight * deal_weight * likelihood,
+                indexes + [index],
+            )
+
+    deal(0, sampler.pool_key, 1.0, [])
+
+    for player_id, weights in marginals.items():
+        total = sum(weights)
+        marginals[player_id] = [weight / total for weight in weights]
+    return marginals
+
+
+def sampled_marginals(states: list[GameState]) -> dict[int, list[float]]:
+    marginals = {}
+    for player_id in range(1, NUMBER_OF_PLAYERS):
+        cards_num = states[0].cards_num[player_id]
+        if cards_num == 0:
+            continue
+
+        counts = [0] * len(HANDS[cards_num])
+        for state in states:
+            start = player_id * HAND_SLOTS
+            hand = tuple(sorted(state.hands[start:start + cards_num]))
+            counts[HANDS[cards_num].index(hand)] += 1
+        marginals[player_id] = [count / len(states) for count in counts]
+    return marginals
+
+
+def max_difference(a: dict[int, list[float]], b: dict[int, list[float]]) -> float:
+    assert a.keys() == b.keys()
+    return max(
+        abs(x - y)
+        for player_id in a
+        for x, y in zip(a[player_id], b[player_id])
+    )
+
+
+def one_at_a_time(sampler: DeterminizationSampler, rng: Random) -> list[GameState]:
+    return [sampler.sample_states(rng)[0] for _ in range(SAMPLES)]
+
+
+def in_batches(sampler: DeterminizationSampler, rng: Random, batch: int) -> list[GameState]:
+    states = []
+    while len(states) < SAMPLES:
+        states += sampler.sample_states(rng, batch)
+    return states
+
+
+def test_samples_are_consistent():
+    snapshot = public_state()
+    sampler = DeterminizationSampler(snapshot, 0, skewed_beliefs())
+
+    for state in sampler.sample_states(Random(1), 100):
+        assert state.hand(0) == (Character.Duke, Character.Captain)
+        assert state.deck_size == 5
+
+        total = [revealed + in_deck for revealed, in_deck in zip(state.revealed, state.deck)]
+        for card in state.hands:
+            if card:
+                total[card - 1] += 1
+        assert total == [3] * len(Character)
+
+
+def test_one_at_a_time_and_batched_match_without_beliefs():
+    sampler = DeterminizationSampler(public_state(), 0)
+    exact = exact_marginals(sampler)
+
+    single = sampled_marginals(one_at_a_time(sampler, Random(2)))
+    batched = sampled_marginals(in_batches(sampler, Random(3), SAMPLES))
+
+    assert max_difference(single, exact) < TOLERANCE
+    assert max_difference(batched, exact) < TOLERANCE
+    assert max_difference(single, batched) < TOLERANCE
+
+
+def test_batches_correct_for_dealing_order_with_beliefs():
+    sampler = DeterminizationSampler(public_state(), 0, skewed_beliefs())
+    assert sampler.weighted
+    exact = exact_marginals(sampler)
+
+    # A batch of the size MCTSBot draws when searching for a time
+    # budget, and a single large one as when searching a set of iterations
+    for batch in (32, SAMPLES):
+        batched = sampled_marginals(in_batches(sampler, Random(batch), batch))
+        assert max_difference(batched, exact) < TOLERANCE
+
+    # One at a time, the players dealt first are favoured
+    single = sampled_marginals(one_at_a_time(sampler, Random(4)))
+    assert max_difference(single, exact) > TOLERANCE
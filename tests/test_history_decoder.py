@@ -0,0 +1,73 @@
+from coup.bots.bots.examples.assassin import ExampleAssassin
+from coup.bots.bots.examples.challenger import ExampleChallenger
+from coup.bots.bots.main_bot import MainBot
+from coup.bots.bots.opponent_bot import OpponentBot
+from coup.bots.game_info import GameInfo
+from coup.bots.history_decoder import HistoryDecoder
+from coup.engine.engine import Engine, bot_answer
+
+
+LINEUP = [MainBot, ExampleChallenger, OpponentBot, ExampleAssassin, MainBot]
+
+
+def messages(seed: int, player_id: int = 0) -> list[dict]:
+    """ Every message the engine would send one seat in a game """
+
+    engine = Engine(LINEUP, debug=False, seed=seed)
+    sent = []
+
+    steps = engine.steps()
+    try:
+        decision = next(steps)
+        while True:
+            if decision.player_id == player_id:
+                sent.append(decision.game_info.to_dictionary())
+            bot = engine.players[decision.player_id].bot
+            decision = steps.send(bot_answer(bot, decision))
+    except StopIteration:
+        pass
+
+    return sent
+
+
+def state(game_info: GameInfo) -> tuple:
+    history_index = game_info.history_index
+    hand_beliefs = game_info.hand_beliefs
+    return (
+        len(game_info.history),
+        history_index.indexed_turns,
+        history_index.counters,
+        history_index.kills,
+        hand_beliefs.indexed_turns,
+        hand_beliefs.cards_num,
+        hand_beliefs.likelihoods,
+    )
+
+
+def test_consecutive_games_decode_as_with_a_new_decoder():
+    first_game, second_game = messages(seed=1), messages(seed=2)
+
+    decoder = HistoryDecoder()
+    for message in first_game:
+        GameInfo.from_dictionary(message, decoder)
+
+    new_decoder = HistoryDecoder()
+    for message in second_game:
+        assert state(GameInfo.from_dictionary(message, decoder)) == state(
+            GameInfo.from_dictionary(message, new_decoder)
+        )
+
+
+def test_new_game_after_a_game_without_completed_turns():
+    # A game that stops in its first turn, after a player has lost a card
+    first_message = messages(seed=3)[0]
+    first_message['players_cards_num'] = [2, 1, 2, 2, 2]
+
+    decoder = HistoryDecoder()
+    GameInfo.from_dictionary(first_message, decoder)
+    stale_beliefs = decoder.hand_beliefs
+    stale_index = decoder.history_index
+
+    GameInfo.from_dictionary(messages(seed=4)[0], decoder)
+    assert decoder.hand_beliefs is not stale_beliefs
+    assert decoder.history_index is not stale_index
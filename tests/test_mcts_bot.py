@@ -0,0 +1,16 @@
+from coup.analysis.tournament import play_game
+from coup.bots.bots.examples.challenger import ExampleChallenger
+from coup.bots.bots.examples.simple import ExampleSimple
+from coup.bots.bots.mcts_bot import MCTSBot
+from coup.bots.bots.opponent_bot import OpponentBot
+
+
+BOT_POOL = [ExampleSimple, ExampleChallenger, OpponentBot, ExampleSimple]
+
+
+def test_searching_iterations_is_reproducible():
+    bot = MCTSBot.with_search(iterations=20)
+
+    rows = [play_game(g, bot, BOT_POOL, 7) for g in range(3)]
+
+    assert rows == [play_game(g, bot, BOT_POOL, 7) for g in range(3)]
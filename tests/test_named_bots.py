@@ -0,0 +1,32 @@
+import multiprocessing
+import pickle
+
+from coup.analysis.tournament import play_game
+from coup.bots.bots.examples.simple import ExampleSimple
+from coup.bots.bots.mcts_bot import MCTSBot
+from coup.bots.bots.main_bot import MainBot
+from coup.bots.bots.opponent_bot import OpponentBot
+
+
+def test_named_bots_pickle_with_their_settings():
+    bot = MainBot.with_params(steal_balance=4)
+    search_bot = MCTSBot.with_search(iterations=5, rollout_bot=bot)
+
+    unpickled = pickle.loads(pickle.dumps(search_bot))
+
+    assert unpickled.__name__ == search_bot.__name__
+    assert issubclass(unpickled, MCTSBot)
+    assert unpickled.iterations == 5
+    assert unpickled.rollout_bot.__name__ == bot.__name__
+    assert unpickled.rollout_bot.params == bot.params
+
+
+def test_named_bots_play_in_spawned_workers():
+    bot_main = MainBot.with_params(steal_balance=4)
+    bot_pool = [ExampleSimple, OpponentBot.as_name('OpponentBot_0'), OpponentBot, ExampleSimple]
+    args = [(g, bot_main, bot_pool, 3) for g in range(4)]
+
+    with multiprocessing.get_context('spawn').Pool(2) as pool:
+        rows = pool.starmap(play_game, args)
+
+    assert rows == [play_game(*a) for a in args]
@@ -0,0 +1,222 @@
+from dataclasses import dataclass
+
+from coup.bots.enums import Character
+from coup.bots.game_info import Player
+from coup.common.rules import NUMBER_OF_PLAYERS
+from coup.tree.game_tree_node import CardRevealNode, DeciderNode, GameTreeNode
+from coup.tree.make_game_root import make_game_root
+from coup.tree.transposition import EXACT_DEPTH, TranspositionTable
+
+
+def root() -> DeciderNode:
+    return DeciderNode(
+        players=[Player(i, 2, 2, False) for i in range(NUMBER_OF_PLAYERS)],
+        revealed_cards={},
+        primary_player_id=0,
+        perspective_player_id=0,
+        perspective_hand=[Character.Duke, Character.Captain],
+        deciding_player_id=0,
+    )
+
+
+def after_taking_coins(node: DeciderNode, coins: int) -> DeciderNode:
+    """ The node after the primary player takes coins and passes the turn on """
+
+    player = node.players[node.primary_player_id]
+    players = [*node.players]
+    players[player.player_id] = Player(
+        player.player_id, player.balance + coins, player.card_num, False
+    )
+    next_primary_player_id = node._next_player_id(
+        starting_player_id=node.primary_player_id
+    )
+
+    return DeciderNode(
+        players=players,
+        revealed_cards=node.revealed_cards,
+        primary_player_id=next_primary_player_id,
+        perspective_player_id=node.perspective_player_id,
+        perspective_hand=node.perspective_hand,
+        deciding_player_id=next_primary_player_id,
+        state_hash=node._child_state_hash(
+            players=players,
+            revealed_cards=node.revealed_cards,
+            primary_player_id=next_primary_player_id,
+            perspective_hand=node.perspective_hand,
+        ),
+    )
+
+
+def play(node: DeciderNode, coins: list[int]) -> DeciderNode:
+    for taken in coins:
+        node = after_taking_coins(node, taken)
+    return node
+
+
+def rehashed(node: DeciderNode) -> DeciderNode:
+    return DeciderNode(
+        players=node.players,
+        revealed_cards=node.revealed_cards,
+        primary_player_id=node.primary_player_id,
+        perspective_player_id=node.perspective_player_id,
+        perspective_hand=node.perspective_hand,
+        deciding_player_id=node.deciding_player_id,
+    )
+
+
+INCOME = 1
+FOREIGN_AID = 2
+
+
+def test_income_then_foreign_aid_transposes_with_foreign_aid_then_income():
+    # Player 0 takes Income then ForeignAid on their next turn, or the other
+    # way round, while everyone else takes Income
+    others = [INCOME] * (NUMBER_OF_PLAYERS - 1)
+    income_first = play(root(), [INCOME, *others, FOREIGN_AID])
+    foreign_aid_first = play(root(), [FOREIGN_AID, *others, INCOME])
+
+    assert income_first.zobrist_hash == foreign_aid_first.zobrist_hash
+    assert income_first.zobrist_hash == rehashed(income_first).zobrist_hash
+
+
+def test_different_players_taking_coins_do_not_transpose():
+    income_first = play(root(), [INCOME, FOREIGN_AID])
+    foreign_aid_first = play(root(), [FOREIGN_AID, INCOME])
+
+    assert income_first.zobrist_hash != foreign_aid_first.zobrist_hash
+    assert foreign_aid_first.zobrist_hash == rehashed(foreign_aid_first).zobrist_hash
+
+
+def test_pending_fields_of_a_node_are_hashed():
+    node = root()
+
+    def card_reveal_node(perspective_player_deciding: bool) -> CardRevealNode:
+        return CardRevealNode(
+            players=node.players,
+            revealed_cards=node.revealed_cards,
+            primary_player_id=node.primary_player_id,
+            perspective_player_id=node.perspective_player_id,
+            perspective_hand=node.perspective_hand,
+            perspective_player_deciding=perspective_player_deciding,
+        )
+
+    assert card_reveal_node(True).zobrist_hash != card_reveal_node(False).zobrist_hash
+    assert card_reveal_node(True).zobrist_hash != node.zobrist_hash
+
+
+def test_least_recently_used_evaluation_is_evicted():
+    table = TranspositionTable(capacity=2)
+    table.put(1, ([1.0], False), 0)
+    table.put(2, ([2.0], False), 0)
+
+    # Using 1 makes 2 the least recently used
+    assert table.get(1, 0) == ([1.0], False)
+    table.put(3, ([3.0], False), 0)
+
+    assert len(table) == 2
+    assert table.get(2, 0) is None
+    assert table.get(1, 0) == ([1.0], False)
+    assert table.get(3, 0) == ([3.0], False)
+
+
+def test_evaluations_are_reused_only_as_deep_as_they_were_searched():
+    table = TranspositionTable()
+    table.put(1, ([0.5], True), 2)
+
+    assert table.get(1, 2) == ([0.5], True)
+    assert table.get(1, 1) == ([0.5], True)
+    assert table.get(1, 3) is None
+
+    # A shallower search does not replace a deeper one, a deeper one does
+    table.put(1, ([0.25], True), 1)
+    assert table.get(1, 2) == ([0.5], True)
+    table.put(1, ([0.75], True), 3)
+    assert table.get(1, 3) == ([0.75], True)
+
+    # An evaluation without a heuristic is good to any depth
+    table.put(1, ([1.0], False), 0)
+    assert table.get(1, EXACT_DEPTH) == ([1.0], False)
+
+
+@dataclass(kw_only=True)
+class CoinsNode(DeciderNode):
+    """ A turn in which the primary player can only take Income or ForeignAid """
+
+    def _generate_own_children(self) -> list[GameTreeNode]:
+        if self.children is None:
+            self.children = [
+                as_coins_node(after_taking_coins(self, coins), self)
+                for coins in (INCOME, FOREIGN_AID)
+            ]
+        return self.children
+
+
+def as_coins_node(node: DeciderNode, parent: CoinsNode) -> CoinsNode:
+    return CoinsNode(
+        players=node.players,
+        revealed_cards=node.revealed_cards,
+        primary_player_id=node.primary_player_id,
+        perspective_player_id=node.perspective_player_id,
+        perspective_hand=node.perspective_hand,
+        deciding_player_id=node.deciding_player_id,
+        transposition_table=parent.transposition_table,
+        state_hash=node.state_hash,
+    )
+
+
+def two_player_root(transposition_table: TranspositionTable = None) -> CoinsNode:
+    # Everyone but players 0 and 1 is out, so the two of them take turns
+    players = [
+        Player(i, 2, 2 if i < 2 else 0, False) for i in range(NUMBER_OF_PLAYERS)
+    ]
+    return CoinsNode(
+        players=players,
+        revealed_cards={},
+        primary_player_id=0,
+        perspective_player_id=0,
+        perspective_hand=[Character.Duke, Character.Captain],
+        deciding_player_id=0,
+        transposition_table=transposition_table,
+    )
+
+
+def expanded(node: GameTreeNode) -> int:
+    if node.children is None:
+        return 0
+    return 1 + sum(expanded(child) for child in node.children)
+
+
+def test_transpositions_are_expanded_once_in_one_search():
+    searched = two_player_root()
+    searched.generate_tree(to_depth=4)
+    searched.evaluate()
+
+    table = TranspositionTable()
+    root = two_player_root(table)
+    root.generate_tree(to_depth=4)
+
+    # After three turns player 0 has taken Income then ForeignAid or the
+    # other way round in two of the eight states, which share one subtree
+    assert expanded(searched) == 1 + 2 + 4 + 8
+    assert expanded(root) == 1 + 2 + 4 + 6
+    assert root.evaluation == searched.evaluation
+    assert root.search_depth == 4
+
+
+def test_the_game_tree_reuses_an_earlier_search():
+    table = TranspositionTable()
+
+    def game_root():
+        return make_game_root(
+            0, [Character.Duke, Character.Captain], transposition_table=table
+        )
+
+    root = game_root()
+    root.generate_tree(to_depth=1)
+    assert root.children is not None
+    assert len(table) == 1
+
+    again = game_root()
+    again.generate_tree(to_depth=1)
+    assert again.children is None
+    assert again.evaluation == root.evaluation